@@ -0,0 +1,7 @@
+"""
+Benchmarks for the flaskr app.
+
+Each module can be run from the root of the repository, for example:
+
+    python -m benchmarks.bench_pagination
+"""
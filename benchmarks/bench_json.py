@@ -0,0 +1,72 @@
+"""
+Benchmark of the JSON providers serializing a page of formatted movies.
+
+The movies, each with a few actors, are built in memory and formatted
+once. The time of the response of the payload is printed for Flask's
+provider and for each provider of flaskr.utils.json_provider, whose
+outputs are checked to be the same documents.
+
+    python -m benchmarks.bench_json [number_of_movies]
+"""
+
+import json
+import random
+import sys
+import timeit
+from datetime import date
+
+from flask import Flask
+
+from flaskr.data.models import Actor, GenderEnum, Movie
+from flaskr.utils.json_provider import JSON_PROVIDERS
+from flaskr.utils.movie_genre import MovieGenreEnum
+
+REPEAT = 20
+ACTORS_PER_MOVIE = 5
+NAMES = ("james", "jane", "audrey", "keanu", "bruce")
+
+
+def make_payload(number_of_movies):
+    rng = random.Random(0)
+    genres = list(MovieGenreEnum)
+    movies = []
+    for i in range(number_of_movies):
+        movie = Movie(
+            id=i + 1, title=f"Movie number {i}",
+            release_date=date(rng.randint(1950, 2022), rng.randint(1, 12), 1),
+            genre=rng.choice(genres),
+            description="A movie about a movie, " * 4)
+        movie.actors = [
+            Actor(id=i * ACTORS_PER_MOVIE + j, name=rng.choice(NAMES),
+                  age=rng.randint(5, 90), gender=rng.choice(list(GenderEnum)))
+            for j in range(ACTORS_PER_MOVIE)
+        ]
+        movies.append(movie)
+    return {"success": True, "movies": [movie.format() for movie in movies]}
+
+
+def main(number_of_movies=1000):
+    payload = make_payload(number_of_movies)
+    app = Flask(__name__)
+    expected = None
+
+    print(f"{number_of_movies} movies, best of {REPEAT} runs")
+    for name in ("flask", "stdlib", "orjson"):
+        if name not in JSON_PROVIDERS:
+            print(f"  {name:<7}: not installed")
+            continue
+        provider = JSON_PROVIDERS[name](app)
+        with app.app_context():
+            body = provider.response(payload).get_data()
+            best = min(timeit.repeat(
+                lambda: provider.response(payload), number=1, repeat=REPEAT))
+
+        document = json.loads(body)
+        if expected is None:
+            expected = document
+        assert document == expected, f"{name} returns another document"
+        print(f"  {name:<7}: {best * 1000:8.3f} ms  {len(body)} bytes")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
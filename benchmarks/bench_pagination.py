@@ -0,0 +1,71 @@
+"""
+Benchmark of OFFSET pagination against cursor (keyset) pagination.
+
+A temporary SQLite database is filled with actors, then the first page,
+a deep page fetched with OFFSET and the same deep page fetched with a
+cursor are timed. The cursor page should cost as much as the first one.
+
+    python -m benchmarks.bench_pagination [number_of_actors]
+"""
+
+import os
+import sys
+import tempfile
+import timeit
+from types import SimpleNamespace
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from werkzeug.datastructures import MultiDict
+
+from flaskr.constants import ITEM_PER_PAGE
+from flaskr.data.db import db
+from flaskr.data.models import Actor
+from flaskr.utils import Paginator
+
+REPEAT = 50
+
+
+def fill_database(engine, number_of_actors):
+    db.metadata.create_all(engine)
+    rows = [
+        {"name": "actor", "age": i % 90, "gender": "MF"[i % 2]}
+        for i in range(number_of_actors)
+    ]
+    with engine.begin() as connection:
+        connection.execute(Actor.__table__.insert(), rows)
+
+
+def time_page(session, args):
+    request = SimpleNamespace(args=MultiDict(args), base_url="local/")
+
+    def fetch_page():
+        Paginator(session.query(Actor), request).get_next_page_items()
+
+    return min(timeit.repeat(fetch_page, number=1, repeat=REPEAT)) * 1000
+
+
+def main(number_of_actors=200_000):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        engine = create_engine(
+            f"sqlite:///{os.path.join(tmp_dir, 'bench.sqlite3')}")
+        fill_database(engine, number_of_actors)
+
+        deep_page = number_of_actors // ITEM_PER_PAGE - 1
+        with Session(engine) as session:
+            request = SimpleNamespace(
+                args=MultiDict({"page": deep_page - 1}), base_url="local/")
+            paginator = Paginator(session.query(Actor), request)
+            paginator.get_next_page_items()
+            cursor = paginator.next_cursor
+
+            print(f"{number_of_actors} actors, best of {REPEAT} runs")
+            print(f"page 1         : {time_page(session, {'page': 1}):.3f} ms")
+            print(f"page {deep_page} (offset): "
+                  f"{time_page(session, {'page': deep_page}):.3f} ms")
+            print(f"page {deep_page} (cursor): "
+                  f"{time_page(session, {'cursor': cursor}):.3f} ms")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
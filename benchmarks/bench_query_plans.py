@@ -0,0 +1,106 @@
+"""
+Benchmark of the filter and sort queries before and after their indexes.
+
+A temporary SQLite database is migrated to the initial schema and filled
+with movies, actors and casts. The query plan and the time of each query
+are printed, then the database is migrated to the latest revision, which
+adds the indexes, and they are printed again. A SCAN of a whole table
+should become a SEARCH using an index.
+
+    python -m benchmarks.bench_query_plans [number_of_actors]
+"""
+
+import os
+import random
+import sys
+import tempfile
+import timeit
+from datetime import date
+
+from flask import Flask
+from flask_migrate import upgrade
+from sqlalchemy import text
+
+from flaskr.data.db import db, db_setup
+from flaskr.data.models import Actor, Movie, movie_actor
+
+MIGRATIONS_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "migrations")
+INITIAL_REVISION = "90dff70c4687"
+REPEAT = 20
+
+QUERIES = {
+    "movies of an actor": (
+        "SELECT movie.id, movie.title FROM movie "
+        "JOIN association ON movie.id = association.movie_id "
+        "WHERE association.actor_id = :actor_id"),
+    "movies of a genre": (
+        "SELECT id, title FROM movie WHERE genre = 'Drama' LIMIT 3"),
+    "movies by release date": (
+        "SELECT id, title FROM movie ORDER BY release_date, id LIMIT 3"),
+    "actors by name prefix": (
+        "SELECT id, name FROM actor WHERE name >= 'jam' AND name < 'jan' "
+        "LIMIT 3"),
+    "actors by age": (
+        "SELECT id, name FROM actor WHERE age BETWEEN 30 AND 31 LIMIT 3"),
+}
+
+
+def fill_database(connection, number_of_actors):
+    rng = random.Random(0)
+    number_of_movies = number_of_actors // 5
+    connection.execute(Actor.__table__.insert(), [
+        {"name": f"{rng.choice(['jack', 'james', 'jane'])}{i}",
+         "age": rng.randint(5, 90), "gender": rng.choice("MF")}
+        for i in range(number_of_actors)
+    ])
+    connection.execute(Movie.__table__.insert(), [
+        {"title": f"Movie {i}", "genre": rng.choice(["Action", "Drama"]),
+         "release_date": date(rng.randint(1950, 2022), 1, 1)}
+        for i in range(number_of_movies)
+    ])
+    connection.execute(movie_actor.insert(), [
+        {"movie_id": movie_id, "actor_id": actor_id}
+        for movie_id in range(1, number_of_movies + 1)
+        for actor_id in rng.sample(range(1, number_of_actors + 1), 10)
+    ])
+
+
+def print_plans(connection, number_of_actors):
+    params = {"actor_id": number_of_actors // 2}
+    for name, query in QUERIES.items():
+        plan = connection.execute(
+            text(f"EXPLAIN QUERY PLAN {query}"), params).all()
+        best = min(timeit.repeat(
+            lambda: connection.execute(text(query), params).all(),
+            number=1, repeat=REPEAT))
+        print(f"  {name:<23}: {best * 1000:8.3f} ms  "
+              f"{' / '.join(row[-1] for row in plan)}")
+
+
+def main(number_of_actors=100_000):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        app = Flask(__name__)
+        app.config["SQLALCHEMY_DATABASE_URI"] = (
+            f"sqlite:///{os.path.join(tmp_dir, 'bench.sqlite3')}")
+        db_setup(app)
+
+        with app.app_context():
+            upgrade(directory=MIGRATIONS_DIR, revision=INITIAL_REVISION)
+            with db.engine.begin() as connection:
+                fill_database(connection, number_of_actors)
+
+            print(f"{number_of_actors} actors, best of {REPEAT} runs")
+            print("before the indexes:")
+            with db.engine.connect() as connection:
+                print_plans(connection, number_of_actors)
+
+            upgrade(directory=MIGRATIONS_DIR)
+            print("after the indexes:")
+            with db.engine.connect() as connection:
+                connection.execute(text("ANALYZE"))
+                print_plans(connection, number_of_actors)
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,98 @@
+"""
+Benchmark of the full-text search against a LIKE scan of the movies.
+
+A temporary SQLite database is filled with generated movies, indexed by
+the search triggers as they are inserted. The time of a few searches is
+printed with `LIKE '%word%'` on the title and description, which scans
+the whole table, and with the FTS5 index. Both count every match, as the
+endpoint does for its total, then the FTS5 top page ranked by bm25 is
+timed.
+
+    python -m benchmarks.bench_search [number_of_movies]
+"""
+
+import os
+import random
+import sys
+import tempfile
+import timeit
+from datetime import date
+
+from flask import Flask
+from sqlalchemy import text
+
+from flaskr.data.db import db, db_setup
+from flaskr.data.models import Movie
+from flaskr.data.search import build_match_query
+
+REPEAT = 5
+CHUNK_SIZE = 10_000
+
+WORDS = (
+    "love war night star city dark lost return last king dead blood "
+    "secret house man woman girl boy world time life death road river "
+    "moon fire ice storm shadow dream ghost heart iron golden silent "
+    "wild empire hunter killer angel devil summer winter island ocean"
+).split()
+
+SEARCHES = ("ghost", "golden river", "4242", "silent 99")
+
+LIKE_QUERY = (
+    "SELECT count(*) FROM movie "
+    "WHERE " + " AND ".join(
+        "(title LIKE :like{0} OR description LIKE :like{0})".format(i)
+        for i in range(2)))
+MATCH_QUERY = (
+    "SELECT count(*) FROM search_index WHERE search_index MATCH :match")
+RANKED_QUERY = (
+    "SELECT rowid, title FROM search_index "
+    "WHERE search_index MATCH :match ORDER BY rank LIMIT 3")
+
+
+def fill_database(connection, number_of_movies):
+    rng = random.Random(0)
+    for start in range(0, number_of_movies, CHUNK_SIZE):
+        connection.execute(Movie.__table__.insert(), [
+            {"title": f"{' '.join(rng.sample(WORDS, 3)).title()} {i}",
+             "description": " ".join(rng.choices(WORDS, k=12)),
+             "genre": rng.choice(["Action", "Drama"]),
+             "release_date": date(rng.randint(1950, 2022), 1, 1)}
+            for i in range(start, min(start + CHUNK_SIZE, number_of_movies))
+        ])
+
+
+def best_time(connection, query, params):
+    return min(timeit.repeat(
+        lambda: connection.execute(text(query), params).all(),
+        number=1, repeat=REPEAT))
+
+
+def main(number_of_movies=500_000):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        app = Flask(__name__)
+        app.config["SQLALCHEMY_DATABASE_URI"] = (
+            f"sqlite:///{os.path.join(tmp_dir, 'bench.sqlite3')}")
+        db_setup(app)
+
+        with app.app_context():
+            db.create_all()
+            with db.engine.begin() as connection:
+                fill_database(connection, number_of_movies)
+
+            print(f"{number_of_movies} movies, best of {REPEAT} runs")
+            with db.engine.connect() as connection:
+                for search in SEARCHES:
+                    words = (search.split() * 2)[:2]
+                    like = best_time(connection, LIKE_QUERY, {
+                        f"like{i}": f"%{word}%"
+                        for i, word in enumerate(words)})
+                    params = {"match": build_match_query(search)}
+                    match = best_time(connection, MATCH_QUERY, params)
+                    ranked = best_time(connection, RANKED_QUERY, params)
+                    print(f"  {search!r:<14}: LIKE {like * 1000:9.3f} ms  "
+                          f"MATCH {match * 1000:9.3f} ms  "
+                          f"ranked page {ranked * 1000:9.3f} ms")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,121 @@
+"""
+Benchmark of the read throughput of SQLite while a writer is active.
+
+For each PRAGMAs profile, a temporary database is filled with actors and
+reader processes fetch the first page of actors in a loop, while a writer
+process inserts actors one transaction at a time, as concurrent gunicorn
+workers would. The reads and writes per second and the "database is
+locked" errors are printed for the default profile and the production one
+(see ProductionConfig.SQLITE_PRAGMAS).
+
+    python -m benchmarks.bench_sqlite_concurrency [readers] [seconds]
+"""
+
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from functools import partial
+
+from sqlalchemy import create_engine, event, exc, select
+
+from flaskr.config import ProductionConfig
+from flaskr.constants import ITEM_PER_PAGE
+from flaskr.data.db import db, set_sqlite_pragmas
+from flaskr.data.models import Actor
+
+PROFILES = {
+    "default": {},
+    "production": ProductionConfig.SQLITE_PRAGMAS,
+}
+
+
+def create_sqlite_engine(path, pragmas):
+    engine = create_engine(f"sqlite:///{path}")
+    event.listen(
+        engine, "connect", partial(set_sqlite_pragmas, pragmas=pragmas))
+    return engine
+
+
+def fill_database(path, pragmas, number_of_actors=10_000):
+    engine = create_sqlite_engine(path, pragmas)
+    db.metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(Actor.__table__.insert(), [
+            {"name": "actor", "age": i % 90, "gender": "MF"[i % 2]}
+            for i in range(number_of_actors)
+        ])
+    engine.dispose()
+
+
+def read(path, pragmas, seconds, results):
+    engine = create_sqlite_engine(path, pragmas)
+    page = select(Actor.__table__).order_by(Actor.id).limit(ITEM_PER_PAGE)
+    reads = errors = 0
+    deadline = time.monotonic() + seconds
+    with engine.connect() as connection:
+        while time.monotonic() < deadline:
+            try:
+                connection.execute(page).all()
+                reads += 1
+            except exc.OperationalError:
+                errors += 1
+    results.put(("read", reads, errors))
+
+
+def write(path, pragmas, seconds, results):
+    engine = create_sqlite_engine(path, pragmas)
+    insert = Actor.__table__.insert()
+    writes = errors = 0
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        try:
+            with engine.begin() as connection:
+                connection.execute(
+                    insert, {"name": "writer", "age": 30, "gender": "F"})
+            writes += 1
+        except exc.OperationalError:
+            errors += 1
+    results.put(("write", writes, errors))
+
+
+def run_profile(tmp_dir, name, pragmas, readers, seconds):
+    path = os.path.join(tmp_dir, f"{name}.sqlite3")
+    fill_database(path, pragmas)
+
+    results = multiprocessing.Queue()
+    processes = [
+        multiprocessing.Process(
+            target=read, args=(path, pragmas, seconds, results))
+        for _ in range(readers)
+    ]
+    processes.append(multiprocessing.Process(
+        target=write, args=(path, pragmas, seconds, results)))
+    for process in processes:
+        process.start()
+
+    totals = {"read": [0, 0], "write": [0, 0]}
+    for _ in processes:
+        kind, count, errors = results.get()
+        totals[kind][0] += count
+        totals[kind][1] += errors
+    for process in processes:
+        process.join()
+
+    (reads, read_errors), (writes, write_errors) = (
+        totals["read"], totals["write"])
+    print(f"{name:<11}: {reads / seconds:>9.0f} reads/s "
+          f"({read_errors} locked), {writes / seconds:>6.0f} writes/s "
+          f"({write_errors} locked)")
+
+
+def main(readers=4, seconds=5):
+    print(f"{readers} readers and 1 writer for {seconds} s")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for name, pragmas in PROFILES.items():
+            run_profile(tmp_dir, name, pragmas, readers, seconds)
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,75 @@
+"""
+Benchmark of the startup of the app: import, create_app and first request.
+
+Each run is a new Python process, so nothing is imported yet. It times
+`import flaskr`, then create_app, then the first request to the API, which
+checks a token and reads the database, with the token verification
+stubbed. The runs share a temporary database, created beforehand. The
+best and the median of the runs are printed.
+
+    python -m benchmarks.bench_startup [number_of_runs]
+"""
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+import flaskr
+from flaskr.config import TestingConfig
+from flaskr.data.db import init_db
+
+RUN = """
+import json, os, time
+start = time.perf_counter()
+import flaskr
+imported = time.perf_counter()
+flaskr.config.TestingConfig.SQLALCHEMY_DATABASE_URI = os.environ[
+    "BENCH_DATABASE_URI"]
+app = flaskr.create_app(test_config=True)
+created = time.perf_counter()
+
+from unittest import mock
+with mock.patch("flaskr.auth.auth.get_token_auth_header", return_value=""), \\
+        mock.patch("flaskr.auth.auth.verify_decode_jwt",
+                   return_value={"permissions": ["get:actors"]}):
+    response = app.test_client().get("/api/v1/actors")
+assert response.status_code == 200, response.status_code
+requested = time.perf_counter()
+
+print(json.dumps({
+    "import": imported - start,
+    "create_app": created - imported,
+    "first request": requested - created,
+    "total": requested - start,
+}))
+"""
+
+
+def main(number_of_runs=10):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        uri = f"sqlite:///{os.path.join(tmp_dir, 'bench.sqlite3')}"
+        TestingConfig.SQLALCHEMY_DATABASE_URI = uri
+        app = flaskr.create_app(test_config=True)
+        with app.app_context():
+            init_db()
+
+        env = dict(os.environ, BENCH_DATABASE_URI=uri)
+        runs = [
+            json.loads(subprocess.run(
+                [sys.executable, "-c", RUN], check=True, capture_output=True,
+                text=True, env=env).stdout)
+            for _ in range(number_of_runs)
+        ]
+
+    print(f"{number_of_runs} runs")
+    for step in runs[0]:
+        times = [run[step] * 1000 for run in runs]
+        print(f"  {step:<13}: best {min(times):8.1f} ms  "
+              f"median {statistics.median(times):8.1f} ms")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,70 @@
+"""
+Microbenchmark of token verification, cold against cached.
+
+A token is signed with a locally generated RSA key, whose JWKS is served
+by a stub fetcher. Cold verifications go through the signature check of
+verify_decode_jwt, warm ones are answered by the verified token cache.
+
+    python -m benchmarks.bench_token_cache [number_of_calls]
+"""
+
+import sys
+import time
+import timeit
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jose import jwk, jwt
+
+from flaskr.auth import auth
+from flaskr.auth.caches import JWKSCache
+
+DOMAIN = "bench.auth0.com"
+AUDIENCE = "casting"
+
+
+def make_token():
+    """Signs a token and registers its key in a stub JWKS cache."""
+    private_key = rsa.generate_private_key(
+        public_exponent=65537, key_size=2048)
+    pem = private_key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    )
+    public_jwk = jwk.construct(pem, "RS256").public_key().to_dict()
+    public_jwk.update({"kid": "bench", "use": "sig"})
+    auth.jwks_caches[DOMAIN] = JWKSCache(lambda: {"keys": [public_jwk]})
+
+    claims = {
+        "iss": f"https://{DOMAIN}/",
+        "aud": AUDIENCE,
+        "exp": int(time.time()) + 3600,
+        "permissions": ["get:actors", "get:movie"],
+    }
+    return jwt.encode(claims, pem, algorithm="RS256",
+                      headers={"kid": "bench"})
+
+
+def main(number_of_calls=2000):
+    auth.AUTH0_DOMAIN, auth.API_AUDIENCE = DOMAIN, AUDIENCE
+    auth.ALGORITHMS = ["RS256"]
+    token = make_token()
+
+    def cold():
+        auth.token_cache.clear()
+        auth.get_verified_payload(token)
+
+    def warm():
+        auth.get_verified_payload(token)
+
+    for name, verify in (("cold", cold), ("warm", warm)):
+        verify()
+        seconds = min(timeit.repeat(verify, number=number_of_calls, repeat=3))
+        print(f"{name}: {seconds / number_of_calls * 1e6:8.1f} us per call")
+
+    print(auth.token_cache.stats())
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -2,6 +2,10 @@
 This is the main module of the application.
 
 It contains the app factory, applies config, sets the database and the CORS.s
+
+Importing the package does not create an app: `flaskr.app`, used by e.g.
+`gunicorn flaskr:app`, is created on first access. The schema is created by
+`flask init-db` or by the migrations (`flask db upgrade`).
 """
 
 import os
@@ -12,12 +16,17 @@ from flask_cors import CORS
 from .config import ProductionConfig, DevelopmentConfig, TestingConfig
 
 from .data.models import Movie, Actor  # noqa
+from .data.search import SearchEntry  # noqa
 from .data.db import db_setup
+from .data.seed import seed_command
 
-from .utils import error_handlers_blueprint
+from .utils import error_handlers_blueprint, JSON_PROVIDERS
+from .utils import init_server_timing
 from .routes import actors_blueprint, movies_blueprint
-from .routes import oauth_blueprint, oauth
+from .routes import oauth_blueprint
 from .routes import health_blueprint
+from .routes import search_blueprint
+from .routes import export_blueprint
 from .constants import API_VERSION
 
 
@@ -43,6 +52,9 @@ def create_app(test_config=False):
     else:
         app.config.from_object(DevelopmentConfig)
 
+    # Setting the JSON serializer of the responses
+    app.json = JSON_PROVIDERS[app.config["JSON_PROVIDER"]](app)
+
     # Setting Cors
     CORS(app)
 
@@ -61,19 +73,35 @@ def create_app(test_config=False):
     app.register_blueprint(
         health_blueprint, url_prefix=f"/api/{API_VERSION}")
 
-    # Setting up the database
-    db = db_setup(app)
+    app.register_blueprint(
+        search_blueprint, url_prefix=f"/api/{API_VERSION}")
+
+    app.register_blueprint(
+        export_blueprint, url_prefix=f"/api/{API_VERSION}")
+
+    if app.config["METRICS"]:
+        # prometheus_client is only imported when the metrics are enabled
+        from .routes.metrics import metrics_blueprint
 
-    with app.app_context():
-        db.create_all()
+        app.register_blueprint(metrics_blueprint)
 
-    # Setting up the Auth0
-    oauth.init_app(app)
+    # Setting up the database
+    db_setup(app)
+    app.cli.add_command(seed_command)
+
+    # Setting the Server-Timing instrumentation, if enabled
+    init_server_timing(app)
 
     return app
 
 
-app = create_app()
+def __getattr__(name):
+    """Creates the module's `app` on first access."""
+    if name == "app":
+        app = globals()["app"] = create_app()
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 if __name__ == "__main__":
-    app.run(host="0.0.0.0", port=8080)
+    create_app().run(host="0.0.0.0", port=8080)
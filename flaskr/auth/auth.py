@@ -1,17 +1,31 @@
 """Auth0 authorization and authentication flow."""
 
 import os
-import json
 from flask import request, abort
-from functools import wraps
-from jose import jwt
-from urllib.request import urlopen
+from functools import partial, wraps
+
+from .caches import JWKSCache, VerifiedTokenCache, fetch_jwks
+from ..utils.server_timing import timed
 
 
 AUTH0_DOMAIN = os.getenv("AUTH0_DOMAIN")
 ALGORITHMS = os.getenv("ALGORITHMS")
 API_AUDIENCE = os.getenv("API_AUDIENCE")
 
+# Number of seconds the Auth0 JWKS is cached for.
+JWKS_CACHE_TTL = int(os.getenv("JWKS_CACHE_TTL", 600))
+# Minimum number of seconds between two fetches of the Auth0 JWKS.
+JWKS_MIN_REFRESH_INTERVAL = int(os.getenv("JWKS_MIN_REFRESH_INTERVAL", 30))
+
+# Maximum number of verified token payloads cached, 0 disables the cache.
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", 1024))
+
+# JWKS caches by Auth0 domain, see get_jwks_cache.
+jwks_caches = {}
+
+# Payloads of the verified tokens, see get_verified_payload.
+token_cache = VerifiedTokenCache(maxsize=TOKEN_CACHE_SIZE)
+
 
 class AuthError(Exception):
     """AuthError Exception
@@ -106,12 +120,36 @@ def check_permissions(permission, payload):
 # https://stackoverflow.com/questions/50236117/scraping-ssl-certificate-verify-failed-error-for-http-en-wikipedia-org
 
 
+def get_jwks_cache(auth0_domain):
+    """Gets the JWKS cache of an Auth0 domain, creating it if needed.
+
+    Parameters:
+    ------
+        auth0_domain: the Auth0 domain (string)
+
+    Returns:
+    ------
+        the JWKSCache of the domain
+    """
+    cache = jwks_caches.get(auth0_domain)
+    if cache is None:
+        cache = jwks_caches.setdefault(auth0_domain, JWKSCache(
+            fetcher=partial(fetch_jwks, auth0_domain),
+            ttl=JWKS_CACHE_TTL,
+            min_refresh_interval=JWKS_MIN_REFRESH_INTERVAL,
+        ))
+    return cache
+
+
 def verify_decode_jwt(token, auth0_domain, algorithms, audience):
     """Verrifies if a token is valid.
 
     Parameters:
     ------
         token: a json web token (string)
+        auth0_domain: the Auth0 domain, which JWKS is cached
+        algorithms: the accepted signing algorithms
+        audience: the expected audience
 
     Returns:
     ------
@@ -120,10 +158,12 @@ def verify_decode_jwt(token, auth0_domain, algorithms, audience):
     -------
     AuthError if:
         token is not valid.
+        the JWKS of the domain could not be fetched.
     """
 
-    jsonurl = urlopen(f'https://{auth0_domain}/.well-known/jwks.json')
-    jwks = json.loads(jsonurl.read())
+    # jose takes a while to import, only the first verification pays for it.
+    from jose import jwt
+
     unverified_header = jwt.get_unverified_header(token)
     rsa_key = {}
     if 'kid' not in unverified_header:
@@ -131,15 +171,21 @@ def verify_decode_jwt(token, auth0_domain, algorithms, audience):
             'code': 'invalid_header',
             'description': 'Authorization malformed.'
         }, 401)
-    for key in jwks['keys']:
-        if key['kid'] == unverified_header['kid']:
-            rsa_key = {
-                'kty': key['kty'],
-                'kid': key['kid'],
-                'use': key['use'],
-                'n': key['n'],
-                'e': key['e']
-            }
+    try:
+        key = get_jwks_cache(auth0_domain).get_key(unverified_header['kid'])
+    except Exception:
+        raise AuthError({
+            'code': 'jwks_unavailable',
+            'description': 'Unable to fetch the signing keys.'
+        }, 503)
+    if key:
+        rsa_key = {
+            'kty': key['kty'],
+            'kid': key['kid'],
+            'use': key['use'],
+            'n': key['n'],
+            'e': key['e']
+        }
     if rsa_key:
         try:
             payload = jwt.decode(
@@ -176,12 +222,40 @@ def verify_decode_jwt(token, auth0_domain, algorithms, audience):
             }, 400)
 
 
-def requires_auth(permission=''):
+def get_verified_payload(token):
+    """Gets the payload of a token, verifying it if it is not cached.
+
+    Parameters:
+    ------
+        token: a json web token (string)
+
+    Returns:
+    ------
+        the decoded payload
+
+    Raises
+    -------
+    AuthError if:
+        token is not valid.
+    """
+    payload = token_cache.get(token)
+    if payload is None:
+        payload = verify_decode_jwt(token,
+                                    auth0_domain=AUTH0_DOMAIN,
+                                    algorithms=ALGORITHMS,
+                                    audience=API_AUDIENCE)
+        token_cache.set(token, payload)
+    return payload
+
+
+def requires_auth(*permissions):
     """Verrify if the user have the required permissions
 
+    The token is verified once, then each permission is checked.
+
     Parameters:
     ------
-        permission: string permission (i.e. 'post:drink')
+        permissions: string permissions (i.e. 'post:drink'), all required
 
     Returns:
     ------
@@ -191,12 +265,11 @@ def requires_auth(permission=''):
         @wraps(f)
         def wrapper(*args, **kwargs):
             try:
-                token = get_token_auth_header()
-                payload = verify_decode_jwt(token,
-                                            auth0_domain=AUTH0_DOMAIN,
-                                            algorithms=ALGORITHMS,
-                                            audience=API_AUDIENCE)
-                check_permissions(permission, payload)
+                with timed("auth"):
+                    token = get_token_auth_header()
+                    payload = get_verified_payload(token)
+                    for permission in permissions:
+                        check_permissions(permission, payload)
             except AuthError as e:
                 abort(e.status_code, e.error)
             return f(*args, **kwargs)
@@ -0,0 +1,212 @@
+"""In process caches used by the Auth0 authorization flow."""
+
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from urllib.request import urlopen
+
+
+logger = logging.getLogger(__name__)
+
+
+def fetch_jwks(auth0_domain, timeout=5):
+    """Fetches the JSON Web Key Set of an Auth0 domain.
+
+    Returns:
+    ------
+        the decoded JWKS (a dict with a 'keys' list)
+    """
+    url = f'https://{auth0_domain}/.well-known/jwks.json'
+    with urlopen(url, timeout=timeout) as response:
+        return json.loads(response.read())
+
+
+class JWKSCache(object):
+    """In process cache of a JSON Web Key Set.
+
+    The key set is fetched once and kept for `ttl` seconds. A key id which
+    is not in the cached set triggers a refresh, so signing keys rotated
+    by Auth0 are picked up without waiting for the ttl.
+
+    Only one thread fetches the key set at a time. While it does, the
+    other threads keep using the cached keys, and if the fetch fails the
+    cached (stale) keys are still served. Refreshes are never attempted
+    more than once every `min_refresh_interval` seconds, whatever the
+    reason (expired set, unknown key id or failed fetch).
+
+    Parameters:
+    ------
+        fetcher: callable returning the JWKS, see fetch_jwks
+        ttl: number of seconds the key set is considered fresh
+        min_refresh_interval: minimum number of seconds between two fetches
+        clock: callable returning the current time in seconds
+    """
+
+    def __init__(self, fetcher, ttl=600, min_refresh_interval=30,
+                 clock=time.monotonic):
+        self.fetcher = fetcher
+        self.ttl = ttl
+        self.min_refresh_interval = min_refresh_interval
+        self.clock = clock
+        self.fetches = 0
+        self.failures = 0
+        self._keys = None
+        self._fetched_at = None
+        self._attempted_at = None
+        self._lock = threading.Lock()
+
+    def get_key(self, kid):
+        """Gets a key of the set from its key id.
+
+        Returns:
+        ------
+            the key (a dict), or None if no key has this id
+
+        Raises
+        -------
+        the fetcher's exception if the key set was never fetched
+        successfully.
+        """
+        keys = self._keys
+        if keys is None or self._is_expired():
+            keys = self._refresh(force=False)
+
+        if kid not in keys:
+            keys = self._refresh(force=True)
+
+        return keys.get(kid)
+
+    def clear(self):
+        """Drops the cached key set."""
+        with self._lock:
+            self._keys = None
+            self._fetched_at = None
+            self._attempted_at = None
+
+    def _is_expired(self):
+        return self.clock() - self._fetched_at >= self.ttl
+
+    def _can_refresh(self, force):
+        if self._keys is None:
+            return True
+        now = self.clock()
+        if now - self._attempted_at < self.min_refresh_interval:
+            return False
+        return force or now - self._fetched_at >= self.ttl
+
+    def _refresh(self, force):
+        """Fetches the key set, unless it is not due or already fetching.
+
+        Returns:
+        ------
+            the keys by key id, fresh or stale.
+        """
+        # Threads only wait for a fetch when there is nothing to serve yet.
+        if not self._lock.acquire(blocking=self._keys is None):
+            return self._keys
+
+        try:
+            if not self._can_refresh(force):
+                return self._keys
+
+            self._attempted_at = self.clock()
+            try:
+                jwks = self.fetcher()
+            except Exception as e:
+                self.failures += 1
+                if self._keys is None:
+                    raise
+                logger.warning("Serving a stale JWKS, refresh failed: %s", e)
+                return self._keys
+
+            self.fetches += 1
+            self._keys = {key['kid']: key for key in jwks['keys']}
+            self._fetched_at = self._attempted_at
+            return self._keys
+
+        finally:
+            self._lock.release()
+
+
+class VerifiedTokenCache(object):
+    """Bounded LRU cache of the payloads of verified tokens.
+
+    Payloads are stored under a hash of their token until the token's
+    `exp` claim, so a token reused by a client is only verified once.
+    Payloads without an `exp` claim are never cached. When the cache is
+    full, the least recently used payload is evicted.
+
+    Parameters:
+    ------
+        maxsize: maximum number of payloads kept, 0 disables the cache
+        clock: callable returning the current unix time in seconds
+    """
+
+    def __init__(self, maxsize=1024, clock=time.time):
+        self.maxsize = maxsize
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._payloads = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(token):
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token):
+        """Gets the payload of a verified token.
+
+        Returns:
+        ------
+            the payload, or None if the token is not cached or expired
+        """
+        key = self._key(token)
+        with self._lock:
+            entry = self._payloads.get(key)
+            if entry is not None and entry[1] <= self.clock():
+                del self._payloads[key]
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self._payloads.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, token, payload):
+        """Caches the payload of a verified token until it expires."""
+        exp = payload.get('exp')
+        if not self.maxsize or not isinstance(exp, (int, float)):
+            return
+
+        key = self._key(token)
+        with self._lock:
+            self._payloads[key] = (payload, exp)
+            self._payloads.move_to_end(key)
+            while len(self._payloads) > self.maxsize:
+                self._payloads.popitem(last=False)
+
+    def clear(self):
+        """Drops all the cached payloads and resets the counters."""
+        with self._lock:
+            self._payloads.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """Gets the size and the hit/miss counters of the cache."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._payloads),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / lookups if lookups else 0.0,
+            }
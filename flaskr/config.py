@@ -1,31 +1,113 @@
 from dotenv import load_dotenv
 import os
 
+from .constants import ITEM_PER_PAGE, MAX_PER_PAGE
+from .data.pool import get_engine_options
+
 load_dotenv()
 
 
+def _fix_scheme(uri):
+    # SQLAlchemy dropped the "postgres" scheme some providers still use.
+    if uri.startswith("postgres://"):
+        uri = uri.replace("postgres://", "postgresql://", 1)
+    return uri
+
+
+def get_database_uri(default_path):
+    """Gets the DATABASE_URL of the environment, or a SQLite file's URI."""
+    uri = os.environ.get("DATABASE_URL")
+    if not uri:
+        return f"sqlite:///{default_path}"
+    return _fix_scheme(uri)
+
+
+def get_replica_uris():
+    """Gets the comma separated DATABASE_REPLICA_URLS of the environment."""
+    uris = os.environ.get("DATABASE_REPLICA_URLS", "")
+    return [_fix_scheme(uri.strip()) for uri in uris.split(",") if uri.strip()]
+
+
 class Config(object):
     SECRET_KEY = os.environ.get("SECRET_KEY") or "you-will-never-guess"
     # Grabs the folder where the script runs.
     BASEDIR = os.path.abspath(os.path.dirname(__file__))
     TESTING = False
+    # Loading strategy of the models relationships for each endpoint:
+    # "select" (lazy, the default), "selectin" or "joined".
+    # See ModelCrudDbHelper.loading_options.
+    RELATIONSHIP_LOADING = {
+        "actors_blueprint.get_actors": "selectin",
+        "movies_blueprint.get_movies": "selectin",
+    }
+    # Number of items per page of the list endpoints, and the maximum a
+    # request can ask for with the per_page argument. See Paginator.
+    ITEM_PER_PAGE = ITEM_PER_PAGE
+    MAX_PER_PAGE = MAX_PER_PAGE
+    # Maximum number of responses of the list endpoints cached in each
+    # process, 0 disables the cache. See flaskr.utils.response_cache.
+    RESPONSE_CACHE_SIZE = 512
+    # Seconds the counts returned by /health are cached for.
+    HEALTH_COUNTS_TTL = 5
+    # Seconds /health/ready waits for the database to answer.
+    HEALTH_READY_TIMEOUT = 2
+    # Milliseconds from which a SQL statement is logged as slow, 0 logs
+    # none. See flaskr.data.db.track_queries.
+    SLOW_QUERY_THRESHOLD = float(os.environ.get("SLOW_QUERY_THRESHOLD", 200))
+    # Read-only copies of the database, the GET endpoints read from one of
+    # them. See flaskr.data.db.RoutingSession.
+    SQLALCHEMY_REPLICA_URIS = []
+    # PRAGMAs run on each new SQLite connection, by name.
+    # See flaskr.data.db.set_sqlite_pragmas.
+    SQLITE_PRAGMAS = {}
+    # Serializer of the JSON responses: "fast" (orjson when installed, the
+    # tuned stdlib otherwise), "orjson", "stdlib" or "flask" (Flask's own).
+    # See flaskr.utils.json_provider.
+    JSON_PROVIDER = os.environ.get("JSON_PROVIDER") or "fast"
+    # Adds a Server-Timing header, with the time spent in auth, database,
+    # formatting and serialization, to the responses and logs it.
+    # See flaskr.utils.server_timing.
+    SERVER_TIMING = os.environ.get("SERVER_TIMING", "").lower() in (
+        "1", "true", "yes", "on")
+    # Records the Prometheus metrics of the requests and exposes them at
+    # /metrics. See flaskr.routes.metrics.
+    METRICS = os.environ.get("METRICS", "true").lower() in (
+        "1", "true", "yes", "on")
 
 
 class ProductionConfig(Config):
-    SQLALCHEMY_DATABASE_URI = (
-        f"sqlite:///{os.path.join(Config.BASEDIR, 'data', 'prod_db.sqlite3')}"
-    )
+    SQLALCHEMY_DATABASE_URI = get_database_uri(
+        os.path.join(Config.BASEDIR, 'data', 'prod_db.sqlite3'))
+    # Connections idle behind a firewall or a proxy get dropped, they are
+    # checked before use and recycled after 30 minutes.
+    SQLALCHEMY_ENGINE_OPTIONS = get_engine_options(
+        SQLALCHEMY_DATABASE_URI, pool_recycle=1800, pool_pre_ping=True)
+    SQLALCHEMY_REPLICA_URIS = get_replica_uris()
+    # WAL lets readers run while a writer is active, the writers wait for
+    # the lock up to busy_timeout ms instead of failing with
+    # "database is locked".
+    SQLITE_PRAGMAS = {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "busy_timeout": int(os.environ.get("SQLITE_BUSY_TIMEOUT", 5000)),
+        "mmap_size": 256 * 1024 * 1024,
+        "cache_size": -64 * 1024,
+        "temp_store": "MEMORY",
+    }
 
 
 class DevelopmentConfig(Config):
     DEBUG = True
-    SQLALCHEMY_DATABASE_URI = (
-        f"sqlite:///{os.path.join(Config.BASEDIR, 'data', 'dev_db.sqlite3')}"
-    )
+    SQLALCHEMY_DATABASE_URI = get_database_uri(
+        os.path.join(Config.BASEDIR, 'data', 'dev_db.sqlite3'))
+    SQLALCHEMY_ENGINE_OPTIONS = get_engine_options(SQLALCHEMY_DATABASE_URI)
+    SQLALCHEMY_REPLICA_URIS = get_replica_uris()
 
 
 class TestingConfig(Config):
     TESTING = True
+    HEALTH_COUNTS_TTL = 0
+    RESPONSE_CACHE_SIZE = 0
     # SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
     SQLALCHEMY_DATABASE_URI = (
         f"sqlite:///{os.path.join(Config.BASEDIR, 'data', 'test_db.sqlite3')}"
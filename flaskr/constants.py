@@ -3,5 +3,27 @@
 # The version of flaskr API.
 API_VERSION = "v1"
 
-# The number of items per page the API should return.
+# The number of items per page the API should return, by default. See the
+# ITEM_PER_PAGE config.
 ITEM_PER_PAGE = 3
+
+# The maximum number of items per page a request can ask for. See the
+# MAX_PER_PAGE config.
+MAX_PER_PAGE = 100
+
+# The maximum number of items a bulk create request can hold.
+BULK_MAX_ITEMS = 100_000
+
+# The number of rows inserted per transaction by the bulk create requests.
+BULK_INSERT_CHUNK_SIZE = 1000
+
+# The maximum number of values bound in a single `IN (...)` clause,
+# SQLite used to allow 999 variables per statement.
+IN_CLAUSE_CHUNK_SIZE = 500
+
+# The number of rows fetched from the database at a time by the export
+# requests, which stream the whole tables.
+EXPORT_CHUNK_SIZE = 1000
+
+# The number of rows inserted per transaction by the `flask seed` command.
+SEED_CHUNK_SIZE = 10_000
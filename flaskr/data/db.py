@@ -2,22 +2,254 @@
 Module to handel the SQLAlchemy database creation and migration process
 """
 
+import logging
+import os
+import random
+import weakref
+from functools import partial, wraps
+from time import perf_counter
+
+import click
+from flask import g, has_app_context, has_request_context, request
+from flask.cli import with_appcontext
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session
 from flask_migrate import Migrate
+from sqlalchemy import event
+
+from .pool import track_pool
+
+# Bind keys of the replicas are this prefix followed by their index.
+REPLICA_BIND_PREFIX = "replica_"
+
+# Engines of the apps set up in this process, see dispose_engines.
+_engines = weakref.WeakSet()
+
+logger = logging.getLogger(__name__)
+
+
+class RoutingSession(Session):
+    """Session reading from a replica when the view allows it.
+
+    A view decorated with use_replica reads from one of the replicas
+    (SQLALCHEMY_REPLICA_URIS), always the same during a request. Flushes
+    and INSERT, UPDATE or DELETE statements go to the primary, and once
+    the session wrote, it reads from the primary too so that a request
+    reads its own writes. Without replicas, everything goes to the
+    primary.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and self.info.get("use_replica"):
+            if self._flushing or getattr(clause, "is_dml", False):
+                self.info["wrote"] = True
+            elif not self.info.get("wrote"):
+                replica = self._get_replica()
+                if replica is not None:
+                    return replica
+
+        return super().get_bind(
+            mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def _get_replica(self):
+        if "replica" not in self.info:
+            replicas = [
+                engine for key, engine in self._db.engines.items()
+                if key and key.startswith(REPLICA_BIND_PREFIX)
+            ]
+            self.info["replica"] = (
+                random.choice(replicas) if replicas else None)
+        return self.info["replica"]
+
+
+db = SQLAlchemy(session_options={"class_": RoutingSession})
+
+
+def use_replica(func):
+    """Decorator letting a view read from a replica, see RoutingSession."""
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        db.session.info["use_replica"] = True
+        return func(*args, **kwargs)
+
+    return wrapper
+
+
+def set_sqlite_pragmas(dbapi_connection, connection_record, pragmas):
+    """Runs the PRAGMAs on a new SQLite connection.
+
+    Listener of the engine's "connect" event.
+
+    Parameters
+    -------
+    dbapi_connection: sqlite3.Connection
+        the new connection.
+    connection_record: sqlalchemy.pool._ConnectionRecord
+        the pool's record of the connection, unused.
+    pragmas: dict
+        the values of the PRAGMAs, by name.
+    """
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+    finally:
+        cursor.close()
+
+
+class QueryStats(object):
+    """Number and duration, in seconds, of the SQL statements of a request.
+
+    The stats of the current request are in `g.query_stats`, see
+    track_queries.
+    """
+
+    __slots__ = ("count", "duration")
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+
+def _start_query_stats():
+    g.query_stats = QueryStats()
 
 
-db = SQLAlchemy()
+def _log_query_stats(response):
+    stats = g.get("query_stats")
+    if stats is not None:
+        logger.debug("%s %s: %d statements in %.2f ms", request.method,
+                     request.full_path, stats.count, stats.duration * 1000)
+    return response
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context,
+                           executemany):
+    if context is not None:
+        context.query_start = perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context,
+                          executemany, slow_query_threshold):
+    start = getattr(context, "query_start", None)
+    if start is None:
+        return
+    duration = perf_counter() - start
+
+    if has_app_context():
+        stats = g.get("query_stats")
+        if stats is not None:
+            stats.count += 1
+            stats.duration += duration
+
+    if slow_query_threshold and duration * 1000 >= slow_query_threshold:
+        endpoint = request.endpoint if has_request_context() else None
+        if executemany:
+            parameters = f"{len(parameters)} parameter sets"
+        logger.warning("Slow query (%.2f ms) from %s: %s, parameters: %s",
+                       duration * 1000, endpoint or "outside of a request",
+                       statement, parameters)
+
+
+def track_queries(engine, slow_query_threshold=None):
+    """Times the SQL statements executed by the engine.
+
+    The statements run during a request are added to its QueryStats, and
+    the ones which take at least `slow_query_threshold` ms are logged as
+    warnings, with their parameters and the endpoint which ran them.
+
+    Parameters
+    -------
+    engine: sqlalchemy.engine.Engine
+        the engine to track.
+    slow_query_threshold: float, optional
+        the duration of the slow statements, in ms. None or 0 logs none.
+    """
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(
+        engine, "after_cursor_execute",
+        partial(_after_cursor_execute,
+                slow_query_threshold=slow_query_threshold))
+
+
+def dispose_engines():
+    """Drops the pooled connections inherited from the parent process.
+
+    Runs in the child after a fork, e.g. in the gunicorn workers of an app
+    preloaded by the master (--preload). A connection must not be shared
+    by two processes: the child opens its own ones, and the inherited ones
+    are left open for the parent (close=False).
+    """
+    for engine in list(_engines):
+        engine.dispose(close=False)
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=dispose_engines)
+
+
+def init_db():
+    """Creates the tables of the models which do not exist yet.
+
+    Also creates the search index on SQLite, see flaskr.data.search.
+    Must run in an app context. The migrations (flask db upgrade) are
+    the way to create or update the schema of a deployed database.
+    """
+    db.create_all(bind_key=None)
+
+
+@click.command("init-db")
+@with_appcontext
+def init_db_command():
+    """Create the database tables which do not exist yet."""
+    init_db()
+    click.echo("Initialized the database.")
 
 
 def db_setup(app):
     """setup the database for the app.
 
+    The SQLALCHEMY_REPLICA_URIS of the config are added to the binds,
+    with the engine options of the primary. The SQLITE_PRAGMAS of the
+    config are run on each new connection of the SQLite engines, and the
+    statistics of the pools are collected (see flaskr.data.pool). The
+    statements of each request are counted and timed, and the ones slower
+    than the SLOW_QUERY_THRESHOLD config are logged, see track_queries.
+    The engines are reset in the forked processes, see dispose_engines.
+
+    The schema is not created, see init_db and the `flask init-db`
+    command.
+
     Returns:
     --------
     db:
         the database instance
     """
 
+    binds = app.config.setdefault("SQLALCHEMY_BINDS", {})
+    for index, uri in enumerate(app.config.get("SQLALCHEMY_REPLICA_URIS", ())):
+        binds[f"{REPLICA_BIND_PREFIX}{index}"] = {
+            **app.config.get("SQLALCHEMY_ENGINE_OPTIONS", {}),
+            "url": uri,
+        }
+
     db.init_app(app)
     Migrate(app, db)
+    app.cli.add_command(init_db_command)
+
+    app.before_request(_start_query_stats)
+    app.after_request(_log_query_stats)
+
+    pragmas = app.config.get("SQLITE_PRAGMAS")
+    slow_query_threshold = app.config.get("SLOW_QUERY_THRESHOLD")
+    with app.app_context():
+        for engine in db.engines.values():
+            _engines.add(engine)
+            track_pool(engine)
+            track_queries(engine, slow_query_threshold)
+            if pragmas and engine.dialect.name == "sqlite":
+                event.listen(
+                    engine, "connect",
+                    partial(set_sqlite_pragmas, pragmas=pragmas))
+
     return db
@@ -5,10 +5,15 @@ Models
 import enum
 from datetime import datetime, date
 
-from sqlalchemy.orm import validates
+from sqlalchemy import event, exc, inspect, update
+from sqlalchemy.orm import joinedload, lazyload, load_only
+from sqlalchemy.orm import selectinload, validates
 
 from .db import db
+from ..constants import BULK_INSERT_CHUNK_SIZE, IN_CLAUSE_CHUNK_SIZE
+from ..utils.error_crud_handlers import get_db_error_message
 from ..utils.movie_genre import MovieGenreEnum
+from ..utils.response_cache import response_cache
 
 
 class GenderEnum(enum.Enum):
@@ -18,15 +23,208 @@ class GenderEnum(enum.Enum):
     F = "Female"
 
 
+# Loader options for the relationships, by name of loading strategy.
+LOADING_STRATEGIES = {
+    "select": lazyload,
+    "selectin": selectinload,
+    "joined": joinedload,
+}
+
+
+def _chunks(values, size):
+    """Splits the values in lists of at most size values."""
+    values = list(values)
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
 class ModelCrudDbHelper():
 
+    @classmethod
+    def loading_options(cls, strategy="select", fields=None, embed=None):
+        """Loader options selecting only some columns and relationships.
+
+        Parameters
+        -------
+        strategy: str
+            the loading strategy of the embedded relationships, see
+            LOADING_STRATEGIES: "select" loads a relationship lazily the
+            first time it is accessed (one SELECT per row), "selectin"
+            loads it for all the rows of the query with one extra SELECT
+            and "joined" loads it in the same SELECT with a JOIN.
+        fields: set of str, optional
+            the only columns to select, with the primary key. All the
+            columns by default.
+        embed: set of str, optional
+            the only relationships to load, the others are lazy loaded,
+            so never if they are not accessed. All the relationships by
+            default.
+
+        EXAMPLE: Movie.query.options(*Movie.loading_options(
+            "selectin", fields={"title"}, embed=set()))
+        """
+        loader = LOADING_STRATEGIES[strategy]
+        options = []
+        if fields is not None:
+            options.append(load_only(*(
+                getattr(cls, field) for field in sorted(fields))))
+        for relationship in inspect(cls).relationships:
+            attribute = getattr(cls, relationship.key)
+            if embed is None or relationship.key in embed:
+                options.append(loader(attribute))
+            else:
+                options.append(lazyload(attribute))
+        return options
+
+    def format_columns(self, fields=None):
+        """Formats the columns of the model, enums by their value.
+
+        Parameters
+        -------
+        fields: set of str, optional
+            the only columns to format. All the columns by default.
+        """
+        formatted = {}
+        for column in inspect(type(self)).column_attrs:
+            if fields is not None and column.key not in fields:
+                continue
+            value = getattr(self, column.key)
+            if isinstance(value, enum.Enum):
+                value = value.value
+            formatted[column.key] = value
+        return formatted
+
+    @classmethod
+    def written_tables(cls):
+        """Names of the tables written when saving the model.
+
+        Its own table and the association tables of its relationships.
+        """
+        return {cls.__tablename__} | {
+            relationship.secondary.name
+            for relationship in inspect(cls).relationships
+            if relationship.secondary is not None
+        }
+
+    @classmethod
+    def read_tables(cls):
+        """Names of the tables read to format the model.
+
+        The written tables and the tables of the related models.
+        """
+        return cls.written_tables() | {
+            relationship.mapper.local_table.name
+            for relationship in inspect(cls).relationships
+        }
+
+    @classmethod
+    def get_table_versions(cls):
+        """Versions of the tables read to format the model.
+
+        EXAMPLE: Movie.get_table_versions()
+        """
+        return TableVersion.get_versions(cls.read_tables())
+
+    @classmethod
+    def commit(cls):
+        """Commits the session, versioning the written tables.
+
+        The versions of the model's tables are bumped in the same
+        transaction and the stale cached responses are evicted. Every
+        write to the model's tables must go through this method.
+        EXAMPLE: Movie.commit()
+        """
+        tables = cls.written_tables()
+        db.session.flush()
+        TableVersion.bump(tables)
+        db.session.commit()
+        response_cache.invalidate(tables)
+
+    @classmethod
+    def get_existing_ids(cls, ids):
+        """Gets which of the ids exist, with chunked `IN (...)` queries.
+
+        EXAMPLE: Actor.get_existing_ids({1, 2, 3})
+        """
+        existing = set()
+        for chunk in _chunks(ids, IN_CLAUSE_CHUNK_SIZE):
+            existing.update(id for id, in db.session.query(cls.id).filter(
+                cls.id.in_(chunk)))
+        return existing
+
+    @classmethod
+    def get_by_ids(cls, ids):
+        """Gets the models with the ids, with chunked `IN (...)` queries.
+
+        The ids which do not exist are ignored.
+        EXAMPLE: Actor.get_by_ids({1, 2, 3})
+        """
+        models = []
+        for chunk in _chunks(ids, IN_CLAUSE_CHUNK_SIZE):
+            models.extend(cls.query.filter(cls.id.in_(chunk)))
+        return models
+
+    @classmethod
+    def bulk_insert(cls, rows, chunk_size=None):
+        """Inserts validated rows, in one transaction per chunk of rows.
+
+        Each chunk is inserted with an executemany. If a chunk breaks a
+        constraint, it is rolled back and its rows are inserted one by one
+        to find the faulty ones, so the valid rows are still inserted.
+
+        Parameters
+        -------
+        rows: list of (int, dict)
+            the index of the item in the request and the column values.
+        chunk_size: int, optional
+            the number of rows per transaction, defaults to
+            BULK_INSERT_CHUNK_SIZE.
+
+        Returns
+        -------
+        created: int
+            the number of inserted rows.
+        errors: list of dict
+            the index and the error message of the rows not inserted.
+        """
+        chunk_size = chunk_size or BULK_INSERT_CHUNK_SIZE
+        created, errors = 0, []
+
+        for chunk in _chunks(rows, chunk_size):
+            try:
+                cls._insert_rows([values for _, values in chunk])
+                cls.commit()
+                created += len(chunk)
+                continue
+            except exc.IntegrityError:
+                db.session.rollback()
+
+            for index, values in chunk:
+                try:
+                    cls._insert_rows([values])
+                    cls.commit()
+                    created += 1
+                except exc.IntegrityError as e:
+                    db.session.rollback()
+                    errors.append({
+                        'index': index,
+                        'message': f"ERROR: {get_db_error_message(e)}",
+                    })
+
+        return created, errors
+
+    @classmethod
+    def _insert_rows(cls, rows):
+        """Adds the rows to the session with a single executemany."""
+        db.session.bulk_insert_mappings(cls, rows)
+
     def insert(self):
         """inserts a new model into a database
 
         EXAMPLE: a_givern_model.insert()
         """
         db.session.add(self)
-        db.session.commit()
+        self.commit()
 
     def update(self):
         """Updates a model into a database
@@ -34,7 +232,7 @@ class ModelCrudDbHelper():
         The model must exist in the database
         EXAMPLE: a_givern_model.update()
         """
-        db.session.commit()
+        self.commit()
 
     def delete(self):
         """Deletes a new model into a database
@@ -43,7 +241,44 @@ class ModelCrudDbHelper():
         EXAMPLE: a_givern_model.delete()
         """
         db.session.delete(self)
-        db.session.commit()
+        self.commit()
+
+
+class TableVersion(db.Model):
+    """Version of a table, bumped on each commit writing to the table.
+
+    See ModelCrudDbHelper.commit. The versions are stored in the database
+    so that every process sees the writes of the others.
+    """
+
+    __tablename__ = "table_version"
+
+    name = db.Column(db.String, primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<TableVersion {self.name}: {self.version}>"
+
+    @classmethod
+    def bump(cls, tables):
+        """Increments the versions of the tables in the current session.
+
+        A single UPDATE, the session must be flushed before so that it
+        does not autoflush. The rows of the tables are created with the
+        table, see create_table_versions.
+        """
+        db.session.execute(
+            update(cls).where(cls.name.in_(tables))
+            .values(version=cls.version + 1)
+            .execution_options(synchronize_session=False))
+
+    @classmethod
+    def get_versions(cls, tables):
+        """Gets the versions of the tables, as a dict by table name."""
+        versions = dict.fromkeys(tables, 0)
+        versions.update(db.session.query(cls.name, cls.version).filter(
+            cls.name.in_(tables)))
+        return versions
 
 
 movie_actor = db.Table(
@@ -52,6 +287,8 @@ movie_actor = db.Table(
         "movie_id", db.Integer, db.ForeignKey("movie.id"), primary_key=True),
     db.Column(
         "actor_id", db.Integer, db.ForeignKey("actor.id"), primary_key=True),
+    # The primary key only serves the lookups by movie_id.
+    db.Index("ix_association_actor_id", "actor_id"),
 )
 
 
@@ -61,8 +298,8 @@ class Movie(db.Model, ModelCrudDbHelper):
 
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String, unique=True, nullable=False)
-    release_date = db.Column(db.Date, nullable=False)
-    genre = db.Column(db.Enum(MovieGenreEnum), nullable=True)
+    release_date = db.Column(db.Date, nullable=False, index=True)
+    genre = db.Column(db.Enum(MovieGenreEnum), nullable=True, index=True)
     description = db.Column(db.String)
 
     actors = db.relationship(
@@ -77,6 +314,36 @@ class Movie(db.Model, ModelCrudDbHelper):
     def __str__(self):
         return self.title
 
+    @classmethod
+    def _insert_rows(cls, rows):
+        """Adds the movies and the association rows of their actors.
+
+        The rows may hold the ids of the movie's actors under "actors".
+        The movies are inserted with a single executemany, then the ids
+        of the movies with actors are selected by their unique title.
+        """
+        movies = [
+            {key: value for key, value in row.items() if key != 'actors'}
+            for row in rows
+        ]
+        db.session.bulk_insert_mappings(cls, movies)
+
+        actors_by_title = {
+            row['title']: row['actors'] for row in rows if row.get('actors')
+        }
+        if not actors_by_title:
+            return
+
+        ids_by_title = {}
+        for chunk in _chunks(actors_by_title, IN_CLAUSE_CHUNK_SIZE):
+            ids_by_title.update(db.session.query(cls.title, cls.id).filter(
+                cls.title.in_(chunk)))
+        db.session.execute(movie_actor.insert(), [
+            {'movie_id': ids_by_title[title], 'actor_id': actor_id}
+            for title, actor_ids in actors_by_title.items()
+            for actor_id in actor_ids
+        ])
+
     @validates('title')
     def validates_title(self, key, title):
         """Validates the title attribute
@@ -118,16 +385,14 @@ class Movie(db.Model, ModelCrudDbHelper):
             f'{", ".join([genre.value for genre in MovieGenreEnum])}'
         )
 
-    def format(self):
-        return {
-            'id': self.id,
-            'title': self.title,
-            'release_date': self.release_date,
-            'genre': self.genre.value,
-            'description': self.description,
-            'actors': [actor.short_format() for actor in self.actors],
-            'num_actors': len(self.actors),
-        }
+    def format(self, fields=None, embed=None):
+        """Formats the movie, see Fieldset for the fields and embed."""
+        formatted = self.format_columns(fields)
+        if embed is None or 'actors' in embed:
+            formatted['actors'] = [
+                actor.short_format() for actor in self.actors]
+            formatted['num_actors'] = len(self.actors)
+        return formatted
 
     def short_format(self):
         """
@@ -147,8 +412,8 @@ class Actor(db.Model, ModelCrudDbHelper):
     __tablename__ = 'actor'
 
     id = db.Column(db.Integer, primary_key=True)
-    name = db.Column(db.String, nullable=False)
-    age = db.Column(db.Integer(), nullable=False)
+    name = db.Column(db.String, nullable=False, index=True)
+    age = db.Column(db.Integer(), nullable=False, index=True)
     gender = db.Column(db.Enum(GenderEnum), nullable=False)
 
     def __repr__(self):
@@ -189,15 +454,14 @@ class Actor(db.Model, ModelCrudDbHelper):
             return gender
         raise TypeError('Gender must be "M" or "F"')
 
-    def format(self):
-        return {
-            'id': self.id,
-            'name': self.name,
-            'age': self.age,
-            'gender': self.gender.value,
-            'movies': [movie.short_format() for movie in self.movies],
-            'number_movies': len(self.movies),
-        }
+    def format(self, fields=None, embed=None):
+        """Formats the actor, see Fieldset for the fields and embed."""
+        formatted = self.format_columns(fields)
+        if embed is None or 'movies' in embed:
+            formatted['movies'] = [
+                movie.short_format() for movie in self.movies]
+            formatted['number_movies'] = len(self.movies)
+        return formatted
 
     def short_format(self):
         """
@@ -209,3 +473,13 @@ class Actor(db.Model, ModelCrudDbHelper):
             'age': self.age,
             'gender': self.gender.value,
         }
+
+
+@event.listens_for(TableVersion.__table__, "after_create")
+def create_table_versions(target, connection, **kw):
+    """Creates the versions of the tables written through the models."""
+    tables = set().union(*(
+        model.written_tables() for model in (Movie, Actor)))
+    connection.execute(target.insert(), [
+        {"name": name, "version": 0} for name in sorted(tables)
+    ])
@@ -0,0 +1,204 @@
+"""
+Module to configure the connection pools and to collect their statistics.
+"""
+
+import os
+import threading
+import time
+import weakref
+
+from sqlalchemy import event, exc
+from sqlalchemy.pool import NullPool, QueuePool, SingletonThreadPool
+from sqlalchemy.pool import StaticPool
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool timing how long the checkouts wait for a connection.
+
+    SQLAlchemy has no event fired before a checkout, so the wait is timed
+    around QueuePool._do_get. It includes opening a new connection when
+    the pool has no idle one.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.waits = 0
+        self.wait_time = 0.0
+        self.max_wait_time = 0.0
+        self.timeouts = 0
+        self._wait_lock = threading.Lock()
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            with self._wait_lock:
+                self.timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - start
+            with self._wait_lock:
+                self.waits += 1
+                self.wait_time += waited
+                self.max_wait_time = max(self.max_wait_time, waited)
+
+
+# Pool classes, by the name given in DB_POOL_CLASS.
+POOL_CLASSES = {
+    "queue": TimedQueuePool,
+    "null": NullPool,
+    "static": StaticPool,
+    "singleton": SingletonThreadPool,
+}
+
+
+def _get_env(name, default, cast):
+    value = os.environ.get(name)
+    return default if value is None or value == "" else cast(value)
+
+
+def _to_bool(value):
+    return value.lower() in ("1", "true", "yes", "on")
+
+
+def get_engine_options(
+    database_uri, pool_class=None, pool_size=5, max_overflow=10,
+    pool_timeout=30, pool_recycle=-1, pool_pre_ping=False,
+):
+    """Builds the SQLALCHEMY_ENGINE_OPTIONS of a config class.
+
+    The arguments are the defaults of the config class, each one can be
+    overridden by an environment variable: DB_POOL_CLASS (see
+    POOL_CLASSES), DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT,
+    DB_POOL_RECYCLE and DB_POOL_PRE_PING.
+
+    Parameters
+    -------
+    database_uri: str
+        the SQLALCHEMY_DATABASE_URI of the config class.
+    pool_class: str, optional
+        the default pool class name. Defaults to "queue", or to "null"
+        for SQLite files which the pysqlite dialect does not pool.
+
+    Returns
+    -------
+    options: dict
+        the keyword arguments of create_engine. The sizing options are
+        only set for a queue pool, the other pools do not accept them.
+    """
+    if pool_class is None:
+        pool_class = "null" if database_uri.startswith("sqlite") else "queue"
+    pool_class = _get_env("DB_POOL_CLASS", pool_class, str).lower()
+    if pool_class not in POOL_CLASSES:
+        raise ValueError(
+            f"DB_POOL_CLASS must be one of: {', '.join(POOL_CLASSES)}")
+
+    options = {
+        "poolclass": POOL_CLASSES[pool_class],
+        "pool_recycle": _get_env("DB_POOL_RECYCLE", pool_recycle, int),
+        "pool_pre_ping": _get_env(
+            "DB_POOL_PRE_PING", pool_pre_ping, _to_bool),
+    }
+    if pool_class == "queue":
+        options.update({
+            "pool_size": _get_env("DB_POOL_SIZE", pool_size, int),
+            "max_overflow": _get_env("DB_MAX_OVERFLOW", max_overflow, int),
+            "pool_timeout": _get_env("DB_POOL_TIMEOUT", pool_timeout, float),
+        })
+
+    return options
+
+
+class PoolStats(object):
+    """Statistics of the checkouts of an engine's connection pool.
+
+    Collected with the pool events, they are kept when the pool is
+    recreated, e.g. by engine.dispose().
+    """
+
+    def __init__(self):
+        self.connects = 0
+        self.checkouts = 0
+        self.checked_out = 0
+        self.max_checked_out = 0
+        self.hold_time = 0.0
+        self.max_hold_time = 0.0
+        self._lock = threading.Lock()
+
+    def listen(self, engine):
+        """Registers the listeners on the engine's pool events."""
+        event.listen(engine, "connect", self._on_connect)
+        event.listen(engine, "checkout", self._on_checkout)
+        event.listen(engine, "checkin", self._on_checkin)
+
+    def _on_connect(self, dbapi_connection, connection_record):
+        with self._lock:
+            self.connects += 1
+
+    def _on_checkout(self, dbapi_connection, connection_record, proxy):
+        connection_record.info["checked_out_at"] = time.perf_counter()
+        with self._lock:
+            self.checkouts += 1
+            self.checked_out += 1
+            self.max_checked_out = max(
+                self.max_checked_out, self.checked_out)
+
+    def _on_checkin(self, dbapi_connection, connection_record):
+        checked_out_at = connection_record.info.pop("checked_out_at", None)
+        if checked_out_at is None:
+            return
+        held = time.perf_counter() - checked_out_at
+        with self._lock:
+            self.checked_out -= 1
+            self.hold_time += held
+            self.max_hold_time = max(self.max_hold_time, held)
+
+    def stats(self, pool):
+        """Gets the statistics, with the sizes of the pool."""
+        with self._lock:
+            stats = {
+                "pool_class": type(pool).__name__,
+                "connects": self.connects,
+                "checkouts": self.checkouts,
+                "checked_out": self.checked_out,
+                "max_checked_out": self.max_checked_out,
+                "avg_hold_ms": (
+                    self.hold_time / self.checkouts * 1000
+                    if self.checkouts else 0.0),
+                "max_hold_ms": self.max_hold_time * 1000,
+            }
+
+        if isinstance(pool, QueuePool):
+            stats.update({
+                "size": pool.size(),
+                "idle": pool.checkedin(),
+                "overflow": pool.overflow(),
+                "timeout": pool.timeout(),
+            })
+        if isinstance(pool, TimedQueuePool):
+            stats.update({
+                "avg_wait_ms": (
+                    pool.wait_time / pool.waits * 1000
+                    if pool.waits else 0.0),
+                "max_wait_ms": pool.max_wait_time * 1000,
+                "timeouts": pool.timeouts,
+            })
+
+        return stats
+
+
+# Statistics of the pools, by engine.
+_pool_stats = weakref.WeakKeyDictionary()
+
+
+def track_pool(engine):
+    """Starts collecting the statistics of the engine's pool."""
+    if engine not in _pool_stats:
+        _pool_stats[engine] = PoolStats()
+        _pool_stats[engine].listen(engine)
+
+
+def get_pool_stats(engine):
+    """Gets the statistics of the engine's pool, see PoolStats.stats."""
+    return _pool_stats[engine].stats(engine.pool)
@@ -0,0 +1,251 @@
+"""
+Full-text search index of the movies and actors, with SQLite FTS5.
+"""
+
+import re
+from contextlib import contextmanager
+
+import sqlalchemy as sa
+from sqlalchemy import event, text
+
+from .db import db
+
+# The FTS5 table and its triggers are not created by create_all, see
+# create_search_index, this metadata only maps the table.
+search_metadata = sa.MetaData()
+
+# A movie is indexed at rowid = 2 * id, an actor at rowid = 2 * id + 1.
+SEARCH_INDEX_DDL = (
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5(
+        kind UNINDEXED, title, description,
+        tokenize = 'unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS search_index_movie_insert
+    AFTER INSERT ON movie BEGIN
+        INSERT INTO search_index (rowid, kind, title, description)
+        VALUES (new.id * 2, 'movie', new.title, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS search_index_movie_update
+    AFTER UPDATE OF title, description ON movie BEGIN
+        UPDATE search_index
+        SET title = new.title, description = new.description
+        WHERE rowid = old.id * 2;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS search_index_movie_delete
+    AFTER DELETE ON movie BEGIN
+        DELETE FROM search_index WHERE rowid = old.id * 2;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS search_index_actor_insert
+    AFTER INSERT ON actor BEGIN
+        INSERT INTO search_index (rowid, kind, title)
+        VALUES (new.id * 2 + 1, 'actor', new.name);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS search_index_actor_update
+    AFTER UPDATE OF name ON actor BEGIN
+        UPDATE search_index SET title = new.name
+        WHERE rowid = old.id * 2 + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS search_index_actor_delete
+    AFTER DELETE ON actor BEGIN
+        DELETE FROM search_index WHERE rowid = old.id * 2 + 1;
+    END
+    """,
+)
+
+SEARCH_INDEX_BACKFILL = (
+    """
+    INSERT INTO search_index (rowid, kind, title, description)
+    SELECT id * 2, 'movie', title, description FROM movie
+    """,
+    """
+    INSERT INTO search_index (rowid, kind, title)
+    SELECT id * 2 + 1, 'actor', name FROM actor
+    """,
+)
+
+# Triggers indexing the new rows, see deferred_search_index.
+SEARCH_INDEX_INSERT_TRIGGERS = (
+    "search_index_movie_insert",
+    "search_index_actor_insert",
+)
+
+SEARCH_INDEX_DROP = (
+    "DROP TRIGGER IF EXISTS search_index_movie_insert",
+    "DROP TRIGGER IF EXISTS search_index_movie_update",
+    "DROP TRIGGER IF EXISTS search_index_movie_delete",
+    "DROP TRIGGER IF EXISTS search_index_actor_insert",
+    "DROP TRIGGER IF EXISTS search_index_actor_update",
+    "DROP TRIGGER IF EXISTS search_index_actor_delete",
+    "DROP TABLE IF EXISTS search_index",
+)
+
+
+def is_search_table(name):
+    """Tells if a table belongs to the search index.
+
+    FTS5 stores the index in shadow tables named after it, which are not
+    in the models' metadata.
+    """
+    return name == "search_index" or name.startswith("search_index_")
+
+
+def supports_search(connection):
+    """Tells if the database of the connection has FTS5."""
+    return connection.dialect.name == "sqlite"
+
+
+@event.listens_for(db.metadata, "after_create")
+def create_search_index(target, connection, **kw):
+    """Creates the search index and its triggers on a SQLite database.
+
+    The rows already in the tables are indexed when the index is created,
+    after that the triggers keep it in sync with every write, including
+    the bulk inserts which skip the ORM.
+    """
+    if not supports_search(connection):
+        return
+
+    exists = connection.execute(text(
+        "SELECT 1 FROM sqlite_master WHERE name = 'search_index'"
+    )).first()
+    for statement in SEARCH_INDEX_DDL:
+        connection.execute(text(statement))
+    if not exists:
+        for statement in SEARCH_INDEX_BACKFILL:
+            connection.execute(text(statement))
+
+
+@event.listens_for(db.metadata, "before_drop")
+def drop_search_index(target, connection, **kw):
+    """Drops the search index and its triggers."""
+    if supports_search(connection):
+        for statement in SEARCH_INDEX_DROP:
+            connection.execute(text(statement))
+
+
+@contextmanager
+def deferred_search_index(first_movie_id, first_actor_id):
+    """Indexes the movies and actors inserted in the block at its end.
+
+    For bulk loads: the insert triggers are dropped during the block, then
+    the rows from the given ids are indexed with one INSERT ... SELECT by
+    table, which is several times faster than a trigger per row. The rows
+    inserted by other sessions during the block are not indexed. Does
+    nothing if the database has no search index.
+    """
+    connection = db.session.connection()
+    if not supports_search(connection) or not connection.execute(text(
+        "SELECT 1 FROM sqlite_master WHERE name = 'search_index'"
+    )).first():
+        yield
+        return
+
+    for trigger in SEARCH_INDEX_INSERT_TRIGGERS:
+        db.session.execute(text(f"DROP TRIGGER IF EXISTS {trigger}"))
+    db.session.commit()
+    try:
+        yield
+    finally:
+        db.session.rollback()
+        for statement in SEARCH_INDEX_DDL:
+            db.session.execute(text(statement))
+        movies, actors = SEARCH_INDEX_BACKFILL
+        db.session.execute(
+            text(f"{movies} WHERE id >= :first_id"),
+            {"first_id": first_movie_id})
+        db.session.execute(
+            text(f"{actors} WHERE id >= :first_id"),
+            {"first_id": first_actor_id})
+        db.session.commit()
+
+
+def build_match_query(search):
+    """Builds the FTS5 query of the words of a search.
+
+    Each word is quoted, so the FTS5 syntax in a search is not
+    interpreted, and the last word matches as a prefix, so results show
+    up while typing. The words must all match.
+
+    Returns
+    -------
+    query: str or None
+        None if the search has no word.
+    """
+    words = re.findall(r"\w+", search)
+    if not words:
+        return None
+    terms = [f'"{word}"' for word in words]
+    terms[-1] += "*"
+    return " ".join(terms)
+
+
+class SearchEntry(db.Model):
+    """A movie or an actor in the search index, read only.
+
+    `rank` is the bm25 score of the entry for the current MATCH query,
+    lower is better.
+    """
+
+    __table__ = sa.Table(
+        "search_index", search_metadata,
+        sa.Column("rowid", sa.Integer, key="id", primary_key=True),
+        sa.Column("kind", sa.String),
+        sa.Column("title", sa.String),
+        sa.Column("description", sa.String),
+        sa.Column("rank", sa.Float),
+    )
+
+    def __repr__(self):
+        return f"<SearchEntry {self.kind}: {self.title}>"
+
+    @classmethod
+    def matching(cls, search, kind=None):
+        """Query of the entries matching a search, see build_match_query.
+
+        EXAMPLE: SearchEntry.matching("die hard", kind="movie")
+        """
+        query = cls.query.filter(text("search_index MATCH :search")).params(
+            search=build_match_query(search))
+        if kind is not None:
+            query = query.filter(cls.kind == kind)
+        return query
+
+    @classmethod
+    def read_tables(cls):
+        """Names of the tables the index mirrors, see ModelCrudDbHelper."""
+        return {"movie", "actor"}
+
+    @classmethod
+    def get_table_versions(cls):
+        """Versions of the tables the index mirrors."""
+        from .models import TableVersion
+        return TableVersion.get_versions(cls.read_tables())
+
+    def format(self):
+        if self.kind == "movie":
+            return {
+                'type': 'movie',
+                'id': self.id // 2,
+                'title': self.title,
+                'description': self.description,
+                'score': -self.rank,
+            }
+        return {
+            'type': 'actor',
+            'id': self.id // 2,
+            'name': self.title,
+            'score': -self.rank,
+        }
@@ -0,0 +1,274 @@
+"""
+Module to fill the database with a generated catalogue of actors and
+movies, e.g. to benchmark the endpoints on realistic volumes.
+
+The rows are inserted with the DBAPI executemany, one transaction per
+chunk of rows, instead of one ORM object at a time: they are generated
+with the values stored in the database (the enums by name, the dates in
+ISO format), which skips SQLAlchemy's processing of every parameter. The
+ids are assigned here, after the largest existing ones, so that the
+casts can be inserted without reading the new rows back. The secondary
+indexes and the search index are built once the rows are inserted, see
+deferred_search_index. The command must not run while the app writes.
+
+The same seed always generates the same rows.
+"""
+
+import random
+import time
+from contextlib import contextmanager
+from datetime import date
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import func, text
+
+from ..constants import SEED_CHUNK_SIZE
+from ..utils.movie_genre import MovieGenreEnum
+from .db import db
+from .models import Actor, GenderEnum, Movie, movie_actor
+from .search import deferred_search_index
+
+FIRST_NAMES = (
+    "ada alan alice anna arthur ben carla chloe clara daniel david diane "
+    "elena emma ethan eva felix frank grace hana harry hugo iris jack "
+    "james jane julia karen leo lily lucas maria mark maya nina noah "
+    "olga oscar paul petra rosa ruth sam sara tom vera victor zoe"
+).split()
+
+LAST_NAMES = (
+    "adams baker brown carter clark cruz davis evans fischer garcia "
+    "green hall hill jones khan kim king lee lopez martin miller moore "
+    "morris nguyen novak parker perez price reed rossi ruiz scott silva "
+    "smith stone taylor turner walker white wilson wong young"
+).split()
+
+WORDS = (
+    "love war night star city dark lost return last king dead blood "
+    "secret house man woman girl boy world time life death road river "
+    "moon fire ice storm shadow dream ghost heart iron golden silent "
+    "wild empire hunter killer angel devil summer winter island ocean"
+).split()
+
+FIRST_RELEASE = date(1920, 1, 1).toordinal()
+LAST_RELEASE = date(2025, 12, 31).toordinal()
+
+
+def _uniform_cast_size(rng, low, high):
+    return rng.randint(low, high)
+
+
+def _triangular_cast_size(rng, low, high):
+    # Mostly small casts, a few large ones.
+    return min(int(rng.triangular(low, high + 1, low)), high)
+
+
+# Distributions of the number of actors per movie, by name. Each draws a
+# size between low and high included.
+CAST_DISTRIBUTIONS = {
+    "uniform": _uniform_cast_size,
+    "triangular": _triangular_cast_size,
+}
+
+
+def _next_id(model):
+    return (db.session.query(func.max(model.id)).scalar() or 0) + 1
+
+
+def _reset_id_sequence(table):
+    """Moves the id sequence of a PostgreSQL table after its largest id."""
+    if db.engine.dialect.name == "postgresql":
+        db.session.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('{table.name}', 'id'), "
+            f"(SELECT max(id) FROM {table.name}))"))
+
+
+@contextmanager
+def _deferred_indexes(*tables):
+    """Drops the secondary indexes of the tables during the block.
+
+    Building an index once the rows are inserted is faster than updating
+    it on each insert. The unique constraints are kept.
+    """
+    indexes = [index for table in tables for index in table.indexes]
+    for index in indexes:
+        index.drop(bind=db.session.connection())
+    db.session.commit()
+    try:
+        yield
+    finally:
+        db.session.rollback()
+        for index in indexes:
+            index.create(bind=db.session.connection())
+        db.session.commit()
+
+
+def _insert_rows(table, rows):
+    """Inserts the rows with a single DBAPI executemany."""
+    compiled = table.insert().compile(dialect=db.engine.dialect)
+    if compiled.positional:
+        rows = [tuple(row[key] for key in compiled.positiontup)
+                for row in rows]
+    db.session.connection().exec_driver_sql(str(compiled), rows)
+
+
+def _insert_chunks(model, table, chunks):
+    """Inserts the chunks of rows, one transaction per chunk.
+
+    Returns the number of inserted rows.
+    """
+    inserted = 0
+    for rows in chunks:
+        if rows:
+            _insert_rows(table, rows)
+            model.commit()
+            inserted += len(rows)
+    return inserted
+
+
+def _chunk_ids(first_id, number, chunk_size):
+    last_id = first_id + number
+    for start in range(first_id, last_id, chunk_size):
+        yield range(start, min(start + chunk_size, last_id))
+
+
+# The generators draw the values of a whole chunk at once, which is much
+# faster than drawing them row by row.
+
+def _generate_actors(rng, chunks):
+    genders = [gender.name for gender in GenderEnum]
+    ages = range(5, 96)
+    for ids in chunks:
+        size = len(ids)
+        yield [
+            {"id": actor_id, "name": first + last, "age": age,
+             "gender": gender}
+            for actor_id, first, last, age, gender in zip(
+                ids, rng.choices(FIRST_NAMES, k=size),
+                rng.choices(LAST_NAMES, k=size), rng.choices(ages, k=size),
+                rng.choices(genders, k=size))
+        ]
+
+
+def _generate_movies(rng, chunks):
+    genres = [genre.name for genre in MovieGenreEnum]
+    release_dates = range(FIRST_RELEASE, LAST_RELEASE + 1)
+    for ids in chunks:
+        size = len(ids)
+        titles = rng.choices(WORDS, k=3 * size)
+        descriptions = rng.choices(WORDS, k=12 * size)
+        yield [
+            # The id keeps the titles unique.
+            {"id": movie_id,
+             "title": f"{' '.join(titles[3 * i:3 * i + 3]).title()} "
+                      f"{movie_id}",
+             "release_date": date.fromordinal(release_date).isoformat(),
+             "genre": genre,
+             "description": " ".join(descriptions[12 * i:12 * i + 12])}
+            for i, (movie_id, release_date, genre) in enumerate(zip(
+                ids, rng.choices(release_dates, k=size),
+                rng.choices(genres, k=size)))
+        ]
+
+
+def _generate_casts(rng, chunks, actor_ids, cast_size, distribution):
+    low, high = cast_size
+    high = min(high, len(actor_ids))
+    low = min(low, high)
+    draw = CAST_DISTRIBUTIONS[distribution]
+    for ids in chunks:
+        yield [
+            {"movie_id": movie_id, "actor_id": actor_id}
+            for movie_id in ids
+            for actor_id in rng.sample(actor_ids, draw(rng, low, high))
+        ]
+
+
+def seed_database(actors, movies, cast_size=(0, 20),
+                  distribution="triangular", seed=0, chunk_size=None):
+    """Inserts generated actors and movies, with their casts.
+
+    Must run in an app context. The casts are drawn from the actors
+    inserted by the same call, the existing rows are kept.
+
+    Parameters
+    -------
+    actors: int
+        the number of actors to insert.
+    movies: int
+        the number of movies to insert.
+    cast_size: tuple of int
+        the smallest and the largest number of actors per movie.
+    distribution: str
+        the distribution of the cast sizes, see CAST_DISTRIBUTIONS.
+    seed: int
+        the seed of the generator, the same seed inserts the same rows.
+    chunk_size: int, optional
+        the number of rows per transaction, defaults to SEED_CHUNK_SIZE.
+
+    Returns
+    -------
+    casting: int
+        the number of actors cast in the movies.
+    """
+    chunk_size = chunk_size or SEED_CHUNK_SIZE
+    rng = random.Random(seed)
+    first_actor, first_movie = _next_id(Actor), _next_id(Movie)
+
+    tables = (Actor.__table__, Movie.__table__, movie_actor)
+    with deferred_search_index(first_movie, first_actor), \
+            _deferred_indexes(*tables):
+        _insert_chunks(Actor, Actor.__table__, _generate_actors(
+            rng, _chunk_ids(first_actor, actors, chunk_size)))
+        _insert_chunks(Movie, Movie.__table__, _generate_movies(
+            rng, _chunk_ids(first_movie, movies, chunk_size)))
+        # Fewer movies per chunk, for about chunk_size casting rows.
+        average_cast = max(sum(cast_size) / 2, 1)
+        movies_per_chunk = max(int(chunk_size / average_cast), 1)
+        casting = _insert_chunks(Movie, movie_actor, _generate_casts(
+            rng, _chunk_ids(first_movie, movies, movies_per_chunk),
+            range(first_actor, first_actor + actors), cast_size,
+            distribution))
+
+    for model in (Actor, Movie):
+        _reset_id_sequence(model.__table__)
+    db.session.commit()
+    return casting
+
+
+def _parse_cast_size(ctx, param, value):
+    try:
+        low, _, high = value.partition(":")
+        low, high = int(low), int(high or low)
+    except ValueError:
+        raise click.BadParameter("should be MIN:MAX, e.g. 0:20")
+    if low < 0 or high < low:
+        raise click.BadParameter("should be MIN:MAX with 0 <= MIN <= MAX")
+    return low, high
+
+
+@click.command("seed")
+@click.option("--actors", default=1000, show_default=True,
+              type=click.IntRange(min=0), help="Number of actors.")
+@click.option("--movies", default=1000, show_default=True,
+              type=click.IntRange(min=0), help="Number of movies.")
+@click.option("--cast-size", default="0:20", show_default=True,
+              callback=_parse_cast_size,
+              help="Smallest and largest number of actors per movie.")
+@click.option("--distribution", default="triangular", show_default=True,
+              type=click.Choice(sorted(CAST_DISTRIBUTIONS)),
+              help="Distribution of the cast sizes.")
+@click.option("--seed", default=0, show_default=True,
+              help="Seed of the generator, to get the same rows again.")
+@click.option("--chunk-size", default=SEED_CHUNK_SIZE, show_default=True,
+              type=click.IntRange(min=1), help="Rows per transaction.")
+@with_appcontext
+def seed_command(actors, movies, cast_size, distribution, seed,
+                 chunk_size):
+    """Insert generated actors and movies, with their casts."""
+    start = time.perf_counter()
+    casting = seed_database(actors, movies, cast_size, distribution, seed,
+                            chunk_size)
+    click.echo(
+        f"Inserted {actors} actors, {movies} movies and {casting} casting "
+        f"rows in {time.perf_counter() - start:.1f} s.")
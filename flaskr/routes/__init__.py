@@ -1,4 +1,6 @@
 from .actors import actors_blueprint  # noqa
 from .movies import movies_blueprint  # noqa
-from .frontend import oauth_blueprint, oauth  # noqa
+from .frontend import oauth_blueprint  # noqa
 from .health import health_blueprint  # noqa
+from .search import search_blueprint  # noqa
+from .export import export_blueprint  # noqa
@@ -2,20 +2,81 @@
 This module contains the routes for the actors resource.
 """
 
-from flask import Blueprint, jsonify, abort, request
-
-from ..data.models import Actor
-from ..utils import Paginator, handle_db_crud_errors
+from flask import Blueprint, jsonify, abort, request, current_app
+
+from ..data.models import Actor, GenderEnum
+from ..utils import Paginator, handle_db_crud_errors, response_cache
+from ..utils import conditional, timed
+from ..utils import get_bulk_items, build_bulk_rows, bulk_create_response
+from ..utils import Fieldset, QueryFilter, enum_argument, int_argument
+from ..utils import prefix_predicate
 from ..auth.auth import requires_auth
+from ..data.db import use_replica
 
 actors_blueprint = Blueprint('actors_blueprint', __name__)
 
+actor_filter = QueryFilter(
+    filters={
+        'gender': (
+            enum_argument(GenderEnum),
+            lambda gender: Actor.gender == gender),
+        'age_min': (int_argument, lambda age: Actor.age >= age),
+        'age_max': (int_argument, lambda age: Actor.age <= age),
+        'name_prefix': (
+            str,
+            lambda prefix: prefix_predicate(Actor.name, prefix)),
+    },
+    sort_columns={
+        'id': None,
+        'name': Actor.name,
+        'age': Actor.age,
+    },
+)
+
+actor_fieldset = Fieldset(
+    fields=('id', 'name', 'age', 'gender'),
+    embeds=('movies',),
+)
+
 
 @actors_blueprint.route('/actors', methods=['GET'])
+@use_replica
 @requires_auth("get:actors")
+@conditional(Actor)
+@response_cache.cached(Actor)
 def get_actors():
     """Gets all actors
 
+    Request Arguments
+    -------
+    page: int, optional
+        the page number, defaults to 1.
+    per_page: int, optional
+        the number of items per page, 3 by default (ITEM_PER_PAGE) and at
+        most 100 (MAX_PER_PAGE).
+    cursor: str, optional
+        a cursor returned as `next_cursor`, to seek directly to the next
+        page. An empty cursor starts from the first item. `page` is
+        ignored (and returned as null) when a cursor is given.
+    gender: str, optional
+        only the actors of this gender, "M" or "F".
+    age_min: int, optional
+        only the actors of at least this age.
+    age_max: int, optional
+        only the actors of at most this age.
+    name_prefix: str, optional
+        only the actors which name starts with this prefix (case
+        sensitive).
+    sort: str, optional
+        "id" (the default), "name" or "age".
+    order: str, optional
+        "asc" (the default) or "desc".
+    fields: str, optional
+        comma separated columns to return, e.g. "id,name". The id is
+        always returned. All of them by default.
+    embed: str, optional
+        "movies" (the default) to embed the actor's movies, or "none".
+
     Permissions
     -------
     get:actors
@@ -31,39 +92,119 @@ def get_actors():
             the current page number.
         pages: int
             the total number of pages.
+        per_page: int
+            the number of items per page.
         next_page: int or False
             the next page number or False if there is no next page.
         next_page_url: str or False
             the url for the next page or False if there is no next page.
+        next_cursor: str or False
+            an opaque cursor to pass as the `cursor` argument to get the
+            next page, or False if there is no next page.
         total_actors: int
             the total number of actors.
     Response code: int
         200.
 
+    Notes
+    -------
+    Responses have an ETag, a request with a matching If-None-Match
+    header gets a 304 Not Modified.
+
     Raises
     -------
+    400: bad request
+        if the cursor, per_page, a filter, fields or embed is invalid.
     500: server error
         if fetching actors from db fails.
     """
+    strategy = current_app.config["RELATIONSHIP_LOADING"].get(
+        request.endpoint, "select")
+    fields, embed = actor_fieldset.parse(request.args)
+    query, sort_column, descending = actor_filter.apply(
+        Actor.query, request.args)
+    query = query.options(*Actor.loading_options(
+        strategy, fields=Fieldset.loaded(fields, sort_column), embed=embed))
+    paginator = Paginator(
+        query=query, request=request,
+        sort_column=sort_column, descending=descending,
+        format_kwargs={'fields': fields, 'embed': embed})
+
     try:
-        actors = Actor.query.all()
+        actors = paginator.get_next_page_items()
+        total_actors = paginator.total
     except Exception as e:
         print(e)
         abort(500)
 
-    paginator = Paginator(items=actors, request=request)
-
     return jsonify({
             'success': True,
             'page': paginator.page,
             'pages': paginator.pages,
+            'per_page': paginator.per_page,
             'next_page': paginator.next_page_number or False,
             'next_page_url': paginator.next_page_url or False,
-            'actors': paginator.get_next_page_items(),
-            'total_actors': len(actors),
+            'actors': actors,
+            'next_cursor': paginator.next_cursor or False,
+            'total_actors': total_actors,
         }), 200
 
 
+@actors_blueprint.route('/actors/<int:id>', methods=['GET'])
+@use_replica
+@requires_auth("get:actors")
+@conditional(Actor)
+@response_cache.cached(Actor)
+def get_actor(id):
+    """Gets an existing actor.
+
+    Request Arguments
+    -------
+    fields: str, optional
+        comma separated columns to return, see GET /actors.
+    embed: str, optional
+        "movies" (the default) or "none", see GET /actors.
+
+    Permissions
+    -------
+    get:actors
+
+    Parameters
+    -------
+    id: int
+        the id of the actor.
+
+    Returns
+    -------
+    JSON:
+        success: bool
+            will be True if the request was successfully handled.
+        actor: JSON
+            a formatted representation of the actor.
+    Response code: int
+        200
+
+    Notes
+    -------
+    Responses have an ETag, a request with a matching If-None-Match
+    header gets a 304 Not Modified.
+
+    Raises
+    -------
+    400: bad request
+        if fields or embed is invalid.
+    404: not found
+        if the actor does not exist.
+    """
+    fields, embed = actor_fieldset.parse(request.args)
+    actor = Actor.query.options(*Actor.loading_options(
+        fields=fields, embed=embed)).get_or_404(id)
+
+    with timed("format"):
+        formatted = actor.format(fields, embed)
+    return jsonify({"success": True, "actor": formatted}), 200
+
+
 @actors_blueprint.route('/actors', methods=['POST'])
 @requires_auth('create:actor')
 def create_actor():
@@ -111,6 +252,52 @@ def create_actor():
     return jsonify({"success": True, "actor": actor.format()}), 201
 
 
+@actors_blueprint.route('/actors/bulk', methods=['POST'])
+@requires_auth('create:actor')
+def create_actors():
+    """Creates many actors at once.
+
+    The body is a JSON array of actors, validated as in create_actor. The
+    valid actors are inserted in chunked transactions, an invalid actor
+    does not prevent the others from being created.
+
+    Permissions
+    -------
+    create:actor
+
+    Returns
+    -------
+    JSON:
+        success: bool
+            will be True if at least one actor was created.
+        created: int
+            the number of created actors.
+        errors: list of JSON
+            the index in the array and the error message of each actor
+            which was not created.
+    Response code: int
+        201, or 400 if no actor was created.
+
+    Raises
+    -------
+    400: bad request
+        if the body is not an array or is too large.
+    """
+    items = get_bulk_items('actors')
+
+    rows, errors = build_bulk_rows(
+        items, _build_actor_row,
+        'Actor\'s data must contain name and age and gender')
+
+    try:
+        created, insert_errors = Actor.bulk_insert(rows)
+    except Exception as e:
+        print(e)
+        abort(500)
+
+    return bulk_create_response(created, errors + insert_errors)
+
+
 @actors_blueprint.route('/actors/<int:id>', methods=['PATCH'])
 @requires_auth('patch:actor')
 def update_actor(id):
@@ -194,3 +381,10 @@ def delete_actor(id):
         abort(500)
 
     return jsonify({"success": True, "delete": id}), 200
+
+
+def _build_actor_row(item: dict) -> dict:
+    """Validates an actor of a bulk request and gets its column values."""
+    actor = Actor(name=item['name'], age=item['age'], gender=item['gender'])
+
+    return {'name': actor.name, 'age': actor.age, 'gender': actor.gender}
@@ -0,0 +1,97 @@
+"""
+This module contains the routes exporting the whole catalogue.
+"""
+
+from flask import Blueprint, abort, request
+
+from ..data.db import use_replica
+from ..data.models import Actor, Movie
+from ..utils import conditional, int_argument, ndjson_response
+from ..utils import response_coding
+from ..auth.auth import requires_auth
+from .actors import actor_fieldset
+from .movies import movie_fieldset
+
+export_blueprint = Blueprint('export_blueprint', __name__)
+
+
+def export_model(model, fieldset):
+    """Streams every item of a model as NDJSON, ordered by id.
+
+    See export_movies for the request arguments.
+    """
+    try:
+        after_id = int_argument(request.args.get('after_id') or '0')
+    except ValueError as e:
+        abort(400, f"Invalid after_id: {e}")
+
+    fields, embed = fieldset.parse(request.args)
+    query = model.query.options(*model.loading_options(
+        "selectin", fields=fields, embed=embed))
+    query = query.filter(model.id > after_id).order_by(model.id)
+
+    return ndjson_response(
+        query, format_kwargs={'fields': fields, 'embed': embed})
+
+
+@export_blueprint.route('/export/movies', methods=['GET'])
+@use_replica
+@requires_auth('get:movie')
+@conditional(Movie, content_coding=response_coding)
+def export_movies():
+    """Exports all movies as newline delimited JSON (NDJSON).
+
+    The movies are streamed in one response, one JSON document per line,
+    formatted as in GET /movies/$id. The memory used does not depend on
+    the number of movies.
+
+    Request Arguments
+    -------
+    after_id: int, optional
+        only the movies with a greater id, to resume an interrupted
+        export from the last id received.
+    fields: str, optional
+        comma separated columns to export, see GET /movies.
+    embed: str, optional
+        "actors" (the default) or "none", see GET /movies.
+
+    Permissions
+    -------
+    get:movie
+
+    Returns
+    -------
+    NDJSON (application/x-ndjson):
+        the movies, ordered by id. Compressed with gzip if the request
+        has an `Accept-Encoding: gzip` header.
+    Response code: int
+        200.
+
+    Notes
+    -------
+    Responses have an ETag, a request with a matching If-None-Match
+    header gets a 304 Not Modified. The gzipped responses have their own
+    ETag, ending with "-gzip".
+
+    Raises
+    -------
+    400: bad request
+        if after_id, fields or embed is invalid.
+    """
+    return export_model(Movie, movie_fieldset)
+
+
+@export_blueprint.route('/export/actors', methods=['GET'])
+@use_replica
+@requires_auth('get:actors')
+@conditional(Actor, content_coding=response_coding)
+def export_actors():
+    """Exports all actors as newline delimited JSON (NDJSON).
+
+    See export_movies, the actors embed their "movies".
+
+    Permissions
+    -------
+    get:actors
+    """
+    return export_model(Actor, actor_fieldset)
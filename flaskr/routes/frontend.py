@@ -3,48 +3,60 @@ This module contains the routes for the frontend routes.
 """
 
 import json
+import threading
 from os import environ as env
 from urllib.parse import quote_plus, urlencode
 
-from flask import Blueprint
+from flask import Blueprint, current_app
 from flask import render_template, session, url_for, redirect
 
-from dotenv import find_dotenv, load_dotenv
-from authlib.integrations.flask_client import OAuth
+# Extension key of authlib's Flask client.
+OAUTH_EXTENSION = "authlib.integrations.flask_client"
 
+_oauth_lock = threading.Lock()
 
-ENV_FILE = find_dotenv()
-if ENV_FILE:
-    load_dotenv(ENV_FILE)
 
-oauth = OAuth()
+def get_auth0_client():
+    """Gets the Auth0 client of the app, created on first use.
+
+    authlib is only imported, and the AUTH0_* environment variables only
+    read, when a frontend route first needs them, so the API workers which
+    never serve them do not pay for it.
+    """
+    with _oauth_lock:
+        oauth = current_app.extensions.get(OAUTH_EXTENSION)
+        if oauth is None:
+            from authlib.integrations.flask_client import OAuth
+
+            oauth = OAuth(current_app)
+            oauth.register(
+                "auth0",
+                client_id=env.get("AUTH0_CLIENT_ID"),
+                client_secret=env.get("AUTH0_CLIENT_SECRET"),
+                client_kwargs={
+                    "scope": "openid profile email",
+                },
+                server_metadata_url=(
+                    f'https://{env.get("AUTH0_DOMAIN")}/'
+                    '.well-known/openid-configuration'
+                ),
+            )
+    return oauth.auth0
 
-oauth.register(
-    "auth0",
-    client_id=env.get("AUTH0_CLIENT_ID"),
-    client_secret=env.get("AUTH0_CLIENT_SECRET"),
-    client_kwargs={
-        "scope": "openid profile email",
-    },
-    server_metadata_url=(
-        f'https://{env.get("AUTH0_DOMAIN")}/'
-        '.well-known/openid-configuration'
-    ),
-)
 
 oauth_blueprint = Blueprint('oauth_blueprint', __name__)
 
 
 @oauth_blueprint.route("/login")
 def login():
-    return oauth.auth0.authorize_redirect(
+    return get_auth0_client().authorize_redirect(
         redirect_uri=url_for("oauth_blueprint.callback", _external=True)
     )
 
 
 @oauth_blueprint.route("/callback", methods=["GET", "POST"])
 def callback():
-    token = oauth.auth0.authorize_access_token()
+    token = get_auth0_client().authorize_access_token()
     session["user"] = token
     return redirect("/")
 
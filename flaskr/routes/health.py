@@ -2,15 +2,94 @@
 This module contains the routes for a simple healthcheck.
 """
 
-from flask import Blueprint, jsonify, abort
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
 
+from flask import Blueprint, jsonify, abort, current_app
+from sqlalchemy import func, select, text
+
+from ..auth import auth
+from ..auth.auth import requires_auth
+from ..data.db import db, use_replica
 from ..data.models import Actor, Movie
+from ..data.pool import get_pool_stats
+from ..utils import response_cache
 
 
 health_blueprint = Blueprint('health_blueprint', __name__)
 
+# Runs the readiness probes, so that a hanging database can be timed out.
+_probe_executor = ThreadPoolExecutor(
+    max_workers=1, thread_name_prefix="health-probe")
+
+# Ping of the database running, see _get_probe.
+_probe = {'future': None}
+_probe_lock = threading.Lock()
+
+# Last counts of actors and movies and the time they expire at.
+_counts_cache = {'expires_at': 0.0, 'counts': None}
+_counts_lock = threading.Lock()
+
+
+def _ping_database(engine, timeout):
+    """Runs a trivial query on a connection of the engine.
+
+    On PostgreSQL the query is cancelled by the server after timeout
+    seconds.
+    """
+    with engine.begin() as connection:
+        if connection.dialect.name == "postgresql":
+            connection.execute(text(
+                f"SET LOCAL statement_timeout = {int(timeout * 1000)}"))
+        connection.execute(text("SELECT 1"))
+
+
+def _get_probe(engine, timeout):
+    """Gets the running ping of the database, or starts a new one.
+
+    Waiting on a ping with a timeout does not stop it: a ping stuck on a
+    hanging database keeps running. The probes made meanwhile wait on
+    that same ping instead of queuing new ones behind it, so the first
+    probe after it ends pings the database again.
+    """
+    with _probe_lock:
+        future = _probe['future']
+        if future is None or future.done():
+            future = _probe['future'] = _probe_executor.submit(
+                _ping_database, engine, timeout)
+        return future
+
+
+def _count_actors_and_movies():
+    """Counts actors and movies with a single query.
+
+    The counts are cached for HEALTH_COUNTS_TTL seconds.
+    """
+    ttl = current_app.config["HEALTH_COUNTS_TTL"]
+    now = time.monotonic()
+
+    with _counts_lock:
+        if ttl and _counts_cache['counts'] and (
+            now < _counts_cache['expires_at']
+        ):
+            return _counts_cache['counts']
+
+    actors, movies = db.session.query(
+        select(func.count(Actor.id)).scalar_subquery(),
+        select(func.count(Movie.id)).scalar_subquery(),
+    ).one()
+    counts = {'actors': actors, 'movies': movies}
+
+    with _counts_lock:
+        _counts_cache['counts'] = counts
+        _counts_cache['expires_at'] = now + ttl
+
+    return counts
+
 
 @health_blueprint.route('/health', methods=['GET'])
+@use_replica
 def get_health():
     """Gets health of the app
 
@@ -26,20 +105,115 @@ def get_health():
     Response code: int
         200.
 
+    Notes
+    -------
+    The counts are cached for HEALTH_COUNTS_TTL seconds.
+
     Raises
     -------
     500: server error
         if fetching actors from db fails.
     """
     try:
-        actors = Actor.query.all()
-        movies = Movie.query.all()
+        counts = _count_actors_and_movies()
     except Exception as e:
         print(e)
         abort(500)
 
     return jsonify({
             'success': True,
-            'actors': len(actors),
-            'movies': len(movies)
+            'actors': counts['actors'],
+            'movies': counts['movies']
         }), 200
+
+
+@health_blueprint.route('/health/live', methods=['GET'])
+def get_liveness():
+    """Liveness probe, tells that the app is up without touching the db.
+
+    Returns
+    -------
+    JSON:
+        sucess: bool
+            will be True if the request was successfully handled.
+    Response code: int
+        200.
+    """
+    return jsonify({'success': True}), 200
+
+
+@health_blueprint.route('/health/ready', methods=['GET'])
+def get_readiness():
+    """Readiness probe, tells that the app can reach the database.
+
+    Runs a `SELECT 1` which must answer within HEALTH_READY_TIMEOUT
+    seconds.
+
+    Returns
+    -------
+    JSON:
+        sucess: bool
+            will be True if the request was successfully handled.
+    Response code: int
+        200.
+
+    Raises
+    -------
+    503: service unavailable
+        if the database did not answer in time or failed.
+    """
+    timeout = current_app.config["HEALTH_READY_TIMEOUT"]
+    future = _get_probe(db.engine, timeout)
+
+    try:
+        future.result(timeout=timeout)
+    except TimeoutError:
+        abort(503, f"Database did not answer within {timeout} seconds")
+    except Exception as e:
+        print(e)
+        abort(503, "Database is unavailable")
+
+    return jsonify({'success': True}), 200
+
+
+@health_blueprint.route('/health/stats', methods=['GET'])
+@requires_auth('get:stats')
+def get_stats():
+    """Gets the statistics of the in process caches and connection pools.
+
+    Requires the get:stats permission, the statistics tell about the
+    internals of the app.
+
+    Returns
+    -------
+    JSON:
+        sucess: bool
+            will be True if the request was successfully handled.
+        response_cache: JSON
+            size, hits, misses, hit_ratio, evictions and invalidations of
+            the cache of the list endpoints responses.
+        token_cache: JSON
+            size, maxsize, hits, misses and hit_ratio of the cache of the
+            verified tokens.
+        pools: JSON
+            the statistics of the connection pool of each database bind
+            ("default" for the main database), see flaskr.data.pool.
+    Response code: int
+        200.
+
+    Raises
+    -------
+    401: unauthorized
+        if the token is missing or invalid.
+    403: forbidden
+        if the token has not the get:stats permission.
+    """
+    return jsonify({
+        'success': True,
+        'response_cache': response_cache.stats(),
+        'token_cache': auth.token_cache.stats(),
+        'pools': {
+            bind or 'default': get_pool_stats(engine)
+            for bind, engine in db.engines.items()
+        },
+    }), 200
@@ -0,0 +1,182 @@
+"""
+This module contains the Prometheus metrics of the app and their endpoint.
+
+Registering metrics_blueprint records the number, the duration and the
+response size of the requests, labeled by endpoint (e.g.
+`actors_blueprint.get_actors`), method and status code. After each
+request, the statistics of the connection pools and of the caches (see
+/health/stats) are copied to the metrics of the process.
+
+The metrics are exposed at /metrics in the Prometheus text format, to
+the tokens with the get:stats permission, like /health/stats. When
+the PROMETHEUS_MULTIPROC_DIR environment variable is set, e.g. by
+gunicorn.conf.py, every process writes its metrics to mmap files in that
+directory and /metrics aggregates the files of all the workers.
+"""
+
+import os
+import threading
+import time
+
+from flask import Blueprint, Response, g, request
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram
+from prometheus_client import generate_latest, multiprocess
+
+from ..auth import auth
+from ..auth.auth import requires_auth
+from ..data.db import db
+from ..data.pool import get_pool_stats
+from ..utils import response_cache
+
+
+metrics_blueprint = Blueprint('metrics_blueprint', __name__)
+
+REQUESTS = Counter(
+    "flaskr_http_requests_total",
+    "Number of HTTP requests.",
+    ["endpoint", "method", "status"])
+REQUEST_DURATION = Histogram(
+    "flaskr_http_request_duration_seconds",
+    "Duration of the HTTP requests, in seconds.",
+    ["endpoint", "method"],
+    buckets=(.001, .0025, .005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10))
+RESPONSE_SIZE = Histogram(
+    "flaskr_http_response_size_bytes",
+    "Size of the HTTP responses with a known length, in bytes.",
+    ["endpoint", "method"],
+    buckets=(100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000))
+
+# Sizes of the pools, by bind ("default" for the main database). The live
+# workers' values are added up.
+POOL_CHECKED_OUT = Gauge(
+    "flaskr_db_pool_checked_out",
+    "Connections in use.",
+    ["bind"], multiprocess_mode="livesum")
+POOL_IDLE = Gauge(
+    "flaskr_db_pool_idle",
+    "Connections idle in the pool, for the queue pools.",
+    ["bind"], multiprocess_mode="livesum")
+POOL_OVERFLOW = Gauge(
+    "flaskr_db_pool_overflow",
+    "Connections opened over the size of the pool, for the queue pools.",
+    ["bind"], multiprocess_mode="livesum")
+POOL_CONNECTS = Counter(
+    "flaskr_db_pool_connects_total",
+    "Connections opened to the database.",
+    ["bind"])
+POOL_CHECKOUTS = Counter(
+    "flaskr_db_pool_checkouts_total",
+    "Connections taken from the pool.",
+    ["bind"])
+POOL_TIMEOUTS = Counter(
+    "flaskr_db_pool_timeouts_total",
+    "Requests which waited too long for a connection, for the queue pools.",
+    ["bind"])
+
+CACHE_HITS = Counter(
+    "flaskr_cache_hits_total",
+    "Lookups found in a cache: \"token\" (verified tokens) or \"response\".",
+    ["cache"])
+CACHE_MISSES = Counter(
+    "flaskr_cache_misses_total",
+    "Lookups missing from a cache: \"token\" or \"response\".",
+    ["cache"])
+
+# Last values of the statistics copied to the counters, see _count_up_to.
+_counted = {}
+_counted_lock = threading.Lock()
+
+
+def _count_up_to(counter, value, **labels):
+    """Increments the counter up to the running total of a statistic.
+
+    A total lower than the previous one, e.g. of a cache which was
+    cleared, starts over.
+    """
+    key = (counter, tuple(labels.items()))
+    with _counted_lock:
+        last = _counted.get(key, 0)
+        _counted[key] = value
+    child = counter.labels(**labels)
+    if value > last:
+        child.inc(value - last)
+
+
+def _collect_pool_stats():
+    for bind, engine in db.engines.items():
+        bind = bind or 'default'
+        stats = get_pool_stats(engine)
+        POOL_CHECKED_OUT.labels(bind).set(stats['checked_out'])
+        if 'idle' in stats:
+            POOL_IDLE.labels(bind).set(stats['idle'])
+            POOL_OVERFLOW.labels(bind).set(max(stats['overflow'], 0))
+        _count_up_to(POOL_CONNECTS, stats['connects'], bind=bind)
+        _count_up_to(POOL_CHECKOUTS, stats['checkouts'], bind=bind)
+        if 'timeouts' in stats:
+            _count_up_to(POOL_TIMEOUTS, stats['timeouts'], bind=bind)
+
+
+def _collect_cache_stats():
+    for cache, stats in (('token', auth.token_cache.stats()),
+                         ('response', response_cache.stats())):
+        _count_up_to(CACHE_HITS, stats['hits'], cache=cache)
+        _count_up_to(CACHE_MISSES, stats['misses'], cache=cache)
+
+
+@metrics_blueprint.before_app_request
+def _start_request():
+    g.metrics_start = time.perf_counter()
+
+
+@metrics_blueprint.after_app_request
+def _record_request(response):
+    start = g.pop('metrics_start', None)
+    if start is None:
+        return response
+
+    endpoint = request.endpoint or 'none'
+    REQUESTS.labels(
+        endpoint, request.method, str(response.status_code)).inc()
+    REQUEST_DURATION.labels(endpoint, request.method).observe(
+        time.perf_counter() - start)
+    # Streamed responses, e.g. the exports, have no length.
+    if response.content_length is not None:
+        RESPONSE_SIZE.labels(endpoint, request.method).observe(
+            response.content_length)
+
+    _collect_pool_stats()
+    _collect_cache_stats()
+    return response
+
+
+@metrics_blueprint.route('/metrics', methods=['GET'])
+@requires_auth('get:stats')
+def get_metrics():
+    """Gets the metrics of the app, in the Prometheus text format.
+
+    Requires the get:stats permission, the metrics tell about the
+    internals of the app.
+
+    Returns
+    -------
+    text:
+        the metrics of every worker when PROMETHEUS_MULTIPROC_DIR is set,
+        the ones of this process otherwise.
+    Response code: int
+        200.
+
+    Raises
+    -------
+    401: unauthorized
+        if the token is missing or invalid.
+    403: forbidden
+        if the token has not the get:stats permission.
+    """
+    registry = REGISTRY
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+
+    return Response(
+        generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
@@ -2,20 +2,79 @@
 This module contains the routes for the movies resource.
 """
 
-from flask import Blueprint, jsonify, abort, request
+from flask import Blueprint, jsonify, abort, request, current_app
 
 from ..data.models import Movie, Actor
-from ..utils import Paginator, handle_db_crud_errors
+from ..utils.movie_genre import MovieGenreEnum
+from ..utils import Paginator, handle_db_crud_errors, response_cache
+from ..utils import conditional, timed
+from ..utils import get_bulk_items, build_bulk_rows, bulk_create_response
+from ..utils import Fieldset, QueryFilter, date_argument, enum_argument
 from ..auth.auth import requires_auth
+from ..data.db import use_replica
 
 movies_blueprint = Blueprint('movies_blueprint', __name__)
 
+movie_filter = QueryFilter(
+    filters={
+        'genre': (
+            enum_argument(MovieGenreEnum),
+            lambda genre: Movie.genre == genre),
+        'release_date_from': (
+            date_argument,
+            lambda release_date: Movie.release_date >= release_date),
+        'release_date_to': (
+            date_argument,
+            lambda release_date: Movie.release_date <= release_date),
+    },
+    sort_columns={
+        'id': None,
+        'title': Movie.title,
+        'release_date': Movie.release_date,
+    },
+)
+
+movie_fieldset = Fieldset(
+    fields=('id', 'title', 'release_date', 'genre', 'description'),
+    embeds=('actors',),
+)
+
 
 @movies_blueprint.route('/movies', methods=['GET'])
+@use_replica
 @requires_auth('get:movie')
+@conditional(Movie)
+@response_cache.cached(Movie)
 def get_movies():
     """Gets all movies
 
+    Request Arguments
+    -------
+    page: int, optional
+        the page number, defaults to 1.
+    per_page: int, optional
+        the number of items per page, 3 by default (ITEM_PER_PAGE) and at
+        most 100 (MAX_PER_PAGE).
+    cursor: str, optional
+        a cursor returned as `next_cursor`, to seek directly to the next
+        page. An empty cursor starts from the first item. `page` is
+        ignored (and returned as null) when a cursor is given.
+    genre: str, optional
+        only the movies of this genre, see MovieGenreEnum.
+    release_date_from: str, optional
+        only the movies released on or after this date (DD-MM-YYYY).
+    release_date_to: str, optional
+        only the movies released on or before this date (DD-MM-YYYY).
+    sort: str, optional
+        "id" (the default), "title" or "release_date".
+    order: str, optional
+        "asc" (the default) or "desc".
+    fields: str, optional
+        comma separated columns to return, e.g. "id,title". The id is
+        always returned. All of them by default.
+    embed: str, optional
+        "actors" (the default) to embed the movie's actors, or "none".
+
     Permissions
     -------
     get:movies
@@ -31,39 +90,119 @@ def get_movies():
             the current page number.
         pages: int
             the total number of pages.
+        per_page: int
+            the number of items per page.
         next_page: int or False
             the next page number or False if there is no next page.
         next_page_url: str or False
             the url for the next page or False if there is no next page.
+        next_cursor: str or False
+            an opaque cursor to pass as the `cursor` argument to get the
+            next page, or False if there is no next page.
         total_movies: int
             the total number of movies.
     Response code: int
         200.
 
+    Notes
+    -------
+    Responses have an ETag, a request with a matching If-None-Match
+    header gets a 304 Not Modified.
+
     Raises
     -------
+    400: bad request
+        if the cursor, per_page, a filter, fields or embed is invalid.
     500: server error
         if fetching movies from db fails.
     """
+    strategy = current_app.config["RELATIONSHIP_LOADING"].get(
+        request.endpoint, "select")
+    fields, embed = movie_fieldset.parse(request.args)
+    query, sort_column, descending = movie_filter.apply(
+        Movie.query, request.args)
+    query = query.options(*Movie.loading_options(
+        strategy, fields=Fieldset.loaded(fields, sort_column), embed=embed))
+    paginator = Paginator(
+        query=query, request=request,
+        sort_column=sort_column, descending=descending,
+        format_kwargs={'fields': fields, 'embed': embed})
+
     try:
-        movies = Movie.query.all()
+        movies = paginator.get_next_page_items()
+        total_movies = paginator.total
     except Exception as e:
         print(e)
         abort(500)
 
-    paginator = Paginator(items=movies, request=request)
-
     return jsonify({
         'success': True,
         'page': paginator.page,
         'pages': paginator.pages,
+        'per_page': paginator.per_page,
         'next_page': paginator.next_page_number or False,
         'next_page_url': paginator.next_page_url or False,
-        'movies': paginator.get_next_page_items(),
-        'total_movies': len(movies),
+        'movies': movies,
+        'next_cursor': paginator.next_cursor or False,
+        'total_movies': total_movies,
     }), 200
 
 
+@movies_blueprint.route('/movies/<int:id>', methods=['GET'])
+@use_replica
+@requires_auth('get:movie')
+@conditional(Movie)
+@response_cache.cached(Movie)
+def get_movie(id):
+    """Gets an existing movie.
+
+    Request Arguments
+    -------
+    fields: str, optional
+        comma separated columns to return, see GET /movies.
+    embed: str, optional
+        "actors" (the default) or "none", see GET /movies.
+
+    Permissions
+    -------
+    get:movie
+
+    Parameters
+    -------
+    id: int
+        the id of the movie.
+
+    Returns
+    -------
+    JSON:
+        success: bool
+            will be True if the request was successfully handled.
+        movie: JSON
+            a formatted representation of the movie.
+    Response code: int
+        200
+
+    Notes
+    -------
+    Responses have an ETag, a request with a matching If-None-Match
+    header gets a 304 Not Modified.
+
+    Raises
+    -------
+    400: bad request
+        if fields or embed is invalid.
+    404: not found
+        if the movie does not exist.
+    """
+    fields, embed = movie_fieldset.parse(request.args)
+    movie = Movie.query.options(*Movie.loading_options(
+        fields=fields, embed=embed)).get_or_404(id)
+
+    with timed("format"):
+        formatted = movie.format(fields, embed)
+    return jsonify({"success": True, "movie": formatted}), 200
+
+
 @movies_blueprint.route('/movies', methods=['POST'])
 @requires_auth('create:movie')
 def create_movie():
@@ -118,6 +257,67 @@ def create_movie():
     return jsonify({"success": True, "movie": movie.format()}), 201
 
 
+@movies_blueprint.route('/movies/bulk', methods=['POST'])
+@requires_auth('create:movie')
+def create_movies():
+    """Creates many movies at once.
+
+    The body is a JSON array of movies, validated as in create_movie. The
+    valid movies are inserted in chunked transactions, an invalid movie
+    does not prevent the others from being created.
+
+    Permissions
+    -------
+    create:movie
+
+    Returns
+    -------
+    JSON:
+        success: bool
+            will be True if at least one movie was created.
+        created: int
+            the number of created movies.
+        errors: list of JSON
+            the index in the array and the error message of each movie
+            which was not created.
+    Response code: int
+        201, or 400 if no movie was created.
+
+    Raises
+    -------
+    400: bad request
+        if the body is not an array or is too large.
+    """
+    items = get_bulk_items('movies')
+
+    rows, errors = build_bulk_rows(
+        items, _build_movie_row,
+        'Movie\'s data must contain a title and release_date')
+
+    try:
+        actors_id = set().union(*(values['actors'] for _, values in rows))
+        missing_actors_id = actors_id - Actor.get_existing_ids(actors_id)
+
+        valid_rows = []
+        for index, values in rows:
+            missing = values['actors'] & missing_actors_id
+            if missing:
+                errors.append({
+                    'index': index,
+                    'message': 'Actors not found: '
+                               f'{", ".join(map(str, sorted(missing)))}',
+                })
+            else:
+                valid_rows.append((index, values))
+
+        created, insert_errors = Movie.bulk_insert(valid_rows)
+    except Exception as e:
+        print(e)
+        abort(500)
+
+    return bulk_create_response(created, errors + insert_errors)
+
+
 @movies_blueprint.route('/movies/<int:id>', methods=['PATCH'])
 @requires_auth('patch:movie')
 def update_movie(id):
@@ -214,6 +414,37 @@ def delete_movie(id):
     return jsonify({"success": True, "delete": id}), 200
 
 
+def _build_movie_row(item: dict) -> dict:
+    """Validates a movie of a bulk request and gets its column values.
+
+    The ids of the movie's actors are returned as a set under "actors".
+    """
+    optional_fields = {
+        key: item[key] for key in ('genre', 'description') if key in item
+    }
+    movie = Movie(
+        title=item['title'],
+        release_date=item['release_date'],
+        **optional_fields
+    )
+
+    actors_id = item.get('actors', [])
+    if not isinstance(actors_id, list):
+        raise TypeError('actors must be a list of actor ids')
+    try:
+        actors_id = {int(actor_id) for actor_id in actors_id}
+    except (TypeError, ValueError):
+        raise TypeError('Invalid actor id, should be int')
+
+    return {
+        'title': movie.title,
+        'release_date': movie.release_date,
+        'genre': movie.genre,
+        'description': movie.description,
+        'actors': actors_id,
+    }
+
+
 def _get_actors_from_list_of_actors_id(actors_id: list[int]) -> list[Actor]:
     """Gets a list of actors from a list of actors ids.
 
@@ -227,22 +458,29 @@ def _get_actors_from_list_of_actors_id(actors_id: list[int]) -> list[Actor]:
     list of Actor:
         list of actors fetched from the database.
 
+    Notes
+    -------
+    The actors are fetched with chunked `IN (...)` queries, so the cost
+    does not grow with one query per actor.
+
     Raises
     -------
     400: 'actors must be a list of actor ids'
     400: 'Invalid actor id, should be int'
+    404: 'Actors not found: ...'
+        listing all the ids which do not exist.
     """
-    actors = []
-
     if not isinstance(actors_id, list):
         abort(400, 'actors must be a list of actor ids')
     try:
         actors_id = {int(actor_id) for actor_id in actors_id}
-    except ValueError:
+    except (TypeError, ValueError):
         abort(400, 'Invalid actor id, should be int')
 
-    for actor_id in actors_id:
-        actor = Actor.query.get_or_404(actor_id)
-        actors.append(actor)
+    actors = Actor.get_by_ids(actors_id)
+
+    missing = actors_id - {actor.id for actor in actors}
+    if missing:
+        abort(404, f'Actors not found: {", ".join(map(str, sorted(missing)))}')
 
     return actors
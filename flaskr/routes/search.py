@@ -0,0 +1,113 @@
+"""
+This module contains the route of the full-text search.
+"""
+
+from flask import Blueprint, jsonify, abort, request
+
+from ..data.db import db, use_replica
+from ..data.search import SearchEntry, build_match_query, supports_search
+from ..utils import Paginator, response_cache, conditional
+from ..auth.auth import requires_auth
+
+search_blueprint = Blueprint('search_blueprint', __name__)
+
+SEARCH_TYPES = ('movie', 'actor')
+
+
+@search_blueprint.route('/search', methods=['GET'])
+@use_replica
+@requires_auth("get:movie", "get:actors")
+@conditional(SearchEntry)
+@response_cache.cached(SearchEntry)
+def search():
+    """Searches the movies by title and description, and the actors by name.
+
+    Results are ranked by relevance (bm25), the best first. Every word of
+    the search must match, the last one as a prefix.
+
+    Request Arguments
+    -------
+    q: str
+        the search.
+    type: str, optional
+        only the results of this type, "movie" or "actor".
+    page: int, optional
+        the page number, defaults to 1.
+    per_page: int, optional
+        the number of items per page, 3 by default (ITEM_PER_PAGE) and at
+        most 100 (MAX_PER_PAGE).
+    cursor: str, optional
+        a cursor returned as `next_cursor`, see GET /actors.
+
+    Permissions
+    -------
+    get:movie and get:actors
+
+    Returns
+    -------
+    JSON:
+        sucess: bool
+            will be True if the request was successfully handled.
+        results: list of json objects
+            the movies ({type, id, title, description, score}) and the
+            actors ({type, id, name, score}) matching the search.
+        page: int
+            the current page number.
+        pages: int
+            the total number of pages.
+        per_page: int
+            the number of items per page.
+        next_page: int or False
+            the next page number or False if there is no next page.
+        next_page_url: str or False
+            the url for the next page or False if there is no next page.
+        next_cursor: str or False
+            the cursor of the next page or False if there is no next page.
+        total_results: int
+            the total number of results.
+    Response code: int
+        200.
+
+    Raises
+    -------
+    400: bad request
+        if q has no word, or type, per_page or the cursor is invalid.
+    501: not implemented
+        if the database has no full-text search (not SQLite).
+    500: server error
+        if searching the db fails.
+    """
+    search = request.args.get('q', '')
+    if build_match_query(search) is None:
+        abort(400, 'Missing search: q should contain at least one word')
+
+    kind = request.args.get('type') or None
+    if kind is not None and kind not in SEARCH_TYPES:
+        abort(400, 'Invalid type: should be one of the following: '
+                   f'{", ".join(SEARCH_TYPES)}')
+
+    if not supports_search(db.engine):
+        abort(501, 'Full-text search is only available with SQLite')
+
+    paginator = Paginator(
+        query=SearchEntry.matching(search, kind), request=request,
+        sort_column=SearchEntry.rank)
+
+    try:
+        results = paginator.get_next_page_items()
+        total_results = paginator.total
+    except Exception as e:
+        print(e)
+        abort(500)
+
+    return jsonify({
+            'success': True,
+            'page': paginator.page,
+            'pages': paginator.pages,
+            'per_page': paginator.per_page,
+            'next_page': paginator.next_page_number or False,
+            'next_page_url': paginator.next_page_url or False,
+            'results': results,
+            'next_cursor': paginator.next_cursor or False,
+            'total_results': total_results,
+        }), 200
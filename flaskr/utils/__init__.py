@@ -1,3 +1,12 @@
 from .error_handlers import error_handlers_blueprint  # noqa
 from .error_crud_handlers import handle_db_crud_errors  # noqa
 from .paginator import Paginator  # noqa
+from .response_cache import response_cache  # noqa
+from .conditional import conditional  # noqa
+from .bulk import get_bulk_items, build_bulk_rows, bulk_create_response  # noqa
+from .filters import QueryFilter, prefix_predicate  # noqa
+from .filters import date_argument, enum_argument, int_argument  # noqa
+from .fieldsets import Fieldset  # noqa
+from .json_provider import JSON_PROVIDERS  # noqa
+from .export import ndjson_response, response_coding  # noqa
+from .server_timing import timed, init_server_timing  # noqa
@@ -0,0 +1,102 @@
+"""
+Module to read and answer the bulk create requests.
+"""
+
+from flask import abort, jsonify, request
+
+from ..constants import BULK_MAX_ITEMS
+
+
+def get_bulk_items(resource):
+    """Gets the items of a bulk create request.
+
+    Parameters
+    -------
+    resource: str
+        the name of the created resource, e.g. "actors".
+
+    Returns
+    -------
+    items: list
+        the JSON array sent in the request's body.
+
+    Raises
+    -------
+    400: bad request
+        if the body is not an array or holds more than BULK_MAX_ITEMS items.
+    """
+    items = request.get_json()
+
+    if not isinstance(items, list):
+        abort(400, f'Data must be a list of {resource}')
+    if len(items) > BULK_MAX_ITEMS:
+        abort(400, f'At most {BULK_MAX_ITEMS} {resource} can be created at '
+                   'once')
+
+    return items
+
+
+def build_bulk_rows(items, build_row, missing_fields_message):
+    """Validates the items of a bulk create request.
+
+    Parameters
+    -------
+    items: list
+        the items of the request.
+    build_row: function
+        builds the column values of an item, raising a KeyError if a
+        field is missing and a TypeError or a ValueError if a field is
+        invalid (see the models' validators).
+    missing_fields_message: str
+        the error message of the items missing a field.
+
+    Returns
+    -------
+    rows: list of (int, dict)
+        the index and the column values of the valid items.
+    errors: list of dict
+        the index and the error message of the invalid items.
+    """
+    rows, errors = [], []
+
+    for index, item in enumerate(items):
+        try:
+            rows.append((index, build_row(item)))
+        except KeyError:
+            errors.append({'index': index, 'message': missing_fields_message})
+        except (TypeError, ValueError, AttributeError) as e:
+            errors.append({'index': index, 'message': f"ERROR: {e}"})
+
+    return rows, errors
+
+
+def bulk_create_response(created, errors):
+    """Answers a bulk create request.
+
+    Parameters
+    -------
+    created: int
+        the number of created items.
+    errors: list of dict
+        the index and the error message of the items not created.
+
+    Returns
+    -------
+    JSON:
+        success: bool
+            will be True if at least one item was created.
+        created: int
+            the number of created items.
+        errors: list of JSON
+            the index and the error message of the items not created,
+            sorted by index.
+    Response code: int
+        201 if at least one item was created, else 400.
+    """
+    success = bool(created) or not errors
+
+    return jsonify({
+        'success': success,
+        'created': created,
+        'errors': sorted(errors, key=lambda error: error['index']),
+    }), 201 if success else 400
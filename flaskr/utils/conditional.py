@@ -0,0 +1,73 @@
+"""
+Module to handle conditional GET requests with ETags.
+"""
+
+import hashlib
+from functools import wraps
+
+from flask import current_app, g, make_response, request
+
+
+def compute_etag(model):
+    """Computes the ETag of the current request's response.
+
+    The versions read are kept in g.table_versions, see
+    ResponseCache.cached.
+
+    The ETag is derived from the request url and the versions of the
+    tables read to format the model (see TableVersion), so it changes as
+    soon as one of those tables is written, without hashing the body.
+
+    Parameters
+    -------
+    model: db Model
+        the model the view reads.
+
+    Returns
+    -------
+    etag: str
+        the (unquoted) strong ETag.
+    """
+    versions = g.table_versions = model.get_table_versions()
+    digest = hashlib.blake2b(request.url.encode(), digest_size=8)
+    for table in sorted(versions):
+        digest.update(f"|{table}:{versions[table]}".encode())
+    return digest.hexdigest()
+
+
+def conditional(model, content_coding=None):
+    """Decorator adding conditional GET support to a view.
+
+    Successful responses get a strong ETag. A request which If-None-Match
+    header matches the current ETag is answered with a 304 Not Modified
+    before the view runs, so no other query and no format() is needed.
+
+    Parameters
+    -------
+    model: db Model
+        the model the view reads.
+    content_coding: function, optional
+        gets the content coding of the response to the request, e.g.
+        "gzip", or None if the body is not encoded. It is added to the
+        ETag, as the bodies of different codings differ.
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            etag = compute_etag(model)
+            coding = content_coding() if content_coding else None
+            if coding:
+                etag = f"{etag}-{coding}"
+
+            if request.if_none_match.contains_weak(etag):
+                response = current_app.response_class(status=304)
+                response.set_etag(etag)
+                return response
+
+            response = make_response(func(*args, **kwargs))
+            if response.status_code == 200:
+                response.set_etag(etag)
+            return response
+
+        return wrapper
+    return decorator
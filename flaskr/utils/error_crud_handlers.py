@@ -4,6 +4,23 @@ from functools import wraps
 
 from flask import abort
 from sqlalchemy import exc
+from werkzeug.exceptions import HTTPException
+
+
+def get_db_error_message(error):
+    """Extracts a short message from a database error.
+
+    Parameters
+    -------
+    error: sqlalchemy.exc.DBAPIError
+        the error raised by the database driver
+
+    Returns
+    -------
+    message: str
+        the last part of the driver's message, e.g. the failed constraint
+    """
+    return str(error.orig).split(':')[-1].replace('\n', '').strip()
 
 
 def handle_db_crud_errors(func):
@@ -25,6 +42,8 @@ def handle_db_crud_errors(func):
         if model's attributes sent by the user doesn't match the expected types
     400: IntegrityError
         if the action could not be performed due to a database integrity error
+    4xx: HTTPException
+        raised by func, e.g. with abort, is re-raised as is
     500: server error
         the error's message is returned in the response body
     """
@@ -35,17 +54,20 @@ def handle_db_crud_errors(func):
         try:
             result = func()
 
+        except HTTPException:
+            raise
+
         except TypeError as e:
             print(e)
             abort(400, f"ERROR: {e}")
 
         except exc.IntegrityError as e:
-            err_msg = str(e.orig).split(':')[-1].replace('\n', '').strip()
+            err_msg = get_db_error_message(e)
             print(e)
             abort(400, f"ERROR: {err_msg}")
 
         except Exception as e:
-            err_msg = str(e.orig).split(':')[-1].replace('\n', '').strip()
+            err_msg = get_db_error_message(e)
             print(e)
             abort(500, f"ERROR: {err_msg}")
 
@@ -80,3 +80,29 @@ def internal_server_error(error):
         ),
         500
     )
+
+
+@error_handlers_blueprint.app_errorhandler(503)
+def service_unavailable(error):
+    message = error.description or "Service Unavailable"
+    return (
+        jsonify(
+            {"success": False,
+                "error": 503,
+                "message": message}
+        ),
+        503
+    )
+
+
+@error_handlers_blueprint.app_errorhandler(501)
+def not_implemented(error):
+    message = error.description or "Not Implemented"
+    return (
+        jsonify(
+            {"success": False,
+                "error": 501,
+                "message": message}
+        ),
+        501
+    )
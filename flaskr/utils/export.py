@@ -0,0 +1,83 @@
+"""
+Module to stream the rows of a query as newline delimited JSON (NDJSON).
+"""
+
+import zlib
+
+from flask import current_app, request, stream_with_context
+
+from ..constants import EXPORT_CHUNK_SIZE
+
+NDJSON_MIMETYPE = "application/x-ndjson"
+
+
+def iter_ndjson(query, chunk_size=None, format_kwargs=None):
+    """Formats the items of a query as NDJSON, a chunk of lines at a time.
+
+    The rows are fetched `chunk_size` at a time with yield_per, from a
+    server-side cursor where the database has them, so only one chunk of
+    items is held in memory, whatever the size of the table.
+
+    Parameters
+    -------
+    query: SQLAlchemy query
+        the ordered query of the items to export. Its relationships must
+        not be loaded with joinedload, which yield_per does not support.
+    chunk_size: int, optional
+        the number of rows fetched at a time, EXPORT_CHUNK_SIZE by default.
+    format_kwargs: dict, optional
+        keyword arguments of the items' format method.
+
+    Yields
+    -------
+    lines: str
+        the JSON documents of a chunk of items, one per line.
+    """
+    chunk_size = chunk_size or EXPORT_CHUNK_SIZE
+    format_kwargs = format_kwargs or {}
+    dumps = current_app.json.dumps
+
+    lines = []
+    query = query.execution_options(stream_results=True)
+    for item in query.yield_per(chunk_size):
+        lines.append(dumps(item.format(**format_kwargs)))
+        if len(lines) == chunk_size:
+            yield "\n".join(lines) + "\n"
+            lines = []
+    if lines:
+        yield "\n".join(lines) + "\n"
+
+
+def gzip_chunks(chunks):
+    """Compresses a stream of text chunks with gzip."""
+    compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode())
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def response_coding():
+    """Content coding of the export to the request: "gzip" or None."""
+    return "gzip" if request.accept_encodings["gzip"] > 0 else None
+
+
+def ndjson_response(query, chunk_size=None, format_kwargs=None):
+    """Streams the items of a query as NDJSON, see iter_ndjson.
+
+    The response is compressed with gzip when the request accepts it,
+    see response_coding. The request context is kept while the response streams, so the
+    database session stays open until the last chunk is sent.
+    """
+    chunks = stream_with_context(
+        iter_ndjson(query, chunk_size, format_kwargs))
+
+    compress = response_coding() == "gzip"
+    response = current_app.response_class(
+        gzip_chunks(chunks) if compress else chunks,
+        mimetype=NDJSON_MIMETYPE)
+    if compress:
+        response.headers["Content-Encoding"] = "gzip"
+    response.vary.add("Accept-Encoding")
+    return response
@@ -0,0 +1,88 @@
+"""
+Module to select the fields and the embedded relationships of a response
+from the request arguments.
+"""
+
+from flask import abort
+
+
+class Fieldset(object):
+    """Sparse fieldset and embedded relationships of an endpoint.
+
+    The `fields` argument is a comma separated list of the columns to
+    return, the id is always returned. The `embed` argument is a comma
+    separated list of the relationships to embed, or "none". Without
+    them, every column and every relationship is returned.
+
+    Parameters
+    -------
+    fields: iterable of str
+        the names of the columns which can be selected.
+    embeds: iterable of str
+        the names of the relationships which can be embedded.
+
+    EXAMPLE:
+        movie_fieldset = Fieldset(
+            fields=('id', 'title', 'genre'), embeds=('actors',))
+    """
+
+    def __init__(self, fields, embeds):
+        self.fields = tuple(fields)
+        self.embeds = tuple(embeds)
+
+    def parse(self, args):
+        """Parses the fields and embed arguments of a request.
+
+        Parameters
+        -------
+        args: MultiDict
+            the arguments of the request.
+
+        Returns
+        -------
+        fields: set or None
+            the columns to return, with the id. None for all of them.
+        embed: set or None
+            the relationships to embed. None for all of them.
+
+        Raises
+        -------
+        400: bad request
+            if a field or a relationship is unknown.
+        """
+        fields = self._parse_list(args, 'fields', self.fields)
+        if fields is not None:
+            fields.add('id')
+
+        embed = self._parse_list(args, 'embed', self.embeds + ('none',))
+        if embed is not None:
+            if 'none' in embed and len(embed) > 1:
+                abort(400, 'Invalid embed: none cannot be combined')
+            embed.discard('none')
+
+        return fields, embed
+
+    @staticmethod
+    def loaded(fields, *columns):
+        """Names of the columns to select to return the fields.
+
+        The given columns, e.g. the sort column which the Paginator reads
+        to build the cursors, are added to the fields.
+        """
+        if fields is None:
+            return None
+        return fields | {
+            column.key for column in columns if column is not None}
+
+    @staticmethod
+    def _parse_list(args, name, choices):
+        value = args.get(name)
+        if value is None or value == '':
+            return None
+
+        values = {item.strip() for item in value.split(',') if item.strip()}
+        unknown = values.difference(choices)
+        if unknown or not values:
+            abort(400, f'Invalid {name}: should be among the following: '
+                       f'{", ".join(choices)}')
+        return values
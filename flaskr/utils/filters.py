@@ -0,0 +1,134 @@
+"""
+Module to filter and sort the list endpoints from the request arguments.
+"""
+
+import sys
+from datetime import datetime
+
+from flask import abort
+from sqlalchemy import and_
+
+
+def int_argument(value):
+    """Parses an integer argument."""
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError('should be an integer') from None
+
+
+def date_argument(value):
+    """Parses a date argument, in the format DD-MM-YYYY or YYYY-MM-DD."""
+    for date_format in ('%d-%m-%Y', '%Y-%m-%d'):
+        try:
+            return datetime.strptime(value, date_format).date()
+        except ValueError:
+            pass
+    raise ValueError('should be in the format DD-MM-YYYY')
+
+
+def enum_argument(enum_class):
+    """Parser of an argument holding the name or the value of an enum."""
+    def parse(value):
+        if value in enum_class.__members__:
+            return enum_class[value]
+        try:
+            return enum_class(value)
+        except ValueError:
+            raise ValueError(
+                'should be one of the following: '
+                f'{", ".join(member.value for member in enum_class)}'
+            ) from None
+    return parse
+
+
+def prefix_predicate(column, prefix):
+    """Predicate of the values starting with a prefix.
+
+    Compiles to a range `prefix <= column < next prefix`, which an index
+    on the column can serve, unlike `LIKE 'prefix%'` in SQLite. The
+    comparison is case sensitive.
+
+    The next prefix increments the last character which is not the
+    largest code point, U+10FFFF: the values starting with "a\U0010ffff"
+    are below "b". Without such a character there is no upper bound.
+    """
+    stem = prefix.rstrip(chr(sys.maxunicode))
+    if not stem:
+        return column >= prefix
+    upper_bound = stem[:-1] + chr(ord(stem[-1]) + 1)
+    return and_(column >= prefix, column < upper_bound)
+
+
+class QueryFilter(object):
+    """Filters and sorting of a list endpoint, from the request arguments.
+
+    Each filter argument is parsed, then turned into an SQL predicate. The
+    `sort` argument picks the column to order by (before the id, see
+    Paginator), and `order` is "asc" (the default) or "desc".
+
+    Parameters
+    -------
+    filters: dict
+        by argument name, a (parse, predicate) tuple of functions: parse
+        gets the argument's value, raising a ValueError if it is invalid,
+        and predicate gets the parsed value and returns an SQL predicate.
+    sort_columns: dict
+        the columns to order by, by value of the `sort` argument. The
+        first one is the default, None orders by id only.
+
+    EXAMPLE:
+        actor_filter = QueryFilter(
+            filters={'age_min': (int_argument, lambda age: Actor.age >= age)},
+            sort_columns={'id': None, 'age': Actor.age},
+        )
+    """
+
+    def __init__(self, filters, sort_columns):
+        self.filters = filters
+        self.sort_columns = sort_columns
+
+    def apply(self, query, args):
+        """Filters the query with the request arguments.
+
+        Parameters
+        -------
+        query: SQLAlchemy query
+            the query of the model to filter.
+        args: MultiDict
+            the arguments of the request.
+
+        Returns
+        -------
+        query: SQLAlchemy query
+            the filtered query.
+        sort_column: model attribute or None
+            the column to order by.
+        descending: bool
+            True if the items are sorted in descending order.
+
+        Raises
+        -------
+        400: bad request
+            if an argument is invalid.
+        """
+        for name, (parse, predicate) in self.filters.items():
+            value = args.get(name)
+            if value is None or value == '':
+                continue
+            try:
+                value = parse(value)
+            except ValueError as e:
+                abort(400, f"Invalid {name}: {e}")
+            query = query.filter(predicate(value))
+
+        sort = args.get('sort') or next(iter(self.sort_columns))
+        if sort not in self.sort_columns:
+            abort(400, 'Invalid sort: should be one of the following: '
+                       f'{", ".join(self.sort_columns)}')
+
+        order = args.get('order') or 'asc'
+        if order not in ('asc', 'desc'):
+            abort(400, 'Invalid order: should be asc or desc')
+
+        return query, self.sort_columns[sort], order == 'desc'
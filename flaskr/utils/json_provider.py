@@ -0,0 +1,114 @@
+"""
+Module of the JSON providers serializing the API responses.
+
+Flask's DefaultJSONProvider looks up the deprecated encoder settings and
+builds a new json.JSONEncoder on every call, then formats each date with
+a Python fallback. The providers here skip that work:
+
+- StdlibJSONProvider reuses its encoders, still with the stdlib `json`.
+- OrjsonJSONProvider serializes with orjson, when it is installed.
+
+Both return the same documents as Flask's provider: dates in the HTTP
+date format, and enums, e.g. GenderEnum and MovieGenreEnum, by their
+value.
+"""
+
+import enum
+import json
+from datetime import date, datetime
+from functools import lru_cache
+
+from flask.json.provider import DefaultJSONProvider
+from werkzeug.http import http_date
+
+from .server_timing import timed
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+@lru_cache(maxsize=4096)
+def _format_date(value):
+    """Formats a date in the HTTP date format, like Flask does."""
+    return http_date(value)
+
+
+def _default(o):
+    """Serializes the types the encoders do not know."""
+    if isinstance(o, enum.Enum):
+        return o.value
+    if isinstance(o, date) and not isinstance(o, datetime):
+        return _format_date(o)
+    return DefaultJSONProvider.default(o)
+
+
+class StdlibJSONProvider(DefaultJSONProvider):
+    """JSON provider with the stdlib `json`, reusing its encoders.
+
+    Calls with other arguments than the ones of `response` fall back to
+    DefaultJSONProvider.dumps.
+    """
+
+    default = staticmethod(_default)
+
+    def __init__(self, app):
+        super().__init__(app)
+        self._encoders = {}
+
+    def response(self, *args, **kwargs):
+        with timed("serialize"):
+            return super().response(*args, **kwargs)
+
+    def dumps(self, obj, **kwargs):
+        separators = kwargs.pop("separators", None)
+        if kwargs:
+            if separators is not None:
+                kwargs["separators"] = separators
+            return super().dumps(obj, **kwargs)
+
+        # ensure_ascii and sort_keys can be changed on the provider.
+        key = (self.ensure_ascii, self.sort_keys, separators)
+        encoder = self._encoders.get(key)
+        if encoder is None:
+            encoder = self._encoders[key] = json.JSONEncoder(
+                default=self.default, ensure_ascii=self.ensure_ascii,
+                sort_keys=self.sort_keys, separators=separators)
+        return encoder.encode(obj)
+
+
+class OrjsonJSONProvider(StdlibJSONProvider):
+    """JSON provider with orjson.
+
+    orjson serializes enums by their value itself, the dates are passed
+    through to `default` to keep the HTTP date format. It never escapes
+    non-ASCII characters, `ensure_ascii` is ignored.
+    """
+
+    def dumps(self, obj, **kwargs):
+        if not kwargs.keys() <= {"indent", "separators"}:
+            return super().dumps(obj, **kwargs)
+
+        option = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if kwargs.get("indent"):
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=self.default, option=option).decode()
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+
+# JSON providers, by the name given in the JSON_PROVIDER config. "fast" is
+# orjson when it is installed, the tuned stdlib provider otherwise.
+JSON_PROVIDERS = {
+    "fast": StdlibJSONProvider,
+    "stdlib": StdlibJSONProvider,
+    "flask": DefaultJSONProvider,
+}
+if orjson is not None:
+    JSON_PROVIDERS["fast"] = JSON_PROVIDERS["orjson"] = OrjsonJSONProvider
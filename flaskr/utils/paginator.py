@@ -2,45 +2,117 @@
 Paginator module
 """
 
+import base64
+import binascii
+import enum
+import json
+from datetime import date
+from functools import cached_property
 from math import ceil
+from urllib.parse import urlencode
 
-from flaskr.constants import ITEM_PER_PAGE
+from flask import abort, current_app, has_app_context
+from sqlalchemy import and_, inspect, or_
+
+from flaskr.constants import ITEM_PER_PAGE, MAX_PER_PAGE
+
+from .server_timing import timed
 
 
 class Paginator(object):
     """Paginator class to handle pagination.
 
+    Only the rows of the requested page are fetched (LIMIT/OFFSET) and
+    formatted, the total number of items comes from a separate COUNT query.
+
+    When the request holds a `cursor` argument the page is fetched by
+    seeking on the ordering key `(sort_column, id)` instead of skipping
+    rows with an OFFSET, so deep pages cost as much as the first one.
+    An empty cursor starts from the first row. A cursor is only valid for
+    the ordering it was built with.
+
+    The `per_page` argument of the request sets the number of items per
+    page, capped by the MAX_PER_PAGE config. The ITEM_PER_PAGE config is
+    the default. Outside of an app context, e.g. in the benchmarks, the
+    constants of the same names are used.
+
     Parameters:
     ------
+        query : SQLAlchemy query
+            selection of items based on a db model, it is ordered by the
+            paginator
         request object
             request object received from the client
-        items : db Models
-            selection of items based on db models
+        sort_column : model attribute, optional
+            a non nullable column to order by before the id
+        descending : bool
+            if True, items are returned in descending order
+        format_kwargs : dict, optional
+            keyword arguments of the items' format method
     """
 
-    def __init__(self, items, request):
-        self.items = items
+    def __init__(self, query, request, sort_column=None, descending=False,
+                 format_kwargs=None):
         self.request = request
-        self.page = request.args.get("page", 1, type=int)
-        self.pages = ceil(len(items) / ITEM_PER_PAGE)
+        self.sort_column = sort_column
+        self.descending = descending
+        self.format_kwargs = format_kwargs or {}
+        self.per_page = self._get_per_page()
+
+        model = query.column_descriptions[0]["entity"]
+        self.id_column = getattr(model, inspect(model).primary_key[0].key)
+
+        self.base_query = query
+        self.query = query.order_by(*self._ordering())
+
+        self.cursor = request.args.get("cursor", None, type=str)
+        self.cursor_key = (
+            self._decode_cursor(self.cursor) if self.cursor else None
+        )
+        self.page = (
+            None if self.cursor is not None
+            else request.args.get("page", 1, type=int)
+        )
+        self.next_cursor = None
+
+    @cached_property
+    def total(self):
+        """Total number of items, from a COUNT query."""
+        return self.base_query.order_by(None).count()
+
+    @cached_property
+    def pages(self):
+        """Total number of pages."""
+        return ceil(self.total / self.per_page)
 
     def get_next_page_items(self):
         """Paginate items for the next page.
 
+        Also sets `next_cursor` if there are items after this page.
+
         Returns
         -------
         formatted_items: list
             items for the next page
         """
-        if not self.items:
+        if self.cursor is not None:
+            query = self.query
+            if self.cursor_key is not None:
+                query = query.filter(self._seek(*self.cursor_key))
+        elif self.page < 1:
             return []
+        else:
+            start = (self.page - 1) * self.per_page
+            query = self.query.offset(start)
 
-        start = (self.page - 1) * ITEM_PER_PAGE
-        end = start + ITEM_PER_PAGE
+        # One extra row tells if there is a page after this one.
+        items = query.limit(self.per_page + 1).all()
+        if len(items) > self.per_page:
+            items = items[:self.per_page]
+            self.next_cursor = self._encode_cursor(items[-1])
 
-        formatted_items = [item.format() for item in self.items]
-
-        return formatted_items[start:end]
+        with timed("format"):
+            return [item.format(**self.format_kwargs) for item in items]
 
     @property
     def next_page_number(self):
@@ -49,8 +121,10 @@ class Paginator(object):
         Returns
         -------
         next_page: int
-            next page number
+            next page number, None in cursor mode
         """
+        if self.page is None:
+            return None
         return self.page + 1 if self.page < self.pages else None
 
     @property
@@ -62,6 +136,114 @@ class Paginator(object):
         next_page_url: str
             next page url
         """
+        if self.cursor is not None:
+            if self.next_cursor is None:
+                return None
+            return self._url_with("cursor", self.next_cursor)
         if self.next_page_number is None:
             return None
-        return f"{self.request.base_url}?page={self.next_page_number}"
+        return self._url_with("page", self.next_page_number)
+
+    def _get_per_page(self):
+        """Gets the number of items per page of the request.
+
+        Raises
+        -------
+        400: 'Invalid per_page'
+            if per_page is not a positive integer.
+        """
+        config = current_app.config if has_app_context() else {}
+        per_page = self.request.args.get("per_page", None, type=str)
+        if per_page is None or per_page == "":
+            return config.get("ITEM_PER_PAGE") or ITEM_PER_PAGE
+
+        try:
+            per_page = int(per_page)
+        except ValueError:
+            per_page = 0
+        if per_page < 1:
+            abort(400, "Invalid per_page: should be a positive integer")
+        return min(per_page, config.get("MAX_PER_PAGE") or MAX_PER_PAGE)
+
+    def _url_with(self, name, value):
+        """Url of the request with another page or cursor argument.
+
+        The other arguments, e.g. the filters, are kept.
+        """
+        args = [
+            (key, arg) for key, arg in self.request.args.items(multi=True)
+            if key not in ("page", "cursor")
+        ]
+        args.append((name, value))
+        return f"{self.request.base_url}?{urlencode(args)}"
+
+    def _ordering(self):
+        """Columns of the ordering key, with their direction."""
+        columns = [self.id_column]
+        if self.sort_column is not None:
+            columns.insert(0, self.sort_column)
+        if self.descending:
+            return [column.desc() for column in columns]
+        return [column.asc() for column in columns]
+
+    def _seek(self, value, last_id):
+        """Filter on the rows located after the given ordering key."""
+        if self.descending:
+            id_after = self.id_column < last_id
+        else:
+            id_after = self.id_column > last_id
+
+        if self.sort_column is None:
+            return id_after
+
+        if self.descending:
+            sort_after = self.sort_column < value
+        else:
+            sort_after = self.sort_column > value
+        return or_(sort_after, and_(self.sort_column == value, id_after))
+
+    @property
+    def _sort_key(self):
+        """Name of the ordering, prefixed with "-" when descending."""
+        key = None if self.sort_column is None else self.sort_column.key
+        if self.descending:
+            return f"-{key or self.id_column.key}"
+        return key
+
+    def _encode_cursor(self, item):
+        """Encodes the ordering key of an item into an opaque cursor."""
+        value = None
+        if self.sort_column is not None:
+            value = getattr(item, self.sort_column.key)
+            if isinstance(value, enum.Enum):
+                value = value.name
+            elif isinstance(value, date):
+                value = value.isoformat()
+
+        key = [self._sort_key, value, getattr(item, self.id_column.key)]
+        raw = json.dumps(key, separators=(",", ":")).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+    def _decode_cursor(self, cursor):
+        """Decodes a cursor into an ordering key (value, id).
+
+        Raises
+        -------
+        400: 'Invalid cursor'
+            if the cursor is malformed or was built for another ordering.
+        """
+        try:
+            raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+            sort_key, value, last_id = json.loads(raw)
+            if sort_key != self._sort_key or not isinstance(last_id, int):
+                raise ValueError("cursor does not match the ordering")
+            if self.sort_column is not None:
+                python_type = self.sort_column.type.python_type
+                if issubclass(python_type, enum.Enum):
+                    value = python_type[value]
+                elif issubclass(python_type, date):
+                    value = python_type.fromisoformat(value)
+        except (binascii.Error, KeyError, TypeError, ValueError):
+            abort(400, "Invalid cursor")
+
+        return value, last_id
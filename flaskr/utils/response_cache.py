@@ -0,0 +1,155 @@
+"""
+In process cache of the responses of read endpoints.
+"""
+
+import threading
+from collections import OrderedDict, defaultdict
+from functools import wraps
+
+from flask import current_app, g, make_response, request
+
+
+class ResponseCache(object):
+    """LRU cache of responses, invalidated by the tables they depend on.
+
+    Responses are cached by url and query string, and by the versions of
+    the tables when the view is decorated with conditional, so that a
+    response read from a lagging replica is not served once the replica
+    caught up. Each entry is tagged
+    with the tables it was read from, and writing to one of those tables
+    (see ModelCrudDbHelper) evicts the entry. The cache holds at most
+    RESPONSE_CACHE_SIZE entries, 0 disables it.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._entries = OrderedDict()
+        self._keys_by_table = defaultdict(set)
+        self._generations = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def cached(self, model):
+        """Decorator caching the successful responses of a view.
+
+        Parameters
+        -------
+        model: db Model
+            the model the view reads, the cached responses are invalidated
+            when its tables or the tables of its relationships are written.
+        """
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                maxsize = current_app.config["RESPONSE_CACHE_SIZE"]
+                if not maxsize:
+                    return func(*args, **kwargs)
+
+                versions = g.get("table_versions")
+                key = (
+                    request.base_url,
+                    tuple(sorted(request.args.items(multi=True))),
+                    tuple(sorted(versions.items())) if versions else None,
+                )
+                entry = self.get(key)
+                if entry is not None:
+                    body, status, mimetype = entry
+                    return current_app.response_class(
+                        body, status=status, mimetype=mimetype)
+
+                tables = model.read_tables()
+                generations = self.generations(tables)
+                response = make_response(func(*args, **kwargs))
+                if response.status_code == 200:
+                    self.set(
+                        key, tables, generations, maxsize,
+                        (response.get_data(), 200, response.mimetype),
+                    )
+                return response
+
+            return wrapper
+        return decorator
+
+    def get(self, key):
+        """Gets a cached entry, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def generations(self, tables):
+        """Gets the write generations of the tables."""
+        with self._lock:
+            return self._get_generations(tables)
+
+    def set(self, key, tables, generations, maxsize, value):
+        """Caches an entry computed from the given tables.
+
+        The entry is dropped if one of the tables was written since its
+        generation was read, since the value might predate the write.
+        """
+        with self._lock:
+            if self._get_generations(tables) != generations:
+                return
+            self._entries[key] = (tables, value)
+            self._entries.move_to_end(key)
+            for table in tables:
+                self._keys_by_table[table].add(key)
+
+            while len(self._entries) > maxsize:
+                evicted_key, (evicted_tables, _) = self._entries.popitem(
+                    last=False)
+                self._forget(evicted_key, evicted_tables)
+                self.evictions += 1
+
+    def invalidate(self, tables):
+        """Evicts the entries depending on any of the tables."""
+        with self._lock:
+            for table in tables:
+                self._generations[table] += 1
+                for key in list(self._keys_by_table.pop(table, ())):
+                    entry = self._entries.pop(key, None)
+                    if entry is not None:
+                        self._forget(key, entry[0])
+                        self.invalidations += 1
+
+    def clear(self):
+        """Drops all the entries and resets the counters."""
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_table.clear()
+            self.hits = self.misses = 0
+            self.evictions = self.invalidations = 0
+
+    def stats(self):
+        """Gets the size and the counters of the cache."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+            }
+
+    def _get_generations(self, tables):
+        return tuple(self._generations[table] for table in sorted(tables))
+
+    def _forget(self, key, tables):
+        for table in tables:
+            keys = self._keys_by_table.get(table)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys_by_table[table]
+
+
+response_cache = ResponseCache()
@@ -0,0 +1,123 @@
+"""
+Module of the Server-Timing instrumentation of the requests.
+
+When the SERVER_TIMING config is set, the time spent in each phase of a
+request is added to a `Server-Timing` response header, e.g.
+
+    Server-Timing: auth;dur=0.41, db;dur=2.87, format;dur=0.95,
+        serialize;dur=0.12, total;dur=5.02
+
+and logged by the "flaskr.utils.server_timing" logger. The phases are:
+
+- auth: the verification of the token and the permissions, see
+  requires_auth.
+- db: the execution of the SQL statements, see
+  flaskr.data.db.QueryStats.
+- format: the formatting of the items by the models, which includes the
+  lazy loads of their relationships.
+- serialize: the serialization of the JSON response, with the providers
+  of flaskr.utils.json_provider.
+- total: the whole request, from before_request to after_request.
+
+The phases may overlap, e.g. db with format. When the config is not set
+no hook is registered, and `timed` returns a no-op context manager.
+"""
+
+import logging
+from contextlib import nullcontext
+from time import perf_counter
+
+from flask import g, has_app_context, request
+
+logger = logging.getLogger(__name__)
+
+# Context manager of the blocks which are not timed.
+_NOT_TIMED = nullcontext()
+
+
+class _Timer(object):
+    """Adds the duration of a block to a phase of the request."""
+
+    __slots__ = ("timings", "name", "start")
+
+    def __init__(self, timings, name):
+        self.timings = timings
+        self.name = name
+
+    def __enter__(self):
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        add_timing(self.timings, self.name, perf_counter() - self.start)
+        return False
+
+
+def add_timing(timings, name, duration):
+    """Adds a duration, in seconds, to a phase of the timings."""
+    timings[name] = timings.get(name, 0.0) + duration
+
+
+def get_timings():
+    """Timings of the current request, in seconds by phase.
+
+    Returns None outside of a request, or if the request is not timed.
+    """
+    if not has_app_context():
+        return None
+    return g.get("server_timing")
+
+
+def timed(name):
+    """Context manager adding the time spent in its block to a phase.
+
+    Parameters
+    -------
+    name: str
+        the name of the phase, e.g. "auth".
+
+    EXAMPLE:
+        with timed("format"):
+            items = [item.format() for item in items]
+    """
+    timings = get_timings()
+    if timings is None:
+        return _NOT_TIMED
+    return _Timer(timings, name)
+
+
+def format_server_timing(timings):
+    """Formats the timings as a Server-Timing header value, in ms."""
+    return ", ".join(
+        f"{name};dur={duration * 1000:.2f}"
+        for name, duration in timings.items())
+
+
+def _start_timing():
+    g.server_timing = {}
+    g.server_timing_start = perf_counter()
+
+
+def _add_server_timing(response):
+    timings = g.pop("server_timing", None)
+    if timings is None:
+        return response
+
+    stats = g.get("query_stats")
+    if stats is not None and stats.count:
+        timings["db"] = stats.duration
+    timings["total"] = perf_counter() - g.pop("server_timing_start")
+    value = format_server_timing(timings)
+    response.headers["Server-Timing"] = value
+    logger.info("%s %s %s: %s", request.method, request.full_path,
+                response.status_code, value)
+    return response
+
+
+def init_server_timing(app):
+    """Times the requests of the app, if its SERVER_TIMING config is set."""
+    if not app.config.get("SERVER_TIMING"):
+        return
+
+    app.before_request(_start_timing)
+    app.after_request(_add_server_timing)
@@ -0,0 +1,35 @@
+"""
+Gunicorn settings, read from the working directory.
+
+The app is created once in the master, then the workers are forked from
+it and share its imported modules. Each worker opens its own database
+connections, see flaskr.data.db.dispose_engines.
+
+The workers write their Prometheus metrics to PROMETHEUS_MULTIPROC_DIR,
+which /metrics aggregates, see flaskr.routes.metrics.
+"""
+
+import os
+import shutil
+import tempfile
+
+preload_app = True
+
+# Set before the app, and prometheus_client, are loaded.
+os.environ.setdefault(
+    "PROMETHEUS_MULTIPROC_DIR",
+    os.path.join(tempfile.gettempdir(), "flaskr-metrics"))
+
+
+def on_starting(server):
+    """Clears the metrics left by a previous run."""
+    path = os.environ["PROMETHEUS_MULTIPROC_DIR"]
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path)
+
+
+def child_exit(server, worker):
+    """Drops the live gauges of a worker which exited."""
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,94 @@
+"""full-text search index of the movies and actors
+
+An FTS5 table kept in sync with the movie and actor tables by triggers,
+see flaskr/data/search.py. Only created on SQLite.
+
+Revision ID: 6b1f0c9e2a7d
+Revises: d024b1d0db27
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6b1f0c9e2a7d'
+down_revision = 'd024b1d0db27'
+branch_labels = None
+depends_on = None
+
+# Copied from flaskr/data/search.py, the revision must not change with it.
+SEARCH_INDEX_DDL = (
+    """
+    CREATE VIRTUAL TABLE search_index USING fts5(
+        kind UNINDEXED, title, description,
+        tokenize = 'unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER search_index_movie_insert
+    AFTER INSERT ON movie BEGIN
+        INSERT INTO search_index (rowid, kind, title, description)
+        VALUES (new.id * 2, 'movie', new.title, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER search_index_movie_update
+    AFTER UPDATE OF title, description ON movie BEGIN
+        UPDATE search_index
+        SET title = new.title, description = new.description
+        WHERE rowid = old.id * 2;
+    END
+    """,
+    """
+    CREATE TRIGGER search_index_movie_delete
+    AFTER DELETE ON movie BEGIN
+        DELETE FROM search_index WHERE rowid = old.id * 2;
+    END
+    """,
+    """
+    CREATE TRIGGER search_index_actor_insert
+    AFTER INSERT ON actor BEGIN
+        INSERT INTO search_index (rowid, kind, title)
+        VALUES (new.id * 2 + 1, 'actor', new.name);
+    END
+    """,
+    """
+    CREATE TRIGGER search_index_actor_update
+    AFTER UPDATE OF name ON actor BEGIN
+        UPDATE search_index SET title = new.name
+        WHERE rowid = old.id * 2 + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER search_index_actor_delete
+    AFTER DELETE ON actor BEGIN
+        DELETE FROM search_index WHERE rowid = old.id * 2 + 1;
+    END
+    """,
+    """
+    INSERT INTO search_index (rowid, kind, title, description)
+    SELECT id * 2, 'movie', title, description FROM movie
+    """,
+    """
+    INSERT INTO search_index (rowid, kind, title)
+    SELECT id * 2 + 1, 'actor', name FROM actor
+    """,
+)
+
+
+def upgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    for statement in SEARCH_INDEX_DDL:
+        op.execute(sa.text(statement))
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    for trigger in ('movie_insert', 'movie_update', 'movie_delete',
+                    'actor_insert', 'actor_update', 'actor_delete'):
+        op.execute(f'DROP TRIGGER search_index_{trigger}')
+    op.execute('DROP TABLE search_index')
@@ -0,0 +1,72 @@
+"""initial schema
+
+The tables as created by db.create_all() before the migrations existed.
+The revision id is the one stamped in the shipped databases
+(flaskr/data/*.sqlite3), which have these tables, so `flask db upgrade`
+upgrades them. Another database created that way can be stamped with
+this revision, see the README.
+
+Revision ID: 90dff70c4687
+Revises:
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '90dff70c4687'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+MOVIE_GENRES = (
+    'Action', 'Adventure', 'Animated', 'Biography', 'Comedy', 'Crime',
+    'Dance', 'Disaster', 'Documentary', 'Drama', 'Erotic', 'Family',
+    'Fantasy', 'FoundFootage', 'Historical', 'Horror', 'Independent',
+    'Legal', 'LiveAction', 'MartialArts', 'Musical', 'Mystery', 'Noir',
+    'Performance', 'Political', 'Romance', 'Satire', 'ScienceFiction',
+    'Short', 'Silent', 'Slasher', 'Sports', 'Spy', 'Superhero',
+    'Supernatural', 'Suspense', 'Teen', 'Thriller', 'War', 'Western',
+)
+
+
+def upgrade():
+    op.create_table(
+        'actor',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('age', sa.Integer(), nullable=False),
+        sa.Column(
+            'gender', sa.Enum('M', 'F', name='genderenum'), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table(
+        'movie',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('title', sa.String(), nullable=False),
+        sa.Column('release_date', sa.Date(), nullable=False),
+        sa.Column(
+            'genre', sa.Enum(*MOVIE_GENRES, name='moviegenreenum'),
+            nullable=True),
+        sa.Column('description', sa.String(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('title')
+    )
+    op.create_table(
+        'association',
+        sa.Column('movie_id', sa.Integer(), nullable=False),
+        sa.Column('actor_id', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['actor_id'], ['actor.id'], ),
+        sa.ForeignKeyConstraint(['movie_id'], ['movie.id'], ),
+        sa.PrimaryKeyConstraint('movie_id', 'actor_id')
+    )
+
+
+def downgrade():
+    op.drop_table('association')
+    op.drop_table('movie')
+    op.drop_table('actor')
+    sa.Enum(name='moviegenreenum').drop(op.get_bind(), checkfirst=True)
+    sa.Enum(name='genderenum').drop(op.get_bind(), checkfirst=True)
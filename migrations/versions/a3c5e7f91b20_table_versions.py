@@ -0,0 +1,36 @@
+"""table versions
+
+The versions of the tables, bumped on each write and used by the ETags
+and the response cache, see flaskr.data.models.TableVersion.
+
+Revision ID: a3c5e7f91b20
+Revises: 90dff70c4687
+Create Date: 2026-10-18 10:15:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3c5e7f91b20'
+down_revision = '90dff70c4687'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    table_version = op.create_table(
+        'table_version',
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('name')
+    )
+    op.bulk_insert(table_version, [
+        {'name': name, 'version': 0}
+        for name in ('actor', 'association', 'movie')
+    ])
+
+
+def downgrade():
+    op.drop_table('table_version')
@@ -0,0 +1,37 @@
+"""index the filter and sort columns
+
+The association's primary key (movie_id, actor_id) cannot serve the
+lookups by actor_id alone, done to load Actor.movies.
+
+Revision ID: d024b1d0db27
+Revises: a3c5e7f91b20
+Create Date: 2026-10-18 10:30:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'd024b1d0db27'
+down_revision = 'a3c5e7f91b20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        'ix_association_actor_id', 'association', ['actor_id'], unique=False)
+    op.create_index(
+        op.f('ix_movie_release_date'), 'movie', ['release_date'],
+        unique=False)
+    op.create_index(op.f('ix_movie_genre'), 'movie', ['genre'], unique=False)
+    op.create_index(op.f('ix_actor_name'), 'actor', ['name'], unique=False)
+    op.create_index(op.f('ix_actor_age'), 'actor', ['age'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_actor_age'), table_name='actor')
+    op.drop_index(op.f('ix_actor_name'), table_name='actor')
+    op.drop_index(op.f('ix_movie_genre'), table_name='movie')
+    op.drop_index(op.f('ix_movie_release_date'), table_name='movie')
+    op.drop_index('ix_association_actor_id', table_name='association')
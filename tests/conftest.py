@@ -3,8 +3,19 @@ Module for client test.
 """
 
 import pytest
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
 
 from flaskr import create_app
+from flaskr.data.db import init_db
+
+
+@pytest.fixture(scope="session", autouse=True)
+def database():
+    """Creates the schema of the test database, once per test session."""
+    app = create_app(test_config=True)
+    with app.app_context():
+        init_db()
 
 
 @pytest.fixture
@@ -12,3 +23,64 @@ def client():
     app = create_app(test_config=True)
     with app.test_client() as client:
         yield client
+
+
+class QueryCounter(object):
+    """Context manager recording the SQL statements executed in its block.
+
+    EXAMPLE:
+        with QueryCounter() as counter:
+            client.get(url)
+        assert counter.count == 3
+    """
+
+    def __init__(self):
+        self.statements = []
+
+    def __enter__(self):
+        event.listen(Engine, "before_cursor_execute", self._record)
+        return self
+
+    def __exit__(self, *exc_info):
+        event.remove(Engine, "before_cursor_execute", self._record)
+
+    def _record(self, conn, cursor, statement, parameters, context, many):
+        self.statements.append(statement)
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+
+class QueryBudget(QueryCounter):
+    """Context manager failing the test when its block executes more SQL
+    statements than its budget.
+
+    EXAMPLE:
+        with QueryBudget(3):
+            client.get(url)
+    """
+
+    def __init__(self, budget):
+        super().__init__()
+        self.budget = budget
+
+    def __exit__(self, *exc_info):
+        super().__exit__(*exc_info)
+        if exc_info[0] is None and self.count > self.budget:
+            pytest.fail(
+                f"{self.count} SQL statements executed, over the budget of "
+                f"{self.budget}:\n" + "\n".join(self.statements),
+                pytrace=False)
+
+
+@pytest.fixture
+def count_queries():
+    """Fixture to count the SQL statements executed by a block of code."""
+    return QueryCounter
+
+
+@pytest.fixture
+def query_budget():
+    """Fixture to cap the SQL statements executed by a block of code."""
+    return QueryBudget
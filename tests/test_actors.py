@@ -4,8 +4,11 @@ Test suite for the actors.
 
 import json
 import flaskr as flaskr
+from werkzeug.datastructures import MultiDict
 
-from flaskr.data.models import Actor
+from flaskr.data.db import db
+from flaskr.data.models import Actor, Movie
+from flaskr.routes.actors import actor_filter
 
 
 class TestActors:
@@ -40,9 +43,15 @@ class TestActors:
         """
         Clean up the database after each test.
         """
+        movies = Movie.query.all()
+        for movie in movies:
+            movie.delete()
+
         actors = Actor.query.all()
         for actor in actors:
             actor.delete()
+        # Forget the rows deleted by the requests, their ids are reused.
+        db.session.remove()
 
     def test_get_actor_without_auth_return_fails_401(self, client):
         response = client.get(self.actor_url)
@@ -164,3 +173,232 @@ class TestActors:
         assert response.status_code == 200
         assert response.json["success"] is True
         assert response.json["delete"] == self.actor.id
+
+    def test_get_actors_costs_constant_queries(
+        self, client, mocker, count_queries
+    ):
+        mocker.patch("flaskr.auth.auth.get_token_auth_header", return_value="")
+        mocker.patch(
+            "flaskr.auth.auth.verify_decode_jwt",
+            return_value={"permissions": ["get:actors"]}
+        )
+
+        actors = [self.actor]
+        for i in range(9):
+            actor = Actor(name=f"james{'abcdefghi'[i]}", age=20, gender="M")
+            actor.insert()
+            actors.append(actor)
+        movie = Movie(title="Die Hard", release_date="09-12-1988",
+                      genre="Action", actors=actors)
+        movie.insert()
+
+        statements = []
+        for per_page in (1, 5, 10):
+            with count_queries() as counter:
+                response = client.get(f"{self.actor_url}?per_page={per_page}")
+            assert len(response.json["actors"]) == per_page
+            assert response.json["per_page"] == per_page
+            statements.append(counter.count)
+
+        assert statements[0] == statements[1] == statements[2]
+
+    def test_actor_endpoints_stay_within_query_budget(
+        self, client, mocker, query_budget
+    ):
+        mocker.patch("flaskr.auth.auth.get_token_auth_header", return_value="")
+        mocker.patch(
+            "flaskr.auth.auth.verify_decode_jwt",
+            return_value={"permissions": ["get:actors"]}
+        )
+
+        actors = [self.actor]
+        for i in range(9):
+            actor = Actor(name=f"james{'abcdefghi'[i]}", age=20, gender="M")
+            actor.insert()
+            actors.append(actor)
+        for i in range(10):
+            movie = Movie(title=f"Die Hard {i}", release_date="09-12-1988",
+                          genre="Action", actors=actors)
+            movie.insert()
+
+        # Table versions, page, movies of the page, COUNT.
+        with query_budget(4):
+            client.get(f"{self.actor_url}?per_page=10")
+        # Table versions, actor, movies.
+        with query_budget(3):
+            client.get(self.actor_detail_url)
+
+    def test_bulk_create_actors_success(self, client, mocker, count_queries):
+        mocker.patch("flaskr.auth.auth.get_token_auth_header", return_value="")
+        mocker.patch(
+            "flaskr.auth.auth.verify_decode_jwt",
+            return_value={"permissions": ["create:actor"]},
+        )
+        mocker.patch("flaskr.data.models.BULK_INSERT_CHUNK_SIZE", 2)
+
+        data = [{"name": name, "age": 30, "gender": "F"}
+                for name in ("jane", "julia", "jessica", "joan", "judy")]
+        with count_queries() as counter:
+            response = client.post(
+                f"{self.actor_url}/bulk", data=json.dumps(data),
+                headers=self.headers,
+            )
+
+        assert response.status_code == 201
+        assert response.json["created"] == 5
+        assert response.json["errors"] == []
+        assert Actor.query.filter_by(age=30).count() == 5
+        # One INSERT per chunk of 2 actors, not one per actor.
+        inserts = [statement for statement in counter.statements
+                   if statement.startswith("INSERT INTO actor")]
+        assert len(inserts) == 3
+
+    def test_bulk_create_actors_reports_invalid_items(self, client, mocker):
+        mocker.patch("flaskr.auth.auth.get_token_auth_header", return_value="")
+        mocker.patch(
+            "flaskr.auth.auth.verify_decode_jwt",
+            return_value={"permissions": ["create:actor"]},
+        )
+
+        data = [
+            {"name": "jane", "age": 30, "gender": "F"},
+            {"name": "jo", "age": 30, "gender": "F"},
+            {"name": "julia", "age": "old", "gender": "F"},
+            {"name": "judy", "age": 30},
+            "joan",
+        ]
+        response = client.post(
+            f"{self.actor_url}/bulk", data=json.dumps(data),
+            headers=self.headers,
+        )
+
+        assert response.status_code == 201
+        assert response.json["created"] == 1
+        errors = response.json["errors"]
+        assert [error["index"] for error in errors] == [1, 2, 3, 4]
+        assert "at least 3 characters" in errors[0]["message"]
+        assert "integer" in errors[1]["message"]
+        assert "must contain name and age and gender" in errors[2]["message"]
+
+    def test_bulk_create_actors_without_valid_item_fails_400(
+        self, client, mocker
+    ):
+        mocker.patch("flaskr.auth.auth.get_token_auth_header", return_value="")
+        mocker.patch(
+            "flaskr.auth.auth.verify_decode_jwt",
+            return_value={"permissions": ["create:actor"]},
+        )
+
+        response = client.post(
+            f"{self.actor_url}/bulk",
+            data=json.dumps([{"name": "jo", "age": 30, "gender": "F"}]),
+            headers=self.headers,
+        )
+        assert response.status_code == 400
+        assert response.json["success"] is False
+
+        response = client.post(
+            f"{self.actor_url}/bulk",
+            data=json.dumps({"name": "jane", "age": 30, "gender": "F"}),
+            headers=self.headers,
+        )
+        assert response.status_code == 400
+
+    def test_bulk_create_actors_without_permission_fails_403(
+        self, client, mocker
+    ):
+        mocker.patch("flaskr.auth.auth.get_token_auth_header", return_value="")
+        mocker.patch(
+            "flaskr.auth.auth.verify_decode_jwt",
+            return_value={"permissions": ["get:actors"]},
+        )
+
+        response = client.post(
+            f"{self.actor_url}/bulk", data=json.dumps([]),
+            headers=self.headers,
+        )
+        assert response.status_code == 403
+
+    def test_get_actors_filtered_and_sorted(self, client, mocker):
+        mocker.patch("flaskr.auth.auth.get_token_auth_header", return_value="")
+        mocker.patch(
+            "flaskr.auth.auth.verify_decode_jwt",
+            return_value={"permissions": ["get:actors"]}
+        )
+        for name, age, gender in (
+            ("jane", 25, "F"), ("jamie", 40, "F"), ("bob", 60, "M"),
+        ):
+            Actor(name=name, age=age, gender=gender).insert()
+
+        response = client.get(f"{self.actor_url}?name_prefix=ja&sort=name")
+        names = [actor["name"] for actor in response.json["actors"]]
+        assert names == ["james", "jamie", "jane"]
+
+        response = client.get(
+            f"{self.actor_url}?gender=F&age_min=30&age_max=50")
+        assert [actor["name"] for actor in response.json["actors"]] == [
+            "jamie"]
+
+        response = client.get(
+            f"{self.actor_url}?sort=age&order=desc&per_page=2&cursor=")
+        assert [actor["age"] for actor in response.json["actors"]] == [60, 40]
+        cursor = response.json["next_cursor"]
+        response = client.get(
+            f"{self.actor_url}?sort=age&order=desc&per_page=2&cursor={cursor}")
+        assert [actor["age"] for actor in response.json["actors"]] == [25, 20]
+
+        # A cursor is only valid for the ordering it was built with.
+        response = client.get(f"{self.actor_url}?sort=age&cursor={cursor}")
+        assert response.status_code == 400
+
+    def test_name_prefix_compiles_to_an_indexable_range(self):
+        query, _, _ = actor_filter.apply(
+            Actor.query, MultiDict({"name_prefix": "ja"}))
+        sql = str(query.statement.compile(
+            compile_kwargs={"literal_binds": True}))
+
+        assert "actor.name >= 'ja' AND actor.name < 'jb'" in sql
+        assert "LIKE" not in sql
+
+    def test_name_prefix_ending_with_the_largest_code_point(
+        self, client, mocker
+    ):
+        mocker.patch("flaskr.auth.auth.get_token_auth_header", return_value="")
+        mocker.patch("flaskr.auth.auth.verify_decode_jwt",
+                     return_value={"permissions": ["get:actors"]})
+        for prefix in ("ja\U0010ffff", "\U0010ffff"):
+            response = client.get(
+                self.actor_url, query_string={"name_prefix": prefix})
+            assert response.status_code == 200
+            assert response.json["actors"] == []
+
+    def test_get_actors_with_invalid_filter_fails_400(self, client, mocker):
+        mocker.patch("flaskr.auth.auth.get_token_auth_header", return_value="")
+        mocker.patch(
+            "flaskr.auth.auth.verify_decode_jwt",
+            return_value={"permissions": ["get:actors"]}
+        )
+        for query in ("gender=X", "age_min=old", "sort=gender"):
+            response = client.get(f"{self.actor_url}?{query}")
+            assert response.status_code == 400
+
+    def test_get_actors_sparse_fieldset(self, client, mocker, count_queries):
+        mocker.patch("flaskr.auth.auth.get_token_auth_header", return_value="")
+        mocker.patch(
+            "flaskr.auth.auth.verify_decode_jwt",
+            return_value={"permissions": ["get:actors"]}
+        )
+
+        with count_queries() as counter:
+            response = client.get(f"{self.actor_url}?fields=name&embed=none")
+        assert response.json["actors"] == [
+            {"id": self.actor_id, "name": "james"}]
+        assert not any("movie" in statement
+                       for statement in counter.statements)
+
+        response = client.get(f"{self.actor_detail_url}?embed=movies")
+        assert response.json["actor"]["movies"] == []
+        assert response.json["actor"]["age"] == 20
+
+        response = client.get(f"{self.actor_detail_url}?fields=name,sex")
+        assert response.status_code == 400
@@ -0,0 +1,254 @@
+"""
+Test suite for the Auth0 authorization flow.
+"""
+
+import threading
+import time
+
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jose import jwk, jwt
+
+import flaskr as flaskr
+from flaskr.auth.auth import AuthError, verify_decode_jwt
+from flaskr.auth.caches import JWKSCache, VerifiedTokenCache
+
+DOMAIN = "tests.auth0.com"
+AUDIENCE = "casting"
+
+
+def make_signing_key(kid):
+    """Creates an RSA private key (PEM) and its public JWK."""
+    private_key = rsa.generate_private_key(
+        public_exponent=65537, key_size=2048)
+    pem = private_key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    )
+    public_jwk = jwk.construct(pem, "RS256").public_key().to_dict()
+    public_jwk.update({"kid": kid, "use": "sig"})
+    return pem, public_jwk
+
+
+def make_token(pem, kid, **claims):
+    """Signs a token for the tests domain and audience."""
+    claims = {
+        "iss": f"https://{DOMAIN}/",
+        "aud": AUDIENCE,
+        "exp": int(time.time()) + 3600,
+        "permissions": ["get:actors"],
+        **claims,
+    }
+    return jwt.encode(claims, pem, algorithm="RS256", headers={"kid": kid})
+
+
+class FakeClock(object):
+    """Clock which only moves forward when told to."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class StubFetcher(object):
+    """JWKS fetcher counting its calls, it can be made to fail."""
+
+    def __init__(self, *keys, delay=0):
+        self.keys = list(keys)
+        self.delay = delay
+        self.calls = 0
+        self.error = None
+
+    def __call__(self):
+        self.calls += 1
+        time.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return {"keys": self.keys}
+
+
+class TestJWKSCache:
+    """Test suite for the JWKS cache."""
+
+    def setup_method(self, method):
+        self.clock = FakeClock()
+        self.fetcher = StubFetcher({"kid": "a"}, {"kid": "b"})
+        self.cache = JWKSCache(
+            self.fetcher, ttl=600, min_refresh_interval=30, clock=self.clock)
+
+    def test_key_set_is_fetched_once_within_ttl(self):
+        for _ in range(10):
+            assert self.cache.get_key("a") == {"kid": "a"}
+            assert self.cache.get_key("b") == {"kid": "b"}
+            self.clock.now += 10
+        assert self.fetcher.calls == 1
+
+    def test_key_set_is_refreshed_after_ttl(self):
+        self.cache.get_key("a")
+        self.clock.now += 600
+        self.cache.get_key("a")
+        assert self.fetcher.calls == 2
+
+    def test_unknown_kid_triggers_a_refresh(self):
+        self.cache.get_key("a")
+        self.fetcher.keys.append({"kid": "rotated"})
+        self.clock.now += 30
+        assert self.cache.get_key("rotated") == {"kid": "rotated"}
+        assert self.fetcher.calls == 2
+
+    def test_unknown_kid_refreshes_are_rate_limited(self):
+        self.cache.get_key("a")
+        for kid in ("x", "y", "z"):
+            assert self.cache.get_key(kid) is None
+        assert self.fetcher.calls == 1
+
+    def test_stale_keys_are_served_when_refresh_fails(self):
+        self.cache.get_key("a")
+        self.fetcher.error = OSError("auth0 is down")
+        self.clock.now += 600
+        assert self.cache.get_key("a") == {"kid": "a"}
+        assert self.cache.get_key("a") == {"kid": "a"}
+        assert self.fetcher.calls == 2
+        assert self.cache.failures == 1
+
+    def test_fetch_error_is_raised_without_cached_keys(self):
+        self.fetcher.error = OSError("auth0 is down")
+        with pytest.raises(OSError):
+            self.cache.get_key("a")
+
+    def test_concurrent_threads_fetch_the_key_set_once(self):
+        self.fetcher.delay = 0.05
+        cache = JWKSCache(self.fetcher)
+        results = []
+
+        def get_key():
+            results.append(cache.get_key("a"))
+
+        threads = [threading.Thread(target=get_key) for _ in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert results == [{"kid": "a"}] * 20
+        assert self.fetcher.calls == 1
+
+
+class TestVerifyDecodeJwt:
+    """Test suite for the verification of tokens against a cached JWKS."""
+
+    @classmethod
+    def setup_class(cls):
+        cls.pem, cls.public_jwk = make_signing_key("key-1")
+
+    def setup_method(self, method):
+        self.fetcher = StubFetcher(self.public_jwk)
+
+    def verify(self, token):
+        return verify_decode_jwt(
+            token, DOMAIN, algorithms=["RS256"], audience=AUDIENCE)
+
+    def test_tokens_are_verified_with_one_jwks_fetch(self, mocker):
+        mocker.patch.dict(
+            "flaskr.auth.auth.jwks_caches", {DOMAIN: JWKSCache(self.fetcher)})
+
+        for _ in range(3):
+            payload = self.verify(make_token(self.pem, "key-1"))
+            assert payload["permissions"] == ["get:actors"]
+        assert self.fetcher.calls == 1
+
+    def test_token_signed_with_unknown_key_fails(self, mocker):
+        mocker.patch.dict(
+            "flaskr.auth.auth.jwks_caches", {DOMAIN: JWKSCache(self.fetcher)})
+
+        with pytest.raises(AuthError) as error:
+            self.verify(make_token(self.pem, "key-2"))
+        assert error.value.status_code == 400
+
+    def test_unreachable_jwks_fails_503(self, mocker):
+        self.fetcher.error = OSError("auth0 is down")
+        mocker.patch.dict(
+            "flaskr.auth.auth.jwks_caches", {DOMAIN: JWKSCache(self.fetcher)})
+
+        with pytest.raises(AuthError) as error:
+            self.verify(make_token(self.pem, "key-1"))
+        assert error.value.status_code == 503
+
+
+class TestVerifiedTokenCache:
+    """Test suite for the cache of verified token payloads."""
+
+    def setup_method(self, method):
+        self.clock = FakeClock()
+        self.cache = VerifiedTokenCache(maxsize=2, clock=self.clock)
+        self.payload = {"exp": self.clock.now + 60, "permissions": []}
+
+    def test_payload_is_cached_until_it_expires(self):
+        self.cache.set("token", self.payload)
+        assert self.cache.get("token") is self.payload
+        self.clock.now += 60
+        assert self.cache.get("token") is None
+        assert self.cache.stats()["size"] == 0
+
+    def test_payload_without_exp_is_not_cached(self):
+        self.cache.set("token", {"permissions": []})
+        assert self.cache.get("token") is None
+
+    def test_least_recently_used_payload_is_evicted(self):
+        self.cache.set("a", self.payload)
+        self.cache.set("b", self.payload)
+        self.cache.get("a")
+        self.cache.set("c", self.payload)
+        assert self.cache.get("b") is None
+        assert self.cache.get("a") is self.payload
+        assert self.cache.get("c") is self.payload
+
+    def test_hits_and_misses_are_counted(self):
+        self.cache.get("token")
+        self.cache.set("token", self.payload)
+        self.cache.get("token")
+        self.cache.get("token")
+        stats = self.cache.stats()
+        assert (stats["hits"], stats["misses"]) == (2, 1)
+        assert stats["hit_ratio"] == pytest.approx(2 / 3)
+
+    def test_disabled_cache_stores_nothing(self):
+        cache = VerifiedTokenCache(maxsize=0)
+        cache.set("token", self.payload)
+        assert cache.get("token") is None
+
+
+class TestRequiresAuth:
+    """Test suite for requires_auth with the verified token cache."""
+
+    def setup_method(self, method):
+        self.url = f"/api/{flaskr.API_VERSION}/actors"
+
+    def test_token_is_verified_once(self, client, mocker):
+        mocker.patch("flaskr.auth.auth.token_cache", VerifiedTokenCache())
+        verify = mocker.patch(
+            "flaskr.auth.auth.verify_decode_jwt",
+            return_value={
+                "exp": time.time() + 60, "permissions": ["get:actors"]},
+        )
+        headers = {"Authorization": "Bearer token"}
+
+        for _ in range(3):
+            assert client.get(self.url, headers=headers).status_code == 200
+        assert verify.call_count == 1
+
+    def test_permissions_are_checked_on_cached_payload(self, client, mocker):
+        mocker.patch("flaskr.auth.auth.token_cache", VerifiedTokenCache())
+        mocker.patch(
+            "flaskr.auth.auth.verify_decode_jwt",
+            return_value={
+                "exp": time.time() + 60, "permissions": ["get:movie"]},
+        )
+        headers = {"Authorization": "Bearer token"}
+
+        for _ in range(2):
+            assert client.get(self.url, headers=headers).status_code == 403
@@ -0,0 +1,131 @@
+"""
+Test suite for the conditional GET requests (ETag / If-None-Match).
+"""
+
+import json
+import flaskr as flaskr
+
+from flaskr.data.models import Actor, Movie, TableVersion
+
+
+class TestConditional:
+    """Test suite for the ETags of the list and detail endpoints."""
+
+    @classmethod
+    def setup_class(cls):
+        cls.app = flaskr.create_app(test_config=True)
+        cls.app_context = cls.app.test_request_context()
+        cls.app_context.push()
+
+    @classmethod
+    def teardown_class(cls):
+        cls.app_context.pop()
+
+    def setup_method(self, method):
+        self.base_url = f"/api/{flaskr.API_VERSION}"
+
+        self.actor = Actor(name="james", age=20, gender="M")
+        self.actor.insert()
+        self.movie = Movie(title="Die Hard", release_date="09-12-1988",
+                           genre="Action", actors=[self.actor])
+        self.movie.insert()
+
+        self.urls = [
+            f"{self.base_url}/actors",
+            f"{self.base_url}/actors/{self.actor.id}",
+            f"{self.base_url}/movies",
+            f"{self.base_url}/movies/{self.movie.id}",
+        ]
+
+    def teardown_method(self, method):
+        """
+        Clean up the database after each test.
+        """
+        for movie in Movie.query.all():
+            movie.delete()
+        for actor in Actor.query.all():
+            actor.delete()
+
+    def authorize(self, mocker):
+        mocker.patch("flaskr.auth.auth.get_token_auth_header", return_value="")
+        mocker.patch("flaskr.auth.auth.verify_decode_jwt",
+                     return_value={"permissions": [
+                         "get:actors", "get:movie", "patch:actor"]})
+
+    def test_get_detail_endpoints_success(self, client, mocker):
+        self.authorize(mocker)
+
+        response = client.get(f"{self.base_url}/actors/{self.actor.id}")
+        assert response.status_code == 200
+        assert response.json["actor"]["name"] == "james"
+
+        response = client.get(f"{self.base_url}/movies/{self.movie.id}")
+        assert response.status_code == 200
+        assert response.json["movie"]["actors"][0]["id"] == self.actor.id
+
+    def test_get_missing_detail_fails_404(self, client, mocker):
+        self.authorize(mocker)
+        response = client.get(f"{self.base_url}/movies/{self.movie.id + 1}")
+        assert response.status_code == 404
+
+    def test_get_detail_without_permission_fails_403(self, client, mocker):
+        mocker.patch("flaskr.auth.auth.get_token_auth_header", return_value="")
+        mocker.patch("flaskr.auth.auth.verify_decode_jwt",
+                     return_value={"permissions": []})
+        response = client.get(f"{self.base_url}/actors/{self.actor.id}")
+        assert response.status_code == 403
+
+    def test_responses_have_a_strong_etag(self, client, mocker):
+        self.authorize(mocker)
+        etags = set()
+        for url in self.urls:
+            response = client.get(url)
+            etag, weak = response.get_etag()
+            assert etag and not weak
+            etags.add(etag)
+        assert len(etags) == len(self.urls)
+
+    def test_matching_etag_returns_304_without_formatting(
+        self, client, mocker, count_queries
+    ):
+        self.authorize(mocker)
+        for url in self.urls:
+            etag = client.get(url).get_etag()[0]
+
+            format_movie = mocker.spy(Movie, "format")
+            format_actor = mocker.spy(Actor, "format")
+            with count_queries() as counter:
+                response = client.get(
+                    url, headers={"If-None-Match": f'"{etag}"'})
+
+            assert response.status_code == 304
+            assert response.get_etag()[0] == etag
+            assert response.data == b""
+            assert counter.count == 1
+            assert format_movie.call_count == format_actor.call_count == 0
+            mocker.stopall()
+            self.authorize(mocker)
+
+    def test_write_changes_the_etag(self, client, mocker):
+        self.authorize(mocker)
+        url = f"{self.base_url}/movies"
+        etag = client.get(url).get_etag()[0]
+
+        response = client.patch(
+            f"{self.base_url}/actors/{self.actor.id}",
+            data=json.dumps({"name": "jannet"}),
+            headers={"Content-Type": "application/json"},
+        )
+        assert response.status_code == 200
+
+        response = client.get(url, headers={"If-None-Match": f'"{etag}"'})
+        assert response.status_code == 200
+        assert response.get_etag()[0] != etag
+        assert response.json["movies"][0]["actors"][0]["name"] == "jannet"
+
+    def test_commit_bumps_the_written_tables_versions(self):
+        versions = TableVersion.get_versions({"actor", "movie"})
+        Actor(name="jane", age=22, gender="F").insert()
+        bumped = TableVersion.get_versions({"actor", "movie"})
+        assert bumped["actor"] == versions["actor"] + 1
+        assert bumped["movie"] == versions["movie"]
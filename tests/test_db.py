@@ -0,0 +1,227 @@
+"""
+Test suite for the database setup.
+"""
+
+import pytest
+import flaskr as flaskr
+from flask import Flask, g
+from sqlalchemy import create_engine, exc, text
+from sqlalchemy.pool import NullPool
+
+from flaskr.config import ProductionConfig, TestingConfig
+from flaskr.data import db as db_module
+from flaskr.data.db import db, db_setup, init_db
+from flaskr.data.models import Actor
+from flaskr.data.pool import TimedQueuePool, get_engine_options
+from flaskr.data.pool import get_pool_stats, track_pool
+
+
+class TestSqlitePragmas:
+    """Test suite for the PRAGMAs run on the new SQLite connections."""
+
+    def create_app(self, tmp_path, pragmas):
+        app = Flask(__name__)
+        app.config["SQLALCHEMY_DATABASE_URI"] = (
+            f"sqlite:///{tmp_path / 'pragmas.sqlite3'}")
+        app.config["SQLITE_PRAGMAS"] = pragmas
+        db_setup(app)
+        return app
+
+    def get_pragma(self, app, name):
+        with app.app_context():
+            with db.engine.connect() as connection:
+                return connection.execute(text(f"PRAGMA {name}")).scalar()
+
+    def test_production_pragmas_are_applied_on_connect(self, tmp_path):
+        app = self.create_app(tmp_path, ProductionConfig.SQLITE_PRAGMAS)
+
+        assert self.get_pragma(app, "journal_mode") == "wal"
+        # NORMAL
+        assert self.get_pragma(app, "synchronous") == 1
+        assert self.get_pragma(app, "busy_timeout") == (
+            ProductionConfig.SQLITE_PRAGMAS["busy_timeout"])
+        assert self.get_pragma(app, "cache_size") == -64 * 1024
+        # MEMORY
+        assert self.get_pragma(app, "temp_store") == 2
+
+    def test_no_pragmas_keeps_sqlite_defaults(self, tmp_path):
+        app = self.create_app(tmp_path, {})
+
+        assert self.get_pragma(app, "journal_mode") == "delete"
+
+
+class TestQueryTracking:
+    """Test suite for the statistics and the log of the SQL statements."""
+
+    def create_app(self, tmp_path, slow_query_threshold):
+        app = Flask(__name__)
+        app.config["SQLALCHEMY_DATABASE_URI"] = (
+            f"sqlite:///{tmp_path / 'queries.sqlite3'}")
+        app.config["SLOW_QUERY_THRESHOLD"] = slow_query_threshold
+        db_setup(app)
+
+        @app.route("/queries/<int:count>")
+        def run_queries(count):
+            for i in range(count):
+                db.session.execute(text("SELECT :i"), {"i": i})
+            return ""
+
+        @app.after_request
+        def record_stats(response):
+            app.query_stats = g.query_stats
+            return response
+
+        return app
+
+    def test_statements_are_counted_per_request(self, tmp_path):
+        app = self.create_app(tmp_path, 0)
+
+        with app.test_client() as client:
+            client.get("/queries/3")
+            assert app.query_stats.count == 3
+            assert app.query_stats.duration > 0
+
+            client.get("/queries/1")
+            assert app.query_stats.count == 1
+
+    def test_slow_statements_are_logged(self, tmp_path, mocker):
+        app = self.create_app(tmp_path, 1e-9)
+        log = mocker.spy(db_module.logger, "warning")
+
+        with app.test_client() as client:
+            client.get("/queries/2")
+
+        assert log.call_count == 2
+        message = log.call_args.args[0] % log.call_args.args[1:]
+        assert "from run_queries: SELECT ?" in message
+        assert "(1,)" in message
+
+    def test_no_slow_statements_logged_without_threshold(
+        self, tmp_path, mocker
+    ):
+        app = self.create_app(tmp_path, 0)
+        log = mocker.spy(db_module.logger, "warning")
+
+        with app.test_client() as client:
+            client.get("/queries/2")
+
+        log.assert_not_called()
+
+
+class TestPool:
+    """Test suite for the engine options and the pools statistics."""
+
+    def test_sqlite_file_defaults_to_no_pool(self, monkeypatch):
+        monkeypatch.delenv("DB_POOL_CLASS", raising=False)
+        options = get_engine_options("sqlite:///app.sqlite3")
+
+        assert options["poolclass"] is NullPool
+        assert "pool_size" not in options
+
+    def test_environment_overrides_the_defaults(self, monkeypatch):
+        monkeypatch.setenv("DB_POOL_CLASS", "queue")
+        monkeypatch.setenv("DB_POOL_SIZE", "2")
+        monkeypatch.setenv("DB_POOL_PRE_PING", "true")
+        options = get_engine_options(
+            "postgresql://db/casting", pool_size=5, max_overflow=3)
+
+        assert options["poolclass"] is TimedQueuePool
+        assert options["pool_size"] == 2
+        assert options["max_overflow"] == 3
+        assert options["pool_pre_ping"] is True
+
+    def test_unknown_pool_class_raises(self, monkeypatch):
+        monkeypatch.setenv("DB_POOL_CLASS", "magic")
+        with pytest.raises(ValueError):
+            get_engine_options("postgresql://db/casting")
+
+    def test_stats_count_checkouts_and_timeouts(self, tmp_path):
+        engine = create_engine(
+            f"sqlite:///{tmp_path / 'pool.sqlite3'}",
+            poolclass=TimedQueuePool, pool_size=1, max_overflow=0,
+            pool_timeout=0.01,
+        )
+        track_pool(engine)
+
+        connection = engine.connect()
+        with pytest.raises(exc.TimeoutError):
+            engine.connect()
+        stats = get_pool_stats(engine)
+        assert stats["checked_out"] == 1
+        assert stats["timeouts"] == 1
+        assert stats["max_wait_ms"] >= 10
+
+        connection.close()
+        stats = get_pool_stats(engine)
+        assert stats["checkouts"] == 1
+        assert stats["checked_out"] == 0
+        assert stats["idle"] == 1
+        assert stats["max_hold_ms"] > 0
+        engine.dispose()
+
+
+class TestReadReplicas:
+    """Test suite for the routing of the reads to a replica."""
+
+    @pytest.fixture
+    def app(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(
+            TestingConfig, "SQLALCHEMY_DATABASE_URI",
+            f"sqlite:///{tmp_path / 'primary.sqlite3'}")
+        monkeypatch.setattr(
+            TestingConfig, "SQLALCHEMY_REPLICA_URIS",
+            [f"sqlite:///{tmp_path / 'replica.sqlite3'}"])
+        app = flaskr.create_app(test_config=True)
+
+        with app.app_context():
+            init_db()
+            # The replica is not replicated here, it gets its own rows.
+            db.metadata.create_all(db.engines["replica_0"])
+            with db.engines["replica_0"].begin() as connection:
+                connection.execute(
+                    Actor.__table__.insert(),
+                    {"name": "replica", "age": 20, "gender": "M"})
+            Actor(name="primary", age=30, gender="F").insert()
+
+        yield app
+        with app.app_context():
+            for engine in db.engines.values():
+                engine.dispose()
+
+    def authorize(self, mocker, permissions):
+        mocker.patch("flaskr.auth.auth.get_token_auth_header", return_value="")
+        mocker.patch("flaskr.auth.auth.verify_decode_jwt",
+                     return_value={"permissions": permissions})
+
+    def test_get_endpoints_read_from_the_replica(self, app, mocker):
+        self.authorize(mocker, ["get:actors", "create:actor"])
+        with app.test_client() as client:
+            response = client.get("/api/v1/actors")
+            assert [actor["name"] for actor in response.json["actors"]] == [
+                "replica"]
+
+            response = client.get("/api/v1/health")
+            assert response.json["actors"] == 1
+
+            response = client.post(
+                "/api/v1/actors",
+                json={"name": "written", "age": 40, "gender": "M"})
+            assert response.status_code == 201
+
+        with app.app_context():
+            names = {actor.name for actor in Actor.query.all()}
+        assert names == {"primary", "written"}
+
+    def test_reads_after_a_write_stay_on_the_primary(self, app):
+        with app.app_context():
+            db.session.info["use_replica"] = True
+            assert [actor.name for actor in Actor.query.all()] == ["replica"]
+
+            Actor(name="written", age=40, gender="M").insert()
+
+            names = {actor.name for actor in Actor.query.all()}
+            assert names == {"primary", "written"}
+
+    def test_views_without_use_replica_read_from_the_primary(self, app):
+        with app.app_context():
+            assert [actor.name for actor in Actor.query.all()] == ["primary"]
@@ -0,0 +1,151 @@
+"""
+Test suite for the export of the catalogue.
+"""
+
+import gzip
+import json
+import tracemalloc
+
+import flaskr as flaskr
+
+from flaskr.data.db import db
+from flaskr.data.models import Actor, Movie
+
+
+class TestExport:
+    """Test suite for the export of the catalogue."""
+
+    @classmethod
+    def setup_class(cls):
+        cls.app = flaskr.create_app(test_config=True)
+        cls.app_context = cls.app.test_request_context()
+        cls.app_context.push()
+
+    @classmethod
+    def teardown_class(cls):
+        cls.app_context.pop()
+
+    def setup_method(self, method):
+        self.base_url = f"/api/{flaskr.API_VERSION}/export"
+
+        self.actor = Actor(name="james", age=20, gender="M")
+        self.actor.insert()
+        self.actor_id = self.actor.id
+
+        self.movie = Movie(title="Die Hard", description="Action Movie",
+                           genre="Action", release_date="09-12-1988")
+        self.movie.actors = [self.actor]
+        self.movie.insert()
+        self.movie_id = self.movie.id
+
+    def teardown_method(self, method):
+        """
+        Clean up the database after each test.
+        """
+        db.session.rollback()
+        db.session.execute(Movie.actors.property.secondary.delete())
+        db.session.execute(Movie.__table__.delete())
+        db.session.execute(Actor.__table__.delete())
+        Actor.commit()
+        db.session.expunge_all()
+
+    def mock_auth(self, mocker, permissions=("get:movie", "get:actors")):
+        mocker.patch("flaskr.auth.auth.get_token_auth_header", return_value="")
+        mocker.patch("flaskr.auth.auth.verify_decode_jwt",
+                     return_value={"permissions": list(permissions)})
+
+    def insert_actors(self, number):
+        db.session.execute(Actor.__table__.insert(), [
+            {"name": "jane", "age": 30, "gender": "F"} for _ in range(number)
+        ])
+        Actor.commit()
+
+    def export_peak_memory(self, client):
+        """Peak memory allocated while streaming the actors export."""
+        tracemalloc.start()
+        try:
+            response = client.get(f"{self.base_url}/actors", buffered=False)
+            lines = 0
+            for chunk in response.response:
+                lines += chunk.count(b"\n")
+            response.close()
+            return lines, tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    def test_export_without_auth_fails_401(self, client):
+        response = client.get(f"{self.base_url}/movies")
+        assert response.status_code == 401
+
+    def test_export_without_permission_fails_403(self, client, mocker):
+        self.mock_auth(mocker, permissions=["get:movie"])
+        response = client.get(f"{self.base_url}/actors")
+        assert response.status_code == 403
+
+    def test_export_movies_as_ndjson(self, client, mocker):
+        self.mock_auth(mocker)
+        Movie(title="Speed", genre="Action",
+              release_date="10-06-1994").insert()
+
+        response = client.get(f"{self.base_url}/movies")
+        assert response.status_code == 200
+        assert response.mimetype == "application/x-ndjson"
+        assert response.headers["ETag"]
+        movies = [json.loads(line) for line in response.data.splitlines()]
+        assert [movie["title"] for movie in movies] == ["Die Hard", "Speed"]
+        assert movies[0]["actors"][0]["id"] == self.actor_id
+
+        response = client.get(
+            f"{self.base_url}/movies?after_id={self.movie_id}"
+            "&fields=title&embed=none")
+        assert [json.loads(line) for line in response.data.splitlines()] == [
+            {"id": movies[1]["id"], "title": "Speed"}]
+
+    def test_export_is_gzipped_when_accepted(self, client, mocker):
+        self.mock_auth(mocker)
+
+        response = client.get(
+            f"{self.base_url}/actors", headers={"Accept-Encoding": "gzip"})
+        assert response.headers["Content-Encoding"] == "gzip"
+        actors = gzip.decompress(response.data).decode().splitlines()
+        assert json.loads(actors[0])["movies"][0]["title"] == "Die Hard"
+
+    def test_gzipped_export_has_its_own_etag(self, client, mocker):
+        self.mock_auth(mocker)
+        url = f"{self.base_url}/actors"
+        gzip_headers = {"Accept-Encoding": "gzip"}
+
+        def get(**headers):
+            response = client.get(url, headers=headers)
+            response.close()
+            return response
+
+        etag = get().headers["ETag"]
+        gzip_etag = get(**gzip_headers).headers["ETag"]
+        assert gzip_etag == etag[:-1] + '-gzip"'
+
+        response = get(**{"If-None-Match": gzip_etag})
+        assert response.status_code == 200
+        assert response.headers["ETag"] == etag
+        response = get(**gzip_headers, **{"If-None-Match": gzip_etag})
+        assert response.status_code == 304
+
+    def test_export_with_invalid_after_id_fails_400(self, client, mocker):
+        self.mock_auth(mocker)
+        response = client.get(f"{self.base_url}/movies?after_id=last")
+        assert response.status_code == 400
+
+    def test_export_memory_does_not_grow_with_the_rows(self, client, mocker):
+        self.mock_auth(mocker)
+        mocker.patch("flaskr.utils.export.EXPORT_CHUNK_SIZE", 100)
+
+        self.insert_actors(500)
+        # A first export warms up the caches, e.g. the compiled statements.
+        self.export_peak_memory(client)
+        small_lines, small_peak = self.export_peak_memory(client)
+
+        self.insert_actors(4500)
+        large_lines, large_peak = self.export_peak_memory(client)
+
+        assert (small_lines, large_lines) == (501, 5001)
+        assert large_peak < small_peak * 1.5
@@ -2,9 +2,13 @@
 Test suite for the health check.
 """
 
+import threading
+import time
 from string import ascii_lowercase
 import flaskr as flaskr
 
+from flaskr.routes import health
+
 from flaskr.data.models import Actor, Movie
 
 
@@ -58,3 +62,80 @@ class TestHealth:
         assert response.json["actors"] == 10
         assert "movies" in response.json
         assert response.json["movies"] == 10
+
+    def test_get_health_counts_are_cached(self, client):
+        client.application.config["HEALTH_COUNTS_TTL"] = 60
+        assert client.get(self.url).json["actors"] == 10
+
+        Actor(name="newactor", gender="M", age=30).insert()
+        response = client.get(self.url)
+        assert response.json["actors"] == 10
+
+        client.application.config["HEALTH_COUNTS_TTL"] = 0
+        assert client.get(self.url).json["actors"] == 11
+
+    def test_get_liveness_does_not_query_the_db(self, client, count_queries):
+        with count_queries() as counter:
+            response = client.get(f"{self.url}/live")
+        assert response.status_code == 200
+        assert response.json["success"] is True
+        assert counter.count == 0
+
+    def test_get_readiness_success(self, client):
+        response = client.get(f"{self.url}/ready")
+        assert response.status_code == 200
+        assert response.json["success"] is True
+
+    def test_get_readiness_timeout_fails_503(self, client, mocker):
+        client.application.config["HEALTH_READY_TIMEOUT"] = 0.01
+        mocker.patch("flaskr.routes.health._ping_database",
+                     side_effect=lambda engine, timeout: time.sleep(0.2))
+        response = client.get(f"{self.url}/ready")
+        assert response.status_code == 503
+        assert response.json["success"] is False
+        health._probe["future"].result()
+
+    def test_get_readiness_waits_on_the_running_ping(self, client, mocker):
+        client.application.config["HEALTH_READY_TIMEOUT"] = 0.01
+        database_hangs = threading.Event()
+        ping = mocker.patch("flaskr.routes.health._ping_database",
+                            side_effect=lambda engine, timeout: (
+                                database_hangs.wait(5)))
+
+        for _ in range(3):
+            assert client.get(f"{self.url}/ready").status_code == 503
+        assert ping.call_count == 1
+
+        database_hangs.set()
+        health._probe["future"].result()
+        assert client.get(f"{self.url}/ready").status_code == 200
+        assert ping.call_count == 2
+
+    def test_get_readiness_db_error_fails_503(self, client, mocker):
+        mocker.patch("flaskr.routes.health._ping_database",
+                     side_effect=OSError("database is gone"))
+        response = client.get(f"{self.url}/ready")
+        assert response.status_code == 503
+
+    def test_get_stats_without_auth_fails_401(self, client):
+        response = client.get(f"{self.url}/stats")
+        assert response.status_code == 401
+
+    def test_get_stats_without_permission_fails_403(self, client, mocker):
+        mocker.patch("flaskr.auth.auth.get_token_auth_header", return_value="")
+        mocker.patch("flaskr.auth.auth.verify_decode_jwt",
+                     return_value={"permissions": ["get:actors"]})
+        response = client.get(f"{self.url}/stats")
+        assert response.status_code == 403
+
+    def test_get_stats_exposes_the_pools(self, client, mocker):
+        mocker.patch("flaskr.auth.auth.get_token_auth_header", return_value="")
+        mocker.patch("flaskr.auth.auth.verify_decode_jwt",
+                     return_value={"permissions": ["get:stats"]})
+        client.get(self.url)
+        response = client.get(f"{self.url}/stats")
+
+        assert response.status_code == 200
+        pool = response.json["pools"]["default"]
+        assert pool["checkouts"] >= 1
+        assert pool["checked_out"] == 0
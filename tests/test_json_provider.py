@@ -0,0 +1,77 @@
+"""
+Test suite for the JSON providers.
+"""
+
+import json
+from datetime import date, datetime, timezone
+
+import pytest
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+from flaskr.data.models import GenderEnum
+from flaskr.utils.json_provider import JSON_PROVIDERS, StdlibJSONProvider
+from flaskr.utils.movie_genre import MovieGenreEnum
+
+PAYLOAD = {
+    "success": True,
+    "movies": [{
+        "id": 1,
+        "title": "Amélie",
+        "release_date": date(2001, 4, 25),
+        "genre": MovieGenreEnum("Comedy"),
+        "description": None,
+        "actors": [{"id": 2, "name": "audrey", "gender": GenderEnum.F}],
+    }],
+    "updated_at": datetime(2022, 12, 9, 10, 30, tzinfo=timezone.utc),
+    "next_page": False,
+}
+
+
+@pytest.fixture(params=sorted(set(JSON_PROVIDERS) - {"flask"}))
+def provider(request):
+    app = Flask(__name__)
+    app.json = JSON_PROVIDERS[request.param](app)
+    with app.app_context():
+        yield app.json
+
+
+class TestJSONProvider:
+    """Test suite for the JSON providers."""
+
+    def test_dumps_like_flask(self, provider):
+        flask_app = Flask(__name__)
+        flask_provider = DefaultJSONProvider(flask_app)
+        expected = json.loads(flask_provider.dumps(
+            PAYLOAD, default=provider.default))
+
+        assert json.loads(provider.dumps(PAYLOAD)) == expected
+        movie = expected["movies"][0]
+        assert movie["release_date"] == "Wed, 25 Apr 2001 00:00:00 GMT"
+        assert movie["genre"] == "Comedy"
+        assert movie["actors"][0]["gender"] == "Female"
+        assert expected["updated_at"] == "Fri, 09 Dec 2022 10:30:00 GMT"
+
+    def test_response_is_compact_and_sorted(self, provider):
+        response = provider.response({"b": 1, "a": [date(2001, 4, 25)]})
+        assert response.mimetype == "application/json"
+        assert response.get_data() == (
+            b'{"a":["Wed, 25 Apr 2001 00:00:00 GMT"],"b":1}\n')
+
+    def test_other_arguments_fall_back_to_flask(self, provider):
+        assert provider.dumps(
+            {"b": object(), "a": 2}, default=lambda o: "?",
+            separators=(",", ":")) == '{"a":2,"b":"?"}'
+
+    def test_loads(self, provider):
+        assert provider.loads(b'{"name": "Am\\u00e9lie"}') == {
+            "name": "Amélie"}
+
+    def test_stdlib_provider_reuses_its_encoders(self):
+        app = Flask(__name__)
+        provider = StdlibJSONProvider(app)
+        provider.dumps([1])
+        provider.dumps([2])
+        provider.ensure_ascii = False
+        assert provider.dumps(["é"]) == '["é"]'
+        assert len(provider._encoders) == 2
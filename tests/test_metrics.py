@@ -0,0 +1,132 @@
+"""
+Test suite for the Prometheus metrics.
+"""
+
+import os
+import subprocess
+import sys
+from unittest import mock
+
+from prometheus_client import CollectorRegistry, multiprocess
+from prometheus_client.parser import text_string_to_metric_families
+
+import flaskr as flaskr
+from flaskr.config import TestingConfig
+
+# Serves a few requests in a process writing its metrics to the
+# PROMETHEUS_MULTIPROC_DIR, like a gunicorn worker.
+WORKER_SCRIPT = """
+import flaskr
+app = flaskr.create_app(test_config=True)
+with app.test_client() as client:
+    for _ in range(3):
+        client.get("/api/v1/health/live")
+"""
+
+
+def get_samples(text):
+    """Values of the samples of the metrics, by name and labels."""
+    return {
+        (sample.name, tuple(sorted(sample.labels.items()))): sample.value
+        for family in text_string_to_metric_families(text)
+        for sample in family.samples
+    }
+
+
+class TestMetrics:
+    """Test suite for the Prometheus metrics."""
+
+    @classmethod
+    def setup_class(cls):
+        cls.app = flaskr.create_app(test_config=True)
+        cls.app_context = cls.app.test_request_context()
+        cls.app_context.push()
+
+    @classmethod
+    def teardown_class(cls):
+        cls.app_context.pop()
+
+    def setup_method(self, method):
+        self.live_url = f"/api/{flaskr.API_VERSION}/health/live"
+        self.live_labels = (
+            ("endpoint", "health_blueprint.get_liveness"), ("method", "GET"))
+
+    def get_metrics(self, client):
+        with mock.patch("flaskr.auth.auth.get_token_auth_header",
+                        return_value=""), \
+                mock.patch("flaskr.auth.auth.verify_decode_jwt",
+                           return_value={"permissions": ["get:stats"]}):
+            response = client.get("/metrics")
+        assert response.status_code == 200
+        assert response.content_type.startswith("text/plain")
+        return get_samples(response.get_data(as_text=True))
+
+    def test_requests_are_counted_by_endpoint_and_status(self, client):
+        before = self.get_metrics(client)
+        client.get(self.live_url)
+        client.get(self.live_url)
+        client.get(f"/api/{flaskr.API_VERSION}/movies")
+        after = self.get_metrics(client)
+
+        key = ("flaskr_http_requests_total",
+               self.live_labels + (("status", "200"),))
+        assert after[key] - before.get(key, 0) == 2
+
+        key = ("flaskr_http_requests_total",
+               (("endpoint", "movies_blueprint.get_movies"),
+                ("method", "GET"), ("status", "401")))
+        assert after[key] - before.get(key, 0) == 1
+
+    def test_latency_and_size_histograms(self, client):
+        before = self.get_metrics(client)
+        client.get(self.live_url)
+        after = self.get_metrics(client)
+
+        for name in ("flaskr_http_request_duration_seconds_count",
+                     "flaskr_http_response_size_bytes_count"):
+            key = (name, self.live_labels)
+            assert after[key] - before.get(key, 0) == 1
+        key = ("flaskr_http_request_duration_seconds_bucket",
+               tuple(sorted(self.live_labels + (("le", "+Inf"),))))
+        assert after[key] >= 1
+
+    def test_pool_and_cache_metrics(self, client):
+        client.get(self.live_url)
+        samples = self.get_metrics(client)
+
+        assert ("flaskr_db_pool_checked_out",
+                (("bind", "default"),)) in samples
+        assert ("flaskr_db_pool_checkouts_total",
+                (("bind", "default"),)) in samples
+        for cache in ("token", "response"):
+            assert ("flaskr_cache_hits_total", (("cache", cache),)) in samples
+            assert ("flaskr_cache_misses_total",
+                    (("cache", cache),)) in samples
+
+    def test_metrics_without_auth_fails_401(self, client):
+        assert client.get("/metrics").status_code == 401
+
+    def test_metrics_without_permission_fails_403(self, client, mocker):
+        mocker.patch("flaskr.auth.auth.get_token_auth_header", return_value="")
+        mocker.patch("flaskr.auth.auth.verify_decode_jwt",
+                     return_value={"permissions": ["get:actors"]})
+        assert client.get("/metrics").status_code == 403
+
+    def test_no_metrics_when_disabled(self, mocker):
+        mocker.patch.object(TestingConfig, "METRICS", False)
+        app = flaskr.create_app(test_config=True)
+
+        with app.test_client() as client:
+            assert client.get("/metrics").status_code == 404
+
+    def test_metrics_are_aggregated_across_processes(self, tmp_path):
+        env = dict(os.environ, PROMETHEUS_MULTIPROC_DIR=str(tmp_path))
+        for _ in range(2):
+            subprocess.run(
+                [sys.executable, "-c", WORKER_SCRIPT], env=env, check=True)
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry, path=str(tmp_path))
+        labels = dict(self.live_labels, status="200")
+        assert registry.get_sample_value(
+            "flaskr_http_requests_total", labels) == 6
@@ -0,0 +1,113 @@
+"""
+Test suite for the migration scripts.
+"""
+
+import os
+import shutil
+
+import pytest
+from alembic.autogenerate import compare_metadata
+from alembic.migration import MigrationContext
+from flask import Flask
+from flask_migrate import downgrade, upgrade
+from sqlalchemy import inspect, text
+
+from flaskr.data.db import db, db_setup
+from flaskr.data.search import is_search_table
+
+MIGRATIONS_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(__file__)), "migrations")
+DATA_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(__file__)), "flaskr", "data")
+
+
+class TestMigrations:
+    """Test suite for the migration scripts."""
+
+    def create_app(self, tmp_path):
+        app = Flask(__name__)
+        app.config["SQLALCHEMY_DATABASE_URI"] = (
+            f"sqlite:///{tmp_path / 'migrations.sqlite3'}")
+        db_setup(app)
+        return app
+
+    def assert_schema_matches_the_models(self):
+        with db.engine.connect() as connection:
+            context = MigrationContext.configure(
+                connection, opts={
+                    "include_object": lambda object, name, type_, *_: (
+                        type_ != "table" or not is_search_table(name)),
+                })
+            assert compare_metadata(context, db.metadata) == []
+
+    def test_upgrade_matches_the_models(self, tmp_path):
+        app = self.create_app(tmp_path)
+        with app.app_context():
+            upgrade(directory=MIGRATIONS_DIR)
+            self.assert_schema_matches_the_models()
+
+    @pytest.mark.parametrize("name", ["dev_db.sqlite3", "prod_db.sqlite3"])
+    def test_shipped_databases_upgrade_to_the_models(self, tmp_path, name):
+        shutil.copy(
+            os.path.join(DATA_DIR, name), tmp_path / "migrations.sqlite3")
+        app = self.create_app(tmp_path)
+        with app.app_context():
+            upgrade(directory=MIGRATIONS_DIR)
+            self.assert_schema_matches_the_models()
+
+    def test_upgrade_from_the_initial_schema_adds_the_table_versions(
+        self, tmp_path
+    ):
+        app = self.create_app(tmp_path)
+        with app.app_context():
+            upgrade(directory=MIGRATIONS_DIR, revision="90dff70c4687")
+            assert "table_version" not in inspect(
+                db.engine).get_table_names()
+            upgrade(directory=MIGRATIONS_DIR)
+
+            with db.engine.connect() as connection:
+                rows = connection.execute(text(
+                    "SELECT name, version FROM table_version "
+                    "ORDER BY name")).all()
+            assert rows == [("actor", 0), ("association", 0), ("movie", 0)]
+
+    def test_upgrade_indexes_the_filter_and_sort_columns(self, tmp_path):
+        app = self.create_app(tmp_path)
+        with app.app_context():
+            upgrade(directory=MIGRATIONS_DIR)
+            inspector = inspect(db.engine)
+
+            def indexed(table):
+                return {
+                    tuple(index["column_names"])
+                    for index in inspector.get_indexes(table)
+                }
+
+            assert ("actor_id",) in indexed("association")
+            assert {("release_date",), ("genre",)} <= indexed("movie")
+            assert {("name",), ("age",)} <= indexed("actor")
+
+    def test_upgrade_creates_the_search_index(self, tmp_path):
+        app = self.create_app(tmp_path)
+        with app.app_context():
+            upgrade(directory=MIGRATIONS_DIR, revision="d024b1d0db27")
+            with db.engine.begin() as connection:
+                connection.execute(text(
+                    "INSERT INTO actor (name, age, gender) "
+                    "VALUES ('keanu', 58, 'M')"))
+            upgrade(directory=MIGRATIONS_DIR)
+
+            with db.engine.connect() as connection:
+                rows = connection.execute(text(
+                    "SELECT rowid, kind FROM search_index "
+                    "WHERE search_index MATCH 'keanu'")).all()
+            assert rows == [(3, "actor")]
+
+    def test_downgrade_drops_everything(self, tmp_path):
+        app = self.create_app(tmp_path)
+        with app.app_context():
+            upgrade(directory=MIGRATIONS_DIR)
+            downgrade(directory=MIGRATIONS_DIR, revision="base")
+
+            tables = inspect(db.engine).get_table_names()
+            assert tables == ["alembic_version"]
@@ -5,6 +5,7 @@ This module contains the tests for the movies endpoints.
 import json
 import flaskr as flaskr
 
+from flaskr.data.db import db
 from flaskr.data.models import Movie, Actor
 
 
@@ -51,6 +52,8 @@ class TestActors:
         actors = Actor.query.all()
         for actor in actors:
             actor.delete()
+        # Forget the rows deleted by the requests, their ids are reused.
+        db.session.remove()
 
     def test_get_movie_without_auth_return_fails_401(self, client):
         response = client.get(self.movie_url)
@@ -135,3 +138,254 @@ class TestActors:
 
         response = client.delete(self.movie_detail_url)
         assert response.status_code == 200
+
+    def test_get_movies_costs_constant_queries(
+        self, client, mocker, count_queries
+    ):
+        mocker.patch("flaskr.auth.auth.get_token_auth_header", return_value="")
+        mocker.patch("flaskr.auth.auth.verify_decode_jwt",
+                     return_value={"permissions": ["get:movie"]})
+
+        for i in range(10):
+            movie = Movie(title=f"Die Hard {i}", genre="Action",
+                          release_date="09-12-1988", actors=[self.actor])
+            movie.insert()
+
+        statements = []
+        for per_page in (1, 5, 10):
+            with count_queries() as counter:
+                response = client.get(f"{self.movie_url}?per_page={per_page}")
+            assert len(response.json["movies"]) == per_page
+            statements.append(counter.count)
+
+        assert statements[0] == statements[1] == statements[2]
+
+    def test_movie_endpoints_stay_within_query_budget(
+        self, client, mocker, query_budget
+    ):
+        mocker.patch("flaskr.auth.auth.get_token_auth_header", return_value="")
+        mocker.patch(
+            "flaskr.auth.auth.verify_decode_jwt",
+            return_value={"permissions": ["get:movie", "patch:movie"]},
+        )
+
+        actors = [self.actor]
+        for i in range(9):
+            actor = Actor(name=f"james{'abcdefghi'[i]}", age=20, gender="M")
+            actor.insert()
+            actors.append(actor)
+        for i in range(10):
+            movie = Movie(title=f"Die Hard {i}", genre="Action",
+                          release_date="09-12-1988", actors=actors)
+            movie.insert()
+
+        # Table versions, page, actors of the page, COUNT.
+        with query_budget(4):
+            client.get(f"{self.movie_url}?per_page=10")
+        # Table versions, movie, actors.
+        with query_budget(3):
+            client.get(self.movie_detail_url)
+        # Movie, actors of the body, current actors, insert, table
+        # version, movie and actors formatted after the commit.
+        data = json.dumps({"actors": [actor.id for actor in actors]})
+        with query_budget(7):
+            client.patch(self.movie_detail_url, data=data,
+                         headers=self.headers)
+
+    def test_bulk_create_movies_success(
+        self, client, mocker, count_queries
+    ):
+        mocker.patch("flaskr.auth.auth.get_token_auth_header", return_value="")
+        mocker.patch("flaskr.auth.auth.verify_decode_jwt",
+                     return_value={"permissions": ["create:movie"]})
+
+        data = [
+            {"title": "Die Hard 2", "release_date": "04-07-1990",
+             "genre": "Action", "actors": [self.actor_id]},
+            {"title": "Die Hard 3", "release_date": "19-05-1995",
+             "genre": "Action"},
+            {"title": "Die Hard 4", "release_date": "27-06-2007",
+             "genre": "Action", "actors": [self.actor_id]},
+        ]
+        with count_queries() as counter:
+            response = client.post(
+                f"{self.movie_url}/bulk", data=json.dumps(data),
+                headers=self.headers,
+            )
+
+        assert response.status_code == 201
+        assert response.json["created"] == 3
+        # A single INSERT of the movies, even with actors.
+        inserts = [statement for statement in counter.statements
+                   if statement.startswith("INSERT INTO movie")]
+        assert len(inserts) == 1
+        movie = Movie.query.filter_by(title="Die Hard 2").one()
+        assert [actor.id for actor in movie.actors] == [self.actor_id]
+        assert Movie.query.filter_by(title="Die Hard 3").one().actors == []
+        assert len(Actor.query.get(self.actor_id).movies) == 2
+
+    def test_bulk_create_movies_isolates_failing_rows(self, client, mocker):
+        mocker.patch("flaskr.auth.auth.get_token_auth_header", return_value="")
+        mocker.patch("flaskr.auth.auth.verify_decode_jwt",
+                     return_value={"permissions": ["create:movie"]})
+        mocker.patch("flaskr.data.models.BULK_INSERT_CHUNK_SIZE", 2)
+
+        data = [
+            {"title": "Die Hard 2", "release_date": "04-07-1990",
+             "genre": "Action", "actors": [self.actor_id]},
+            # Already exists, breaks the unique constraint of its chunk.
+            {"title": "Die Hard", "release_date": "09-12-1988",
+             "genre": "Action"},
+            {"title": "Die Hard 3", "release_date": "1995-05-19",
+             "genre": "Action"},
+            {"title": "Die Hard 4", "release_date": "27-06-2007",
+             "genre": "Action", "actors": [self.actor_id, 0]},
+            {"title": "Die Hard 5", "release_date": "14-02-2013",
+             "genre": "Action", "actors": [self.actor_id]},
+        ]
+        response = client.post(
+            f"{self.movie_url}/bulk", data=json.dumps(data),
+            headers=self.headers,
+        )
+
+        assert response.status_code == 201
+        assert response.json["created"] == 2
+        errors = response.json["errors"]
+        assert [error["index"] for error in errors] == [1, 2, 3]
+        assert errors[0]["message"] == "ERROR: movie.title"
+        assert "DD-MM-YYYY" in errors[1]["message"]
+        assert errors[2]["message"] == "Actors not found: 0"
+
+        titles = {movie.title for movie in Movie.query.all()}
+        assert titles == {"Die Hard", "Die Hard 2", "Die Hard 5"}
+        assert len(Actor.query.get(self.actor_id).movies) == 2
+
+    def test_create_movie_costs_constant_queries(
+        self, client, mocker, count_queries
+    ):
+        mocker.patch("flaskr.auth.auth.get_token_auth_header", return_value="")
+        mocker.patch("flaskr.auth.auth.verify_decode_jwt",
+                     return_value={"permissions": ["create:movie"]})
+
+        actors_id = [self.actor_id]
+        for i in range(9):
+            actor = Actor(name=f"james{'abcdefghi'[i]}", age=20, gender="M")
+            actor.insert()
+            actors_id.append(actor.id)
+
+        statements = []
+        for cast_size in (1, 10):
+            data = {"title": f"Die Hard {cast_size}", "genre": "Action",
+                    "release_date": "09-12-1988",
+                    "actors": actors_id[:cast_size]}
+            with count_queries() as counter:
+                response = client.post(
+                    self.movie_url, data=json.dumps(data),
+                    headers=self.headers,
+                )
+            assert response.json["movie"]["num_actors"] == cast_size
+            statements.append(counter.count)
+
+        assert statements[0] == statements[1]
+
+    def test_actors_are_fetched_in_chunks(self, count_queries, mocker):
+        mocker.patch("flaskr.data.models.IN_CLAUSE_CHUNK_SIZE", 4)
+        actors_id = {self.actor_id}
+        for i in range(9):
+            actor = Actor(name=f"james{'abcdefghi'[i]}", age=20, gender="M")
+            actor.insert()
+            actors_id.add(actor.id)
+
+        with count_queries() as counter:
+            actors = Actor.get_by_ids(actors_id)
+
+        assert {actor.id for actor in actors} == actors_id
+        assert counter.count == 3
+
+    def test_update_movie_with_missing_actors_fails_404(self, client, mocker):
+        mocker.patch("flaskr.auth.auth.get_token_auth_header", return_value="")
+        mocker.patch("flaskr.auth.auth.verify_decode_jwt",
+                     return_value={"permissions": ["patch:movie"]})
+
+        missing = [self.actor_id + 100, self.actor_id + 200]
+        data = {"actors": [self.actor_id, *missing]}
+        response = client.patch(
+            self.movie_detail_url, data=json.dumps(data), headers=self.headers
+        )
+
+        assert response.status_code == 404
+        assert response.json["message"] == (
+            f"Actors not found: {missing[0]}, {missing[1]}")
+
+    def test_get_movies_filtered_and_sorted(self, client, mocker):
+        mocker.patch("flaskr.auth.auth.get_token_auth_header", return_value="")
+        mocker.patch("flaskr.auth.auth.verify_decode_jwt",
+                     return_value={"permissions": ["get:movie"]})
+
+        for title, genre, release_date in (
+            ("Titanic", "Drama", "19-12-1997"),
+            ("Casino", "Crime", "22-11-1995"),
+            ("The Pianist", "Drama", "24-09-2002"),
+        ):
+            Movie(title=title, genre=genre, release_date=release_date).insert()
+
+        response = client.get(f"{self.movie_url}?genre=Drama")
+        assert response.json["total_movies"] == 2
+        assert {movie["genre"] for movie in response.json["movies"]} == {
+            "Drama"}
+
+        response = client.get(
+            f"{self.movie_url}?release_date_from=01-01-1990"
+            "&release_date_to=2000-01-01&sort=release_date&order=desc")
+        titles = [movie["title"] for movie in response.json["movies"]]
+        assert titles == ["Titanic", "Casino"]
+
+        response = client.get(
+            f"{self.movie_url}?genre=Drama&sort=title&per_page=1")
+        assert response.json["movies"][0]["title"] == "The Pianist"
+        assert response.json["next_page_url"].endswith(
+            "/movies?genre=Drama&sort=title&per_page=1&page=2")
+
+    def test_get_movies_with_invalid_filter_fails_400(self, client, mocker):
+        mocker.patch("flaskr.auth.auth.get_token_auth_header", return_value="")
+        mocker.patch("flaskr.auth.auth.verify_decode_jwt",
+                     return_value={"permissions": ["get:movie"]})
+
+        for query in ("genre=Opera", "release_date_from=1990",
+                      "sort=genre", "order=up"):
+            response = client.get(f"{self.movie_url}?{query}")
+            assert response.status_code == 400
+            assert response.json["message"].startswith("Invalid")
+
+    def test_get_movies_sparse_fieldset(self, client, mocker, count_queries):
+        mocker.patch("flaskr.auth.auth.get_token_auth_header", return_value="")
+        mocker.patch("flaskr.auth.auth.verify_decode_jwt",
+                     return_value={"permissions": ["get:movie"]})
+
+        with count_queries() as counter:
+            response = client.get(
+                f"{self.movie_url}?fields=title&embed=none"
+                "&sort=release_date&cursor=")
+        assert response.json["movies"] == [
+            {"id": self.movie_id, "title": "Die Hard"}]
+        selects = [
+            statement for statement in counter.statements
+            if "FROM movie" in statement]
+        assert "movie.description" not in selects[0]
+        assert not any("association" in statement
+                       for statement in counter.statements)
+
+        response = client.get(
+            f"{self.movie_detail_url}?fields=genre,release_date")
+        assert set(response.json["movie"]) == {
+            "id", "genre", "release_date", "actors", "num_actors"}
+
+    def test_get_movies_with_invalid_fieldset_fails_400(self, client, mocker):
+        mocker.patch("flaskr.auth.auth.get_token_auth_header", return_value="")
+        mocker.patch("flaskr.auth.auth.verify_decode_jwt",
+                     return_value={"permissions": ["get:movie"]})
+
+        for query in ("fields=budget", "embed=movies", "embed=none,actors"):
+            response = client.get(f"{self.movie_url}?{query}")
+            assert response.status_code == 400
+            assert response.json["message"].startswith("Invalid")
@@ -2,9 +2,15 @@
 Test suite for the Paginator
 """
 
+from math import ceil
 from string import ascii_lowercase
 
+import pytest
+from sqlalchemy import event
+from werkzeug.exceptions import BadRequest
+
 import flaskr as flaskr
+from flaskr.data.db import db
 from flaskr.utils import Paginator
 from flaskr.constants import ITEM_PER_PAGE
 from flaskr.data.models import Actor, Movie
@@ -23,6 +29,10 @@ class RequestMock(object):
             """Mock the get method of the request.args object."""
             return self.args.get(key, default)
 
+        def items(self, multi=False):
+            """Mock the items method of the request.args object."""
+            return self.args.items()
+
     def __init__(self, args, base_url):
         self.args = self.ArgsMock(args)
         self.base_url = base_url
@@ -68,8 +78,7 @@ class TestPaginator:
 
     def test_paginate_actors_success(self, client):
         """Test the pagination of actors."""
-        actors = Actor.query.all()
-        paginator = Paginator(actors, self.request)
+        paginator = Paginator(Actor.query, self.request)
         actors = paginator.get_next_page_items()
         assert len(actors) == ITEM_PER_PAGE
         assert paginator.next_page_number
@@ -77,9 +86,163 @@ class TestPaginator:
 
     def test_paginate_moviess_success(self, client):
         """Test the pagination of movies."""
-        movies = Movie.query.all()
-        paginator = Paginator(movies, self.request)
+        paginator = Paginator(Movie.query, self.request)
         movies = paginator.get_next_page_items()
         assert len(movies) == ITEM_PER_PAGE
         assert paginator.next_page_number
         assert paginator.next_page_url
+
+    def test_paginate_counts_total_items(self, client):
+        """Test the total and the number of pages come from the count."""
+        paginator = Paginator(Actor.query, self.request)
+        assert paginator.total == 10
+        assert paginator.pages == ceil(10 / ITEM_PER_PAGE)
+
+    def test_paginate_returns_the_requested_page(self, client):
+        """Test only the rows of the requested page are returned."""
+        expected = [
+            actor.id for actor in Actor.query.order_by(Actor.id).all()
+        ][2 * ITEM_PER_PAGE:3 * ITEM_PER_PAGE]
+        paginator = Paginator(Actor.query, self.request)
+        actors = paginator.get_next_page_items()
+        assert [actor["id"] for actor in actors] == expected
+
+    def test_paginate_last_page_success(self, client):
+        """Test the last page holds the remaining items only."""
+        request = RequestMock(
+            args={"page": ceil(10 / ITEM_PER_PAGE)}, base_url="local/")
+        paginator = Paginator(Movie.query, request)
+        movies = paginator.get_next_page_items()
+        assert len(movies) == (10 % ITEM_PER_PAGE or ITEM_PER_PAGE)
+        assert paginator.next_page_number is None
+        assert paginator.next_page_url is None
+
+    def test_paginate_out_of_range_page_is_empty(self, client):
+        """Test a page after the last one returns no items."""
+        request = RequestMock(args={"page": 100}, base_url="local/")
+        paginator = Paginator(Movie.query, request)
+        assert paginator.get_next_page_items() == []
+
+    def test_per_page_argument(self, client, mocker):
+        """Test per_page sets the page size, capped by MAX_PER_PAGE."""
+        request = RequestMock(args={"page": 2, "per_page": "4"}, base_url="")
+        paginator = Paginator(Actor.query, request)
+        assert len(paginator.get_next_page_items()) == 4
+        assert paginator.pages == 3
+        assert paginator.next_page_url == "?per_page=4&page=3"
+
+        mocker.patch.dict(self.app.config, {"MAX_PER_PAGE": 6})
+        request = RequestMock(args={"per_page": "50"}, base_url="")
+        paginator = Paginator(Actor.query, request)
+        assert len(paginator.get_next_page_items()) == 6
+
+        mocker.patch.dict(self.app.config, {"ITEM_PER_PAGE": 5})
+        request = RequestMock(args={}, base_url="")
+        assert Paginator(Actor.query, request).pages == 2
+
+        for per_page in ("0", "-1", "all"):
+            request = RequestMock(args={"per_page": per_page}, base_url="")
+            with pytest.raises(BadRequest):
+                Paginator(Actor.query, request)
+
+    def test_per_page_defaults_outside_of_an_app_context(self, mocker):
+        """Test the constants are used without an app, e.g. in benchmarks."""
+        mocker.patch(
+            "flaskr.utils.paginator.has_app_context", return_value=False)
+        mocker.patch.dict(self.app.config, {"ITEM_PER_PAGE": 5})
+
+        request = RequestMock(args={}, base_url="")
+        assert Paginator(Actor.query, request).per_page == ITEM_PER_PAGE
+
+    def test_cursor_pagination_walks_every_item_once(self, client):
+        """Test following next_cursor returns all the items in order."""
+        ids, cursor = [], ""
+        while cursor is not None:
+            request = RequestMock(args={"cursor": cursor}, base_url="local/")
+            paginator = Paginator(Actor.query, request)
+            ids += [actor["id"] for actor in paginator.get_next_page_items()]
+            assert paginator.page is None
+            cursor = paginator.next_cursor
+
+        assert ids == [actor.id for actor in Actor.query.order_by(Actor.id)]
+
+    def test_cursor_pagination_with_sort_column(self, client):
+        """Test cursors seek on (sort_column, id) in descending order."""
+        ids, cursor = [], ""
+        while cursor is not None:
+            request = RequestMock(args={"cursor": cursor}, base_url="local/")
+            paginator = Paginator(
+                Movie.query, request,
+                sort_column=Movie.release_date, descending=True)
+            ids += [movie["id"] for movie in paginator.get_next_page_items()]
+            cursor = paginator.next_cursor
+
+        expected = Movie.query.order_by(
+            Movie.release_date.desc(), Movie.id.desc())
+        assert ids == [movie.id for movie in expected]
+
+    def test_page_mode_returns_a_cursor_to_the_next_page(self, client):
+        """Test the cursor of a numbered page points to the next page."""
+        request = RequestMock(args={"page": 1}, base_url="local/")
+        paginator = Paginator(Actor.query, request)
+        paginator.get_next_page_items()
+
+        request = RequestMock(
+            args={"cursor": paginator.next_cursor}, base_url="local/")
+        paginator = Paginator(Actor.query, request)
+        from_cursor = paginator.get_next_page_items()
+
+        request = RequestMock(args={"page": 2}, base_url="local/")
+        assert from_cursor == Paginator(
+            Actor.query, request).get_next_page_items()
+        assert paginator.next_page_url == (
+            f"local/?cursor={paginator.next_cursor}")
+
+    def test_invalid_cursor_fails_400(self, client):
+        """Test a malformed cursor or one built for another ordering."""
+        request = RequestMock(args={"cursor": "not-a-cursor"}, base_url="")
+        with pytest.raises(BadRequest):
+            Paginator(Actor.query, request)
+
+        request = RequestMock(args={"cursor": ""}, base_url="")
+        paginator = Paginator(Movie.query, request)
+        paginator.get_next_page_items()
+        request = RequestMock(
+            args={"cursor": paginator.next_cursor}, base_url="")
+        with pytest.raises(BadRequest):
+            Paginator(Movie.query, request, sort_column=Movie.title)
+
+    def test_cursor_page_seeks_instead_of_scanning(self, client):
+        """Test a cursor page is a primary key search, unlike OFFSET.
+
+        The query plan shows why deep cursor pages cost as much as the
+        first page: SQLite seeks to the cursor instead of walking past
+        all the skipped rows.
+        """
+        def query_plan(args):
+            statements = []
+
+            def capture(conn, cursor, statement, params, context, many):
+                statements.append((statement, params))
+
+            event.listen(db.engine, "before_cursor_execute", capture)
+            try:
+                request = RequestMock(args=args, base_url="local/")
+                Paginator(Actor.query, request).get_next_page_items()
+            finally:
+                event.remove(db.engine, "before_cursor_execute", capture)
+
+            statement, params = next(
+                (statement, params) for statement, params in statements
+                if "LIMIT" in statement)
+            rows = db.session.connection().exec_driver_sql(
+                f"EXPLAIN QUERY PLAN {statement}", params)
+            return " ".join(row[-1] for row in rows)
+
+        request = RequestMock(args={"page": 3}, base_url="local/")
+        paginator = Paginator(Actor.query, request)
+        paginator.get_next_page_items()
+
+        assert "SCAN" in query_plan({"page": 3})
+        plan = query_plan({"cursor": paginator.next_cursor})
+        assert "SEARCH" in plan and "SCAN" not in plan
@@ -0,0 +1,143 @@
+"""
+Test suite for the cache of the list endpoints responses.
+"""
+
+import json
+import flaskr as flaskr
+
+from flaskr.data.models import Actor, Movie
+from flaskr.utils import response_cache
+
+
+class TestResponseCache:
+    """Test suite for the response cache."""
+
+    @classmethod
+    def setup_class(cls):
+        cls.app = flaskr.create_app(test_config=True)
+        cls.app_context = cls.app.test_request_context()
+        cls.app_context.push()
+
+    @classmethod
+    def teardown_class(cls):
+        cls.app_context.pop()
+
+    def setup_method(self, method):
+        self.base_url = f"/api/{flaskr.API_VERSION}"
+        self.actor_url = f"{self.base_url}/actors"
+        self.movie_url = f"{self.base_url}/movies"
+
+        self.actor = Actor(name="james", age=20, gender="M")
+        self.actor.insert()
+
+        self.headers = {
+            "Content-Type": "application/json", "Accept": "application/json"
+        }
+        response_cache.clear()
+
+    def teardown_method(self, method):
+        """
+        Clean up the database after each test.
+        """
+        for movie in Movie.query.all():
+            movie.delete()
+        for actor in Actor.query.all():
+            actor.delete()
+
+    def enable_cache(self, client, mocker, size=16):
+        client.application.config["RESPONSE_CACHE_SIZE"] = size
+        mocker.patch("flaskr.auth.auth.get_token_auth_header", return_value="")
+        mocker.patch(
+            "flaskr.auth.auth.verify_decode_jwt",
+            return_value={"permissions": [
+                "get:actors", "get:movie", "create:movie", "patch:actor",
+                "get:stats"]},
+        )
+
+    def test_cached_response_skips_the_list_queries(
+        self, client, mocker, count_queries
+    ):
+        self.enable_cache(client, mocker)
+        first = client.get(self.actor_url)
+
+        with count_queries() as counter:
+            second = client.get(self.actor_url)
+
+        # Only the versions of the tables are read, to compute the ETag.
+        assert counter.count == 1
+        assert second.status_code == 200
+        assert second.json == first.json
+        assert response_cache.stats()["hits"] == 1
+
+    def test_query_arguments_are_cached_separately(self, client, mocker):
+        self.enable_cache(client, mocker)
+        client.get(self.actor_url)
+        response = client.get(f"{self.actor_url}?page=2")
+        assert response.json["page"] == 2
+        assert response_cache.stats()["misses"] == 2
+
+    def test_insert_evicts_the_cached_responses(self, client, mocker):
+        self.enable_cache(client, mocker)
+        assert client.get(self.actor_url).json["total_actors"] == 1
+        assert client.get(self.movie_url).json["total_movies"] == 0
+
+        Actor(name="jane", age=22, gender="F").insert()
+
+        assert client.get(self.actor_url).json["total_actors"] == 2
+        assert response_cache.stats()["invalidations"] == 2
+
+    def test_writes_through_endpoints_evict_the_cached_responses(
+        self, client, mocker
+    ):
+        self.enable_cache(client, mocker)
+        client.get(self.actor_url)
+
+        data = {"title": "Die Hard", "release_date": "09-12-1988",
+                "genre": "Action", "actors": [self.actor.id]}
+        response = client.post(
+            self.movie_url, data=json.dumps(data), headers=self.headers)
+        assert response.status_code == 201
+
+        actors = client.get(self.actor_url).json["actors"]
+        assert actors[0]["movies"][0]["title"] == "Die Hard"
+
+        client.patch(f"{self.actor_url}/{self.actor.id}",
+                     data=json.dumps({"name": "jannet"}),
+                     headers=self.headers)
+        actors = client.get(self.actor_url).json["actors"]
+        assert actors[0]["name"] == "jannet"
+
+    def test_least_recently_used_response_is_evicted(self, client, mocker):
+        self.enable_cache(client, mocker, size=2)
+        for page in (1, 2, 1, 3):
+            client.get(f"{self.actor_url}?page={page}")
+
+        client.get(f"{self.actor_url}?page=1")
+        stats = response_cache.stats()
+        assert stats["size"] == 2
+        assert stats["evictions"] == 1
+        assert stats["hits"] == 2
+
+    def test_response_computed_before_a_write_is_not_cached(self):
+        tables = Actor.read_tables()
+        generations = response_cache.generations(tables)
+        response_cache.invalidate(Movie.written_tables())
+
+        response_cache.set("key", tables, generations, 16, "stale")
+        assert response_cache.get("key") is None
+
+    def test_disabled_cache_stores_nothing(self, client, mocker):
+        self.enable_cache(client, mocker, size=0)
+        client.get(self.actor_url)
+        client.get(self.actor_url)
+        assert response_cache.stats()["size"] == 0
+
+    def test_get_stats_exposes_the_hit_ratio(self, client, mocker):
+        self.enable_cache(client, mocker)
+        client.get(self.actor_url)
+        client.get(self.actor_url)
+
+        response = client.get(f"{self.base_url}/health/stats")
+        assert response.status_code == 200
+        assert response.json["response_cache"]["hit_ratio"] == 0.5
+        assert "token_cache" in response.json
@@ -0,0 +1,177 @@
+"""
+Test suite for the full-text search.
+"""
+
+import json
+import flaskr as flaskr
+
+from flaskr.auth import auth
+from flaskr.data.models import Actor, Movie
+from flaskr.data.search import SearchEntry, build_match_query
+
+
+class TestSearch:
+    """Test suite for the full-text search."""
+
+    @classmethod
+    def setup_class(cls):
+        cls.app = flaskr.create_app(test_config=True)
+        cls.app_context = cls.app.test_request_context()
+        cls.app_context.push()
+
+    @classmethod
+    def teardown_class(cls):
+        cls.app_context.pop()
+
+    def setup_method(self, method):
+        self.search_url = f"/api/{flaskr.API_VERSION}/search"
+
+        self.movie = Movie(title="Die Hard", description="Action Movie",
+                           genre="Action", release_date="09-12-1988")
+        self.movie.insert()
+        self.movie_id = self.movie.id
+
+        self.actor = Actor(name="brucewillis", age=67, gender="M")
+        self.actor.insert()
+        self.actor_id = self.actor.id
+
+        self.headers = {
+            "Content-Type": "application/json", "Accept": "application/json"
+        }
+
+    def teardown_method(self, method):
+        """
+        Clean up the database after each test.
+        """
+        movies = Movie.query.all()
+        for movie in movies:
+            movie.delete()
+
+        actors = Actor.query.all()
+        for actor in actors:
+            actor.delete()
+
+    def mock_auth(self, mocker, permissions=("get:movie", "get:actors")):
+        mocker.patch("flaskr.auth.auth.get_token_auth_header", return_value="")
+        mocker.patch("flaskr.auth.auth.verify_decode_jwt",
+                     return_value={"permissions": list(permissions)})
+
+    def search(self, client, **args):
+        response = client.get(self.search_url, query_string=args)
+        return response, json.loads(response.data)
+
+    def test_build_match_query_quotes_the_words(self):
+        assert build_match_query('die "hard" OR NEAR(') == (
+            '"die" "hard" "OR" "NEAR"*')
+        assert build_match_query(' "*( ') is None
+
+    def test_search_without_auth_fails_401(self, client):
+        response = client.get(self.search_url, query_string={"q": "die"})
+        assert response.status_code == 401
+
+    def test_search_without_permission_fails_403(self, client, mocker):
+        for permission in ("get:movie", "get:actors"):
+            self.mock_auth(mocker, permissions=[permission])
+            response = client.get(self.search_url, query_string={"q": "die"})
+            assert response.status_code == 403
+
+    def test_search_verifies_the_token_once(self, client, mocker):
+        self.mock_auth(mocker)
+        verify = mocker.spy(auth, "get_verified_payload")
+        response, _ = self.search(client, q="die")
+        assert response.status_code == 200
+        assert verify.call_count == 1
+
+    def test_search_without_words_fails_400(self, client, mocker):
+        self.mock_auth(mocker)
+        response, data = self.search(client, q=" * ")
+        assert response.status_code == 400
+        assert data["message"].startswith("Missing search")
+
+    def test_search_with_invalid_type_fails_400(self, client, mocker):
+        self.mock_auth(mocker)
+        response, data = self.search(client, q="die", type="director")
+        assert response.status_code == 400
+        assert data["message"].startswith("Invalid type")
+
+    def test_search_finds_movies_and_actors(self, client, mocker):
+        self.mock_auth(mocker)
+
+        response, data = self.search(client, q="hard")
+        assert response.status_code == 200
+        assert data["total_results"] == 1
+        result = data["results"][0]
+        assert (result["type"], result["id"]) == ("movie", self.movie_id)
+        assert result["title"] == "Die Hard"
+
+        response, data = self.search(client, q="bruce")
+        assert [(result["type"], result["id"], result["name"])
+                for result in data["results"]] == [
+                    ("actor", self.actor_id, "brucewillis")]
+
+    def test_search_results_are_ranked(self, client, mocker):
+        self.mock_auth(mocker)
+        Movie(title="Action", description="Action action action",
+              genre="Action", release_date="01-01-2000").insert()
+
+        response, data = self.search(client, q="action", type="movie")
+        assert [result["title"] for result in data["results"]] == [
+            "Action", "Die Hard"]
+        scores = [result["score"] for result in data["results"]]
+        assert scores == sorted(scores, reverse=True)
+
+    def test_search_type_filter(self, client, mocker):
+        self.mock_auth(mocker)
+        Movie(title="Bruce Almighty", genre="Comedy",
+              release_date="23-05-2003").insert()
+
+        response, data = self.search(client, q="bruce", type="actor")
+        assert [result["type"] for result in data["results"]] == ["actor"]
+
+        response, data = self.search(client, q="bruce")
+        assert data["total_results"] == 2
+
+    def test_search_pages_with_a_cursor(self, client, mocker):
+        self.mock_auth(mocker)
+        for i in range(4):
+            Movie(title=f"Star {i}", genre="Action",
+                  release_date="01-01-2000").insert()
+
+        response, data = self.search(client, q="star", cursor="")
+        titles = [result["title"] for result in data["results"]]
+        assert len(titles) == 3 and data["next_cursor"]
+
+        response, data = self.search(
+            client, q="star", cursor=data["next_cursor"])
+        titles += [result["title"] for result in data["results"]]
+        assert sorted(titles) == [f"Star {i}" for i in range(4)]
+        assert data["next_cursor"] is False
+
+    def test_search_index_follows_the_writes(self):
+        movie = Movie.query.get(self.movie_id)
+        movie.title = "Live Free or Die Hard"
+        movie.update()
+        assert {entry.title for entry in SearchEntry.matching("free")} == {
+            "Live Free or Die Hard"}
+
+        movie.delete()
+        assert SearchEntry.matching("hard").all() == []
+
+        Actor.query.get(self.actor_id).delete()
+        assert SearchEntry.matching("bruce").all() == []
+
+    def test_search_index_follows_the_bulk_inserts(self, client, mocker):
+        self.mock_auth(mocker)
+        mocker.patch("flaskr.auth.auth.verify_decode_jwt",
+                     return_value={"permissions": ["create:movie"]})
+        response = client.post(
+            f"/api/{flaskr.API_VERSION}/movies/bulk",
+            data=json.dumps([
+                {"title": "Speed", "description": "A bus",
+                 "genre": "Action", "release_date": "10-06-1994"},
+            ]),
+            headers=self.headers)
+        assert response.status_code == 201
+
+        entries = SearchEntry.matching("bus", kind="movie").all()
+        assert [entry.title for entry in entries] == ["Speed"]
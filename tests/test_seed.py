@@ -0,0 +1,97 @@
+"""
+Test suite for the `flask seed` command.
+"""
+
+import pytest
+from sqlalchemy import func, inspect
+
+import flaskr as flaskr
+from flaskr.config import TestingConfig
+from flaskr.data.db import db, init_db
+from flaskr.data.models import Actor, Movie, movie_actor
+from flaskr.data.search import SearchEntry
+
+
+class TestSeed:
+    """Test suite for the `flask seed` command."""
+
+    # Not named "app", pytest-flask would push a request context of it
+    # and the commands would run on it.
+    @pytest.fixture
+    def seed_app(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(
+            TestingConfig, "SQLALCHEMY_DATABASE_URI",
+            f"sqlite:///{tmp_path / 'seed.sqlite3'}")
+        app = flaskr.create_app(test_config=True)
+        with app.app_context():
+            init_db()
+        yield app
+        with app.app_context():
+            db.engine.dispose()
+
+    def seed(self, app, *args):
+        result = app.test_cli_runner().invoke(args=["seed", *args])
+        assert result.exit_code == 0, result.output
+        return result
+
+    def dump(self, app):
+        with app.app_context():
+            return (
+                [actor.format(embed=set()) for actor in Actor.query.all()],
+                [movie.format(embed=set()) for movie in Movie.query.all()],
+                db.session.query(movie_actor).order_by(
+                    movie_actor.c.movie_id, movie_actor.c.actor_id).all(),
+            )
+
+    def test_seed_inserts_actors_movies_and_casts(self, seed_app):
+        result = self.seed(seed_app, "--actors", "50", "--movies", "30",
+                           "--cast-size", "2:5", "--chunk-size", "7")
+        assert "Inserted 50 actors, 30 movies" in result.output
+
+        with seed_app.app_context():
+            assert Actor.query.count() == 50
+            assert Movie.query.count() == 30
+            cast_sizes = [len(movie.actors) for movie in Movie.query.all()]
+            assert min(cast_sizes) >= 2
+            assert max(cast_sizes) <= 5
+
+            movie = Movie.query.first()
+            assert movie.format()["genre"]
+            assert SearchEntry.matching(movie.title, kind="movie").count()
+            assert {index["name"] for index in inspect(
+                db.engine).get_indexes("actor")} == {
+                    "ix_actor_name", "ix_actor_age"}
+
+    def test_same_seed_inserts_the_same_rows(self, seed_app, tmp_path,
+                                             monkeypatch):
+        self.seed(seed_app, "--actors", "20", "--movies", "20", "--seed", "42")
+
+        monkeypatch.setattr(
+            TestingConfig, "SQLALCHEMY_DATABASE_URI",
+            f"sqlite:///{tmp_path / 'other.sqlite3'}")
+        other = flaskr.create_app(test_config=True)
+        with other.app_context():
+            init_db()
+        self.seed(other, "--actors", "20", "--movies", "20", "--seed", "42")
+
+        assert self.dump(seed_app) == self.dump(other)
+
+    def test_seed_adds_rows_after_the_existing_ones(self, seed_app):
+        self.seed(seed_app, "--actors", "10", "--movies", "10", "--seed", "1")
+        self.seed(seed_app, "--actors", "10", "--movies", "10", "--seed", "2")
+
+        with seed_app.app_context():
+            assert Actor.query.count() == 20
+            assert db.session.query(func.count(movie_actor.c.movie_id)).filter(
+                movie_actor.c.actor_id > 10, movie_actor.c.movie_id <= 10
+            ).scalar() == 0
+
+            actor = Actor(name="james", age=20, gender="M")
+            actor.insert()
+            assert actor.id == 21
+
+    def test_invalid_cast_size_fails(self, seed_app):
+        result = seed_app.test_cli_runner().invoke(
+            args=["seed", "--cast-size", "5:2"])
+        assert result.exit_code == 2
+        assert "MIN:MAX" in result.output
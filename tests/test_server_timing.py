@@ -0,0 +1,121 @@
+"""
+Test suite for the Server-Timing instrumentation.
+"""
+
+import pytest
+from flask import g
+
+import flaskr as flaskr
+from flaskr.config import TestingConfig
+from flaskr.data.models import Movie
+from flaskr.utils import server_timing
+from flaskr.utils.server_timing import _NOT_TIMED, timed
+
+
+def parse_server_timing(value):
+    """Durations of the Server-Timing header, in ms by phase."""
+    timings = {}
+    for metric in value.split(", "):
+        name, duration = metric.split(";dur=")
+        timings[name] = float(duration)
+    return timings
+
+
+@pytest.fixture
+def timed_client(mocker):
+    mocker.patch.object(TestingConfig, "SERVER_TIMING", True)
+    app = flaskr.create_app(test_config=True)
+    with app.test_client() as client:
+        yield client
+
+
+class TestServerTiming:
+    """Test suite for the Server-Timing instrumentation."""
+
+    @classmethod
+    def setup_class(cls):
+        cls.app = flaskr.create_app(test_config=True)
+        cls.app_context = cls.app.test_request_context()
+        cls.app_context.push()
+
+    @classmethod
+    def teardown_class(cls):
+        cls.app_context.pop()
+
+    def setup_method(self, method):
+        self.movie_url = f"/api/{flaskr.API_VERSION}/movies"
+        self.movie = Movie(
+            title="movie", release_date="01-01-2020", genre="Action")
+        self.movie.insert()
+
+    def teardown_method(self, method):
+        for movie in Movie.query.all():
+            movie.delete()
+
+    def mock_auth(self, mocker):
+        mocker.patch("flaskr.auth.auth.get_token_auth_header", return_value="")
+        mocker.patch("flaskr.auth.auth.verify_decode_jwt",
+                     return_value={"permissions": ["get:movie"]})
+
+    def test_get_movies_has_server_timing(self, timed_client, mocker):
+        self.mock_auth(mocker)
+
+        response = timed_client.get(self.movie_url)
+
+        assert response.status_code == 200
+        timings = parse_server_timing(response.headers["Server-Timing"])
+        assert set(timings) == {"auth", "db", "format", "serialize", "total"}
+        assert all(duration >= 0 for duration in timings.values())
+        assert timings["total"] >= timings["db"]
+
+    def test_get_movie_has_server_timing(self, timed_client, mocker):
+        self.mock_auth(mocker)
+
+        response = timed_client.get(f"{self.movie_url}/{self.movie.id}")
+
+        assert response.status_code == 200
+        timings = parse_server_timing(response.headers["Server-Timing"])
+        assert {"auth", "db", "format", "serialize"} <= set(timings)
+
+    def test_errors_have_server_timing(self, timed_client):
+        response = timed_client.get(self.movie_url)
+
+        assert response.status_code == 401
+        timings = parse_server_timing(response.headers["Server-Timing"])
+        assert "auth" in timings
+        assert "total" in timings
+
+    def test_server_timing_is_logged(self, timed_client, mocker):
+        self.mock_auth(mocker)
+        log = mocker.spy(server_timing.logger, "info")
+
+        response = timed_client.get(self.movie_url)
+
+        log.assert_called_once()
+        message = log.call_args.args[0] % log.call_args.args[1:]
+        assert message.startswith("GET /api/")
+        assert message.endswith(response.headers["Server-Timing"])
+
+    def test_no_server_timing_when_disabled(self, client, mocker):
+        self.mock_auth(mocker)
+
+        response = client.get(self.movie_url)
+
+        assert response.status_code == 200
+        assert "Server-Timing" not in response.headers
+
+    def test_timed_is_a_no_op_when_disabled(self):
+        assert g.get("server_timing") is None
+        assert timed("format") is _NOT_TIMED
+
+    def test_timed_adds_up_the_phase(self):
+        g.server_timing = {}
+        try:
+            with timed("format"):
+                pass
+            with timed("format"):
+                pass
+            assert list(g.server_timing) == ["format"]
+            assert g.server_timing["format"] >= 0
+        finally:
+            del g.server_timing
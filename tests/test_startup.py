@@ -0,0 +1,77 @@
+"""
+Test suite for the startup of the app.
+"""
+
+import os
+import subprocess
+import sys
+
+import flaskr as flaskr
+from sqlalchemy import inspect
+
+from flaskr.config import TestingConfig
+from flaskr.data.db import db, dispose_engines
+from flaskr.routes.frontend import get_auth0_client
+
+
+class TestStartup:
+    """Test suite for the startup of the app."""
+
+    def create_app(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(
+            TestingConfig, "SQLALCHEMY_DATABASE_URI",
+            f"sqlite:///{tmp_path / 'startup.sqlite3'}")
+        return flaskr.create_app(test_config=True)
+
+    def test_import_has_no_side_effect(self):
+        code = (
+            "import sys, flaskr\n"
+            "assert 'app' not in vars(flaskr)\n"
+            "assert 'jose' not in sys.modules\n"
+            "assert 'authlib' not in sys.modules\n"
+            "assert 'prometheus_client' not in sys.modules\n"
+            "assert flaskr.app is flaskr.app\n"
+        )
+        subprocess.run([sys.executable, "-c", code], check=True)
+
+    def test_metrics_are_only_imported_when_enabled(self):
+        code = (
+            "import sys, flaskr\n"
+            "flaskr.create_app(test_config=True)\n"
+            "assert 'prometheus_client' not in sys.modules\n"
+        )
+        env = dict(os.environ, METRICS="false")
+        subprocess.run([sys.executable, "-c", code], env=env, check=True)
+
+    def test_schema_is_created_by_the_init_db_command(
+        self, tmp_path, monkeypatch
+    ):
+        app = self.create_app(tmp_path, monkeypatch)
+        with app.app_context():
+            assert inspect(db.engine).get_table_names() == []
+
+        result = app.test_cli_runner().invoke(args=["init-db"])
+        assert result.exit_code == 0
+
+        with app.app_context():
+            tables = inspect(db.engine).get_table_names()
+        assert {"movie", "actor", "association", "search_index"} <= set(
+            tables)
+
+    def test_forked_process_gets_new_connections(
+        self, tmp_path, monkeypatch
+    ):
+        app = self.create_app(tmp_path, monkeypatch)
+        with app.app_context():
+            pool = db.engine.pool
+            dispose_engines()
+            assert db.engine.pool is not pool
+
+    def test_auth0_client_is_created_on_first_use(
+        self, tmp_path, monkeypatch
+    ):
+        app = self.create_app(tmp_path, monkeypatch)
+        with app.app_context():
+            client = get_auth0_client()
+            assert client.name == "auth0"
+            assert get_auth0_client() is client